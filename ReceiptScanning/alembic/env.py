@@ -22,6 +22,7 @@ from models import import_jobs  # noqa: F401,E402
 from models import merchants  # noqa: F401,E402
 from models import password_reset_tokens  # noqa: F401,E402
 from models import products  # noqa: F401,E402
+from models import product_keywords  # noqa: F401,E402
 from models import receiptitems  # noqa: F401,E402
 from models import receipts  # noqa: F401,E402
 from models import transactions  # noqa: F401,E402
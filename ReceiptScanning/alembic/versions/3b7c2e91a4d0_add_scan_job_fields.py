@@ -0,0 +1,38 @@
+"""add scan job fields
+
+Revision ID: 3b7c2e91a4d0
+Revises: f0469f6edf33
+Create Date: 2026-10-18 10:12:41.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c2e91a4d0'
+down_revision: Union[str, Sequence[str], None] = 'f0469f6edf33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('import_jobs', sa.Column('account_id', sa.Integer(), nullable=True))
+    op.add_column('import_jobs', sa.Column('transaction_id', sa.Integer(), nullable=True))
+    op.add_column('import_jobs', sa.Column('description', sa.String(length=255), nullable=True))
+    op.add_column('import_jobs', sa.Column('merchant_name', sa.String(length=255), nullable=True))
+    op.create_foreign_key(op.f('fk_import_jobs_account_id_accounts'), 'import_jobs', 'accounts', ['account_id'], ['id'])
+    op.create_foreign_key(op.f('fk_import_jobs_transaction_id_transactions'), 'import_jobs', 'transactions', ['transaction_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('fk_import_jobs_transaction_id_transactions'), 'import_jobs', type_='foreignkey')
+    op.drop_constraint(op.f('fk_import_jobs_account_id_accounts'), 'import_jobs', type_='foreignkey')
+    op.drop_column('import_jobs', 'merchant_name')
+    op.drop_column('import_jobs', 'description')
+    op.drop_column('import_jobs', 'transaction_id')
+    op.drop_column('import_jobs', 'account_id')
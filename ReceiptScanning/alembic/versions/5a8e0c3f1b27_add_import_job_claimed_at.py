@@ -0,0 +1,28 @@
+"""add import job claimed_at
+
+Revision ID: 5a8e0c3f1b27
+Revises: e1f3b8c5a902
+Create Date: 2026-10-19 09:41:17.602334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a8e0c3f1b27'
+down_revision: Union[str, Sequence[str], None] = 'e1f3b8c5a902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('import_jobs', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('import_jobs', 'claimed_at')
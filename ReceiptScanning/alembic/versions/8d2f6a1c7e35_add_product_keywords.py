@@ -0,0 +1,36 @@
+"""add product keywords
+
+Revision ID: 8d2f6a1c7e35
+Revises: 3b7c2e91a4d0
+Create Date: 2026-10-18 19:02:17.443120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6a1c7e35'
+down_revision: Union[str, Sequence[str], None] = '3b7c2e91a4d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'product_keywords',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('keyword', sa.String(length=255), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_product_keywords')),
+        sa.UniqueConstraint('keyword', name=op.f('uq_product_keywords_keyword')),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('product_keywords')
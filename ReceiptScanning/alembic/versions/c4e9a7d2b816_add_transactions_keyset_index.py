@@ -0,0 +1,37 @@
+"""add transactions keyset index
+
+Revision ID: c4e9a7d2b816
+Revises: 8d2f6a1c7e35
+Create Date: 2026-10-18 21:37:05.118902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a7d2b816'
+down_revision: Union[str, Sequence[str], None] = '8d2f6a1c7e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_transactions_user_id_transaction_date_id',
+        'transactions',
+        ['user_id', 'transaction_date', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # InnoDB dropped its own index of the user_id foreign key once this one could back
+    # it: the foreign key needs it back before the last user_id index goes (error 1553)
+    if op.get_context().dialect.name == 'mysql':
+        op.create_index('fk_transactions_user_id_users', 'transactions', ['user_id'], unique=False)
+    op.drop_index('ix_transactions_user_id_transaction_date_id', table_name='transactions')
@@ -0,0 +1,47 @@
+"""add transactions hot path indexes
+
+Revision ID: e1f3b8c5a902
+Revises: c4e9a7d2b816
+Create Date: 2026-10-18 23:05:44.270391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f3b8c5a902'
+down_revision: Union[str, Sequence[str], None] = 'c4e9a7d2b816'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_transactions_user_id_type_transaction_date',
+     ['user_id', 'type', 'transaction_date', 'category_id', 'amount']),
+    ('ix_transactions_user_id_transaction_date_type',
+     ['user_id', 'transaction_date', 'type', 'amount']),
+    ('ix_transactions_user_id_category_id_transaction_date',
+     ['user_id', 'category_id', 'transaction_date', 'amount']),
+    ('ix_transactions_account_id_type',
+     ['account_id', 'type', 'amount']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in INDEXES:
+        op.create_index(name, 'transactions', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # InnoDB dropped its own index of the account_id foreign key once
+    # ix_transactions_account_id_type could back it: the foreign key needs it back
+    # before that index goes (error 1553). user_id keeps the keyset index.
+    if op.get_context().dialect.name == 'mysql':
+        op.create_index('fk_transactions_account_id_accounts', 'transactions', ['account_id'], unique=False)
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='transactions')
@@ -0,0 +1,118 @@
+"""Product categorization throughput: per-category extractOne (the previous
+clasifica_produse loop, one JSON load per receipt) vs the indexed ProductClassifier.
+
+A synthetic dictionary with --keywords entries is written to a temporary file,
+receipts of --products names are drawn from it (with OCR-like noise) and both
+classifiers must agree on every category.
+
+Usage (from ReceiptScanning/):
+    python -m benchmarks.bench_classifier [--keywords 10000] [--categories 40]
+                                          [--receipts 20] [--products 30]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from thefuzz import fuzz, process
+
+from helpers.category import ProductClassifier, incarca_baza_date
+
+SYLLABLES = [c + v for c in "bcdfghjlmnprstvz" for v in "aeiou"] + ["ine", "nza", "oco", "urt", "sii", "iel"]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+
+
+def _dictionary(rng: random.Random, keywords: int, categories: int) -> dict:
+    db = {f"Categorie {i}": [] for i in range(categories)}
+    names = list(db)
+    for _ in range(keywords):
+        db[rng.choice(names)].append(f"{_word(rng)} {_word(rng)}" if rng.random() < 0.5 else _word(rng))
+    return db
+
+
+def _noisy(rng: random.Random, keyword: str) -> str:
+    chars = list(keyword.upper())
+    if rng.random() < 0.5 and len(chars) > 3:
+        chars[rng.randrange(len(chars))] = rng.choice("ABCDEFGHIJKLMNOPRSTUVZ01")
+    return "".join(chars) + rng.choice(["", " 500G", " 1L", " BUC"])
+
+
+def _legacy(path: str, produse, prag_siguranta: int):
+    db = incarca_baza_date(path)
+    rezultate = []
+    for nume_produs in produse:
+        best_score, categorie_gasita = 0, None
+        for cat, keywords in db.items():
+            match = process.extractOne(nume_produs.lower(), keywords, scorer=fuzz.partial_ratio)
+            if match and match[1] > best_score:
+                best_score, categorie_gasita = match[1], cat
+        rezultate.append(categorie_gasita if best_score >= prag_siguranta else None)
+    return rezultate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keywords", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--receipts", type=int, default=20)
+    parser.add_argument("--products", type=int, default=30)
+    parser.add_argument("--threshold", type=int, default=85)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    db = _dictionary(rng, args.keywords, args.categories)
+    all_keywords = [kw for kws in db.values() for kw in kws]
+    receipts = [
+        [_noisy(rng, rng.choice(all_keywords)) if rng.random() < 0.8 else _word(rng).upper()
+         for _ in range(args.products)]
+        for _ in range(args.receipts)
+    ]
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(db, f)
+
+        start = time.perf_counter()
+        classifier = ProductClassifier(path)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy_ms, indexed_ms = [], []
+        for produse in receipts:
+            start = time.perf_counter()
+            expected = _legacy(path, produse, args.threshold)
+            legacy_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            classifier.reload_if_changed()
+            found = [
+                cat if score >= args.threshold else None
+                for cat, score in classifier.classify_many(produse, args.threshold)
+            ]
+            indexed_ms.append((time.perf_counter() - start) * 1000)
+
+            if found != expected:
+                raise SystemExit("indexed classifier disagrees with extractOne")
+    finally:
+        os.remove(path)
+
+    print(json.dumps({
+        "keywords": len(all_keywords),
+        "categories": args.categories,
+        "products_per_receipt": args.products,
+        "index_build_ms": round(build_ms, 1),
+        "legacy_ms_per_receipt": round(statistics.median(legacy_ms), 2),
+        "indexed_ms_per_receipt": round(statistics.median(indexed_ms), 2),
+        "speedup": round(statistics.median(legacy_ms) / statistics.median(indexed_ms), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""extrage_bon at full resolution vs pyramid mode (detect_max_side).
+
+Reports per-stage timings and the IoU of the pyramid crop box against the
+full-resolution one.
+
+Usage (from ReceiptScanning/):
+    python -m benchmarks.bench_extrage_bon [--max-side 800 1200 1600] [images...]
+
+Without images synthetic ~15 MP receipt photos are rendered.
+"""
+import argparse
+import json
+import time
+
+import cv2 as cv
+
+from benchmarks.synthetic_receipts import make_receipt
+from helpers.image_processing import limite_bon
+
+
+def _iou(a, b) -> float:
+    if a is None or b is None:
+        return 0.0
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def _run(img, max_side):
+    timings = {}
+    start = time.perf_counter()
+    box = limite_bon(img, {"detect_max_side": max_side}, timings)
+    total = (time.perf_counter() - start) * 1000
+    return box, round(total, 1), {k: round(v, 1) for k, v in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--max-side", type=int, nargs="+", default=[800, 1200, 1600])
+    parser.add_argument("--synthetic", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.images:
+        inputs = [(path, cv.imread(path)) for path in args.images]
+    else:
+        inputs = [
+            (f"synthetic-{seed}", make_receipt(items=20, width=1800, noise=6, photo=True, seed=seed).image)
+            for seed in range(args.synthetic)
+        ]
+
+    report = []
+    for name, img in inputs:
+        if img is None:
+            continue
+        full_box, full_ms, full_stages = _run(img, None)
+        entry = {
+            "image": name,
+            "shape": list(img.shape[:2]),
+            "full": {"box": full_box, "ms": full_ms, "stages_ms": full_stages},
+            "pyramid": [],
+        }
+        for max_side in args.max_side:
+            box, ms, stages = _run(img, max_side)
+            entry["pyramid"].append({
+                "max_side": max_side,
+                "box": box,
+                "ms": ms,
+                "stages_ms": stages,
+                "iou_vs_full": round(_iou(box, full_box), 4),
+                "speedup": round(full_ms / ms, 1) if ms else None,
+            })
+        report.append(entry)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Per-receipt Tesseract latency: one process per line vs a batched engine.
+
+Usage (from ReceiptScanning/):
+    python -m benchmarks.bench_ocr_engine [--engine auto|batch|tesserocr] [--repeat 3] [images...]
+
+Without images a synthetic 18-item receipt is rendered.
+"""
+import argparse
+import json
+import time
+
+import cv2 as cv
+import numpy as np
+
+from benchmarks.synthetic_receipts import make_receipt
+from helpers.image_processing import extrage_bon, preprocesare_generala, extrage_linii_text
+from helpers.ocr_engine import PytesseractLineEngine, create_ocr_engine
+
+
+def _line_slices(img: np.ndarray):
+    bon = extrage_bon(img)
+    gray, binary = preprocesare_generala(bon)
+    return extrage_linii_text(gray, binary)
+
+
+def _time_engine(engine, slices, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.recognize_lines(slices)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--engine", default="auto")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    inputs = [(path, cv.imread(path)) for path in args.images] or [("synthetic", make_receipt(items=18).image)]
+    before = PytesseractLineEngine()
+    after = create_ocr_engine(args.engine)
+
+    report = []
+    for name, img in inputs:
+        if img is None:
+            continue
+        slices = _line_slices(img)
+        before_ms = _time_engine(before, slices, args.repeat)
+        after_ms = _time_engine(after, slices, args.repeat)
+        report.append({
+            "image": name,
+            "lines": len(slices),
+            "engine": after.name,
+            "before_ms": round(before_ms, 1),
+            "after_ms": round(after_ms, 1),
+            "speedup": round(before_ms / after_ms, 2) if after_ms else None,
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""GET /transactions page latency: OFFSET pagination against keyset (cursor) pagination.
+
+Seeds one user with --rows transactions (1M by default) and times the query
+TransactionRepository builds for a page at increasing depths, once with
+offset=<depth> and once with the cursor of the row just before that depth.
+Runs on a throwaway SQLite file unless --url points at a MySQL database
+(mysql+pymysql://...), where missing tables are created and the seeded
+rows are removed at the end.
+
+Usage (from ReceiptScanning/):
+    python -m benchmarks.bench_pagination [--rows 1000000] [--limit 100]
+                                          [--depths 0 1000 10000 100000 500000 999000]
+                                          [--repeat 5] [--url URL] [--output report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import Session
+
+from models import (  # noqa: F401 - every mapper has to be known before the first flush
+    categorization_rules, email_reports, import_jobs, password_reset_tokens, products,
+    receiptitems, receipts, user_settings,
+)
+from models.accounts import Account
+from models.base import Base
+from models.transactions import Transaction
+from models.users import User
+from repository.transaction_repository import TransactionRepository
+
+
+def _seed(session: Session, rows: int) -> int:
+    user = User(username="bench_pagination", email="bench_pagination@example.com", password_hash="x")
+    session.add(user)
+    session.flush()
+    account = Account(user_id=user.id, name="Card", type="card", currency="RON")
+    session.add(account)
+    session.flush()
+
+    start = datetime(2020, 1, 1)
+    batch = 50_000
+    for first in range(0, rows, batch):
+        session.execute(insert(Transaction.__table__), [
+            {
+                "user_id": user.id,
+                "account_id": account.id,
+                "type": "expense",
+                "amount": 1 + i % 500,
+                "currency": "RON",
+                # several transactions per minute, so dates repeat and the id breaks ties
+                "transaction_date": start + timedelta(seconds=20 * (i // 3)),
+                "created_at": start,
+                "source_type": "manual",
+            }
+            for i in range(first, min(first + batch, rows))
+        ])
+    session.commit()
+    return user.id
+
+
+def _time(session: Session, query, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        session.execute(query).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10_000, 100_000, 500_000, 999_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'pagination.sqlite')}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+
+    results = []
+    with Session(engine) as session:
+        started = time.perf_counter()
+        user_id = _seed(session, args.rows)
+        seed_s = time.perf_counter() - started
+
+        base = TransactionRepository._read_query().where(Transaction.user_id == user_id)
+        for depth in [d for d in args.depths if d < args.rows]:
+            offset_query = TransactionRepository.paginate(base, args.limit, offset=depth)
+            after = None
+            if depth:
+                previous = session.execute(
+                    TransactionRepository.paginate(
+                        select(Transaction.transaction_date, Transaction.id).where(Transaction.user_id == user_id),
+                        1, offset=depth - 1,
+                    )
+                ).one()
+                after = (previous.transaction_date, previous.id)
+            keyset_query = TransactionRepository.paginate(base, args.limit, after=after)
+
+            offset_ids = [row[0].id for row in session.execute(offset_query)]
+            keyset_ids = [row[0].id for row in session.execute(keyset_query)]
+            session.expunge_all()
+            results.append({
+                "depth": depth,
+                "offset_ms": round(_time(session, offset_query, args.repeat), 2),
+                "keyset_ms": round(_time(session, keyset_query, args.repeat), 2),
+                "same_page": offset_ids == keyset_ids,
+            })
+            session.expunge_all()
+
+        if args.url:
+            session.execute(delete(Transaction).where(Transaction.user_id == user_id))
+            session.execute(delete(Account).where(Account.user_id == user_id))
+            session.execute(delete(User).where(User.id == user_id))
+            session.commit()
+
+    engine.dispose()
+    if tmpdir:
+        tmpdir.cleanup()
+
+    report = {
+        "dialect": engine.dialect.name,
+        "rows": args.rows,
+        "limit": args.limit,
+        "seed_s": round(seed_s, 1),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
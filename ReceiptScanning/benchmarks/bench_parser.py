@@ -0,0 +1,96 @@
+"""Throughput of the Vision text parser (_parse_items_from_lines) on stored receipts.
+
+The corpus is the Receipt.raw_text column of the configured database, a
+directory of .txt files (one receipt per file) or, when neither is given,
+synthetic receipts. Each round parses the whole corpus; the report gives
+receipts/s and lines/s for the best and median rounds.
+
+Usage (from ReceiptScanning/):
+    python -m benchmarks.bench_parser [--source db|dir|synthetic] [--corpus-dir texts/]
+                                      [--limit 5000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import List
+
+from benchmarks.synthetic_receipts import random_items, receipt_lines
+from helpers.vision import _extract_lines_from_vision, _parse_items_from_lines
+
+
+async def _load_from_db(limit: int) -> List[str]:
+    from sqlalchemy import select
+
+    from db.session import AsyncSessionLocal, engine
+    from models.receipts import Receipt
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Receipt.raw_text).where(Receipt.raw_text.is_not(None)).limit(limit)
+        )
+        texts = list(result.scalars())
+    await engine.dispose()
+    return texts
+
+
+def _load_from_dir(directory: str, limit: int) -> List[str]:
+    texts = []
+    for name in sorted(os.listdir(directory))[:limit]:
+        if name.endswith(".txt"):
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                texts.append(f.read())
+    return texts
+
+
+def _synthetic(limit: int) -> List[str]:
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    return ["\n".join(receipt_lines(random_items(rng, int(rng.integers(3, 40))))) for _ in range(limit)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", choices=["db", "dir", "synthetic"], default="synthetic")
+    parser.add_argument("--corpus-dir")
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.source == "db":
+        texts = asyncio.run(_load_from_db(args.limit))
+    elif args.source == "dir":
+        texts = _load_from_dir(args.corpus_dir, args.limit)
+    else:
+        texts = _synthetic(args.limit)
+
+    corpus = [_extract_lines_from_vision(text) for text in texts]
+    total_lines = sum(len(lines) for lines in corpus)
+    if not corpus:
+        raise SystemExit("empty corpus")
+
+    durations = []
+    items = 0
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        items = sum(len(_parse_items_from_lines(lines)) for lines in corpus)
+        durations.append(time.perf_counter() - start)
+
+    best, median = min(durations), statistics.median(durations)
+    print(json.dumps({
+        "source": args.source,
+        "receipts": len(corpus),
+        "lines": total_lines,
+        "items": items,
+        "best_receipts_per_s": round(len(corpus) / best, 1),
+        "best_lines_per_s": round(total_lines / best, 1),
+        "median_receipts_per_s": round(len(corpus) / median, 1),
+        "median_lines_per_s": round(total_lines / median, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
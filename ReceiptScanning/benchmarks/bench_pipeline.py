@@ -0,0 +1,165 @@
+"""Stage-by-stage benchmark of the Tesseract receipt pipeline on synthetic receipts.
+
+extrage_bon -> preprocesare_generala -> extrage_linii_text -> OCR -> extrage_date_produse
+
+For every (width, noise) configuration it reports per-stage latency, per-stage
+peak traced memory and items-extracted accuracy as JSON. When the tesseract
+binary is not available the OCR stage is skipped and the parser runs on the
+ground-truth text instead ("text_source": "ground_truth").
+
+Usage (from ReceiptScanning/):
+    python -m benchmarks.bench_pipeline [--widths 600 1200 2400] [--noise 0 8 16]
+                                        [--receipts 3] [--line-mode full|benzi] [--output report.json]
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+
+import pytesseract
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+from benchmarks.synthetic_receipts import make_receipt
+from helpers.image_processing import (
+    extrage_bon,
+    extrage_linii_text,
+    extrage_linii_text_benzi,
+    preprocesare_generala,
+)
+from helpers.ocr_engine import create_ocr_engine
+from helpers.text_processing import extrage_date_produse, procesare_date_brute
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _tesseract_available() -> bool:
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+class _Stages:
+    def __init__(self):
+        self.latency = {}
+        self.peak = {}
+
+    def run(self, name, fn, *args):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        result = fn(*args)
+        self.latency.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak.setdefault(name, []).append(max(0, peak - base))
+        return result
+
+
+def _accuracy(expected, extracted) -> float:
+    if not expected:
+        return 1.0
+    remaining = list(extracted)
+    matched = 0
+    for item in expected:
+        for i, (name, price) in enumerate(remaining):
+            if item.name.split()[0] in name and abs(price - item.quantity * item.unit_price) < 0.01:
+                matched += 1
+                del remaining[i]
+                break
+    return matched / len(expected)
+
+
+def _bench_config(width, noise, receipts, items, line_mode, engine):
+    stages = _Stages()
+    accuracies = []
+    lines_detected = []
+    lines_expected = []
+
+    for seed in range(receipts):
+        receipt = make_receipt(items=items, width=width, noise=noise, photo=True, seed=seed)
+
+        bon = stages.run("extrage_bon", extrage_bon, receipt.image, {"detect_max_side": 1600})
+        if line_mode == "benzi":
+            slices = stages.run("extrage_linii_text_benzi", extrage_linii_text_benzi, bon)
+        else:
+            gray, binary = stages.run("preprocesare_generala", preprocesare_generala, bon)
+            slices = stages.run("extrage_linii_text", extrage_linii_text, gray, binary)
+        lines_detected.append(len(slices))
+        lines_expected.append(sum(1 for line in receipt.lines if line))
+
+        if engine is not None:
+            texts = stages.run("ocr", engine.recognize_lines, slices)
+            randuri = [t.upper().strip() for t in texts if len(t) >= 3]
+        else:
+            randuri = [line.upper() for line in receipt.lines if len(line) >= 3]
+
+        date_brute, _ = stages.run("extrage_date_produse", extrage_date_produse, randuri)
+        produse = stages.run("procesare_date_brute", procesare_date_brute, date_brute)
+        accuracies.append(_accuracy(receipt.items, produse))
+
+    return {
+        "width": width,
+        "noise": noise,
+        "receipts": receipts,
+        "line_mode": line_mode,
+        "text_source": "ocr" if engine is not None else "ground_truth",
+        "stages": {
+            name: {
+                "latency_ms_median": round(statistics.median(values), 2),
+                "latency_ms_max": round(max(values), 2),
+                "peak_mem_kb": round(max(stages.peak[name]) / 1024, 1),
+            }
+            for name, values in stages.latency.items()
+        },
+        "lines_detected": lines_detected,
+        "lines_expected": lines_expected,
+        "items_accuracy": round(statistics.mean(accuracies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--widths", type=int, nargs="+", default=[600, 1200, 2400])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0, 8, 16])
+    parser.add_argument("--receipts", type=int, default=3)
+    parser.add_argument("--items", type=int, default=12)
+    parser.add_argument("--line-mode", choices=["full", "benzi"], default="full")
+    parser.add_argument("--engine", default="auto")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    engine = create_ocr_engine(args.engine) if _tesseract_available() else None
+
+    tracemalloc.start()
+    results = [
+        _bench_config(width, noise, args.receipts, args.items, args.line_mode, engine)
+        for width in args.widths
+        for noise in args.noise
+    ]
+    tracemalloc.stop()
+
+    report = {
+        "ocr_engine": engine.name if engine is not None else None,
+        # not available on Windows, the per-stage tracemalloc peaks still are
+        "max_rss_mb": _max_rss_mb(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Offline Vision client benchmark using the replay backend.
+
+Simulates N OCR workers scanning receipts at once against a backend with a
+fixed per-request latency, with and without the batching window.
+
+Usage (from ReceiptScanning/):
+    python -m benchmarks.bench_vision_batching [--images 32] [--workers 8] [--latency-ms 300]
+"""
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.vision_client import RecordingVisionBackend, ReplayVisionBackend, VisionBackend, VisionBatcher
+
+
+class _EchoBackend(VisionBackend):
+    def annotate(self, contents):
+        return [f"1 BUC x 4,99\nRECEIPT {c[:8].hex()}\nTOTAL 4,99" for c in contents]
+
+
+def _run(batcher: VisionBatcher, images, workers: int) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(batcher.annotate, images))
+    elapsed = time.perf_counter() - start
+    return {
+        "window_ms": batcher.window_ms,
+        "backend_calls": batcher.batches_sent,
+        "wall_ms": round(elapsed * 1000, 1),
+        "images_per_s": round(len(images) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--window-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    images = [f"receipt-{i}".encode() * 64 for i in range(args.images)]
+    with tempfile.TemporaryDirectory() as directory:
+        RecordingVisionBackend(_EchoBackend(), directory).annotate(images)
+        backend = ReplayVisionBackend(directory, latency_ms=args.latency_ms)
+
+        report = [
+            _run(VisionBatcher(backend, window_ms=0), images, args.workers),
+            _run(VisionBatcher(backend, window_ms=args.window_ms, max_inflight=args.workers), images, args.workers),
+        ]
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Synthetic Romanian receipts rendered with OpenCV, with their ground truth.
+
+Layout follows the fiscal receipts the parsers expect: a header with S.C. and
+C.I.F. lines, items as a "<qty> BUC. x <unit price>" line followed by the
+product name and line price, occasional REDUCERE lines, SUBTOTAL and TOTAL.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+
+PRODUCT_NAMES = [
+    "PAINE ALBA FELIATA", "LAPTE ZUZU 1.5L", "IAURT GRECESC", "BRANZA TELEMEA",
+    "APA PLATA BORSEC", "COCA COLA 2L", "BANANE", "ROSII CHERRY", "CASCAVAL",
+    "UNT PRESIDENT", "OUA M 10BUC", "CAFEA JACOBS", "CIOCOLATA MILKA",
+    "BISCUITI OREO", "SAMPON NIVEA", "DETERGENT ARIEL", "HARTIE IGIENICA",
+    "PIEPT PUI", "SUC PORTOCALE", "BERE URSUS",
+]
+
+
+@dataclass
+class SyntheticItem:
+    name: str
+    quantity: int
+    unit_price: float
+    discount: float = 0.0
+
+    @property
+    def price(self) -> float:
+        return round(self.quantity * self.unit_price - self.discount, 2)
+
+
+@dataclass
+class SyntheticReceipt:
+    lines: List[str]
+    items: List[SyntheticItem]
+    total: float
+    image: Optional[np.ndarray] = None
+    box: Optional[Tuple[int, int, int, int]] = None
+    meta: dict = field(default_factory=dict)
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.2f}".replace(".", ",")
+
+
+def receipt_lines(items: List[SyntheticItem]) -> List[str]:
+    lines = [
+        "S.C. MEGA IMAGE S.R.L.",
+        "C.I.F. RO6719278",
+        "BUCURESTI SECTOR 1",
+        "",
+    ]
+    for item in items:
+        lines.append(f"{item.quantity},000 BUC. x {_fmt(item.unit_price)}")
+        lines.append(f"{item.name}    {_fmt(item.quantity * item.unit_price)} B")
+        if item.discount:
+            lines.append(f"REDUCERE -{_fmt(item.discount)}")
+    total = round(sum(item.price for item in items), 2)
+    lines += [
+        f"SUBTOTAL {_fmt(total)}",
+        f"TOTAL {_fmt(total)}",
+        f"CARD {_fmt(total)}",
+        "BON FISCAL",
+    ]
+    return lines
+
+
+def random_items(rng: np.random.Generator, count: int) -> List[SyntheticItem]:
+    items = []
+    for _ in range(count):
+        unit_price = round(float(rng.integers(150, 4000)) / 100, 2)
+        quantity = int(rng.integers(1, 4))
+        discount = round(unit_price * 0.1, 2) if rng.random() < 0.2 else 0.0
+        items.append(SyntheticItem(str(rng.choice(PRODUCT_NAMES)), quantity, unit_price, discount))
+    return items
+
+
+def render_receipt(
+    lines: List[str],
+    width: int = 800,
+    noise: float = 0.0,
+    photo: bool = False,
+    seed: int = 0,
+) -> Tuple[np.ndarray, Tuple[int, int, int, int]]:
+    """Render lines on white paper, optionally placed on a textured background
+    like a phone photo. Returns the image and the paper box (x0, y0, x1, y1)."""
+    rng = np.random.default_rng(seed)
+    scale = width / 800
+    line_h = int(40 * scale)
+    font_scale = 0.8 * scale
+    thickness = max(1, int(round(2 * scale)))
+
+    paper_h = int(60 * scale) + line_h * len(lines)
+    paper = np.full((paper_h, width, 3), 245, dtype=np.uint8)
+    for i, text in enumerate(lines):
+        if text:
+            cv.putText(
+                paper, text, (int(20 * scale), int(50 * scale) + i * line_h),
+                cv.FONT_HERSHEY_SIMPLEX, font_scale, (25, 25, 25), thickness,
+            )
+
+    if not photo:
+        img, box = paper, (0, 0, width, paper_h)
+    else:
+        margin_x, margin_y = int(width * 0.4), int(paper_h * 0.08)
+        h, w = paper_h + 2 * margin_y, width + 2 * margin_x
+        img = rng.normal(70, 25, (h, w, 3)).clip(0, 255).astype(np.uint8)
+        img = cv.GaussianBlur(img, (0, 0), 3)
+
+        # jagged paper border, as real receipt edges are never straight
+        x0, y0, x1, y1 = margin_x, margin_y, margin_x + width, margin_y + paper_h
+        corners = [np.array(p, dtype=float) for p in [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]]
+        border = []
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            t = np.linspace(0, 1, 400)[:, None]
+            border.append(a + (b - a) * t + rng.normal(0, 1.5 * scale, (400, 2)))
+        mask = np.zeros((h, w), dtype=np.uint8)
+        cv.fillPoly(mask, [np.vstack(border).astype(np.int32)], 255)
+        canvas = np.zeros_like(img)
+        canvas[y0:y1, x0:x1] = paper
+        img[mask > 0] = canvas[mask > 0]
+        img[(mask > 0) & (canvas.sum(axis=2) == 0)] = 245
+        box = (x0, y0, x1, y1)
+
+    if noise:
+        img = (img + rng.normal(0, noise, img.shape)).clip(0, 255).astype(np.uint8)
+    return img, box
+
+
+def make_receipt(
+    items: int = 12,
+    width: int = 800,
+    noise: float = 0.0,
+    photo: bool = False,
+    seed: int = 0,
+) -> SyntheticReceipt:
+    rng = np.random.default_rng(seed)
+    receipt_items = random_items(rng, items)
+    lines = receipt_lines(receipt_items)
+    image, box = render_receipt(lines, width=width, noise=noise, photo=photo, seed=seed)
+    return SyntheticReceipt(
+        lines=lines,
+        items=receipt_items,
+        total=round(sum(item.price for item in receipt_items), 2),
+        image=image,
+        box=box,
+        meta={"items": items, "width": width, "noise": noise, "photo": photo, "seed": seed},
+    )
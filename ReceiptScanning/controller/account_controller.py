@@ -1,7 +1,7 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
+from sqlalchemy import select, func
 
 from db.session import get_db
 from models.users import User
@@ -53,45 +53,28 @@ async def list_accounts(
     
     return accounts
 
-# list accounts with balance sum(income) - sum(expenses) and transaction count
+# list accounts with balance sum(income) - sum(expenses) and transaction count (one query)
 @router.get("/with-balance", response_model=List[AccountWithBalance])
 async def list_accounts_with_balance(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(Account).where(Account.user_id == current_user.id).order_by(Account.is_default.desc(), Account.created_at))
-    accounts = result.scalars().all()
+    repo = AccountRepository(db)
     
-    accounts_with_balance = []
-    for account in accounts:
-        # sum(income) - sum(expenses) and count transactions
-        result = await db.execute(select(
-            func.sum(
-                case(
-                    (Transaction.type == "income", Transaction.amount),
-                    else_=-Transaction.amount
-                )
-            ).label("balance"),
-            func.count(Transaction.id).label("count")
-        ).where(Transaction.account_id == account.id))
-        
-        balance_val, count_val = result.one()
-        
-        accounts_with_balance.append(
-            AccountWithBalance(
-                id=account.id,
-                user_id=account.user_id,
-                name=account.name,
-                type=account.type,
-                currency=account.currency,
-                is_default=account.is_default,
-                created_at=account.created_at,
-                balance=float(balance_val) if balance_val else 0.0,
-                transaction_count=int(count_val) if count_val else 0
-            )
+    return [
+        AccountWithBalance(
+            id=account.id,
+            user_id=account.user_id,
+            name=account.name,
+            type=account.type,
+            currency=account.currency,
+            is_default=account.is_default,
+            created_at=account.created_at,
+            balance=balance,
+            transaction_count=transaction_count
         )
-    
-    return accounts_with_balance
+        for account, balance, transaction_count in await repo.list_with_balance(current_user.id)
+    ]
 
 @router.get("/{account_id}/details", response_model=AccountWithBalance)
 async def get_account_details(
@@ -1,14 +1,17 @@
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, and_
 
 from db.session import get_db
 from models.users import User
 from models.categories import Category
 from models.transactions import Transaction
-from schemas.category import CategoryCreate, CategoryUpdate, CategoryRead, CategoryWithStats
+from schemas.category import CategoryCreate, CategoryUpdate, CategoryRead, CategoryWithStats, RecategorizationRead
 from helpers.auth_dependencies import get_current_user, get_admin_user
+from helpers.aggregate_cache import aggregate_cache
+from service.recategorization_service import TransactionRecategorizer
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -48,6 +51,34 @@ async def create_category(
     
     return new_category
 
+# re-run the categorization rules over stored transactions (one user or everyone)
+@router.post("/recategorize", response_model=RecategorizationRead)
+async def recategorize_transactions(
+    user_id: Optional[int] = Query(None),
+    type: Optional[str] = Query(None, pattern="^(expense|income|transfer)$"),
+    dry_run: bool = Query(True),
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    dry_run=true only returns the diff, dry_run=false applies it
+    """
+    result = await TransactionRecategorizer(db, chunk_size=chunk_size).run(
+        user_id=user_id, transaction_type=type, dry_run=dry_run
+    )
+    
+    return RecategorizationRead(
+        dry_run=result.dry_run,
+        scanned=result.scanned,
+        changed=result.changed,
+        moves=[
+            {"old_category_id": old_id, "new_category_id": new_id, "count": count}
+            for (old_id, new_id), count in result.moves.items()
+        ],
+        changes=result.changes,
+    )
+
 # list categories
 @router.get("/", response_model=List[CategoryRead])
 async def list_categories(
@@ -75,44 +106,55 @@ async def list_categories(
 @router.get("/stats", response_model=List[CategoryWithStats])
 async def get_categories_with_stats(
     type: str = Query(None, pattern="^(expense|income)$"),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # all categories
-    query = select(Category).where((Category.user_id == current_user.id) | (Category.user_id == None))
+    cache_key = ("category_stats", type, start_date, end_date)
+    cached = aggregate_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        return cached
+    version = aggregate_cache.version(current_user.id)
+    
+    # every category with its transactions in one LEFT JOIN, the filters on the
+    # transactions stay in the ON clause so categories without any are kept
+    join_on = [
+        Transaction.category_id == Category.id,
+        Transaction.user_id == current_user.id
+    ]
+    if start_date:
+        join_on.append(Transaction.transaction_date >= start_date)
+    if end_date:
+        join_on.append(Transaction.transaction_date <= end_date)
+    
+    query = select(
+        Category,
+        func.count(Transaction.id).label("count"),
+        func.sum(Transaction.amount).label("total")
+    ).outerjoin(Transaction, and_(*join_on)
+    ).where((Category.user_id == current_user.id) | (Category.user_id == None))
     
     if type:
         query = query.where(Category.type == type)
     
-    result = await db.execute(query)
-    categories = result.scalars().all()
-    
-    # stats for each category
-    categories_with_stats = []
-    for category in categories:
-        result = await db.execute(select(
-            func.count(Transaction.id).label("count"),
-            func.sum(Transaction.amount).label("total")
-        ).where(
-            Transaction.user_id == current_user.id,
-            Transaction.category_id == category.id
-        ))
-        
-        count_val, total_val = result.one()
-        
-        categories_with_stats.append(
-            CategoryWithStats(
-                id=category.id,
-                user_id=category.user_id,
-                name=category.name,
-                type=category.type,
-                is_system=category.is_system,
-                created_at=category.created_at,
-                transaction_count=int(count_val) if count_val else 0,
-                total_amount=float(total_val) if total_val else 0.0
-            )
+    result = await db.execute(query.group_by(Category.id).order_by(Category.id))
+    
+    categories_with_stats = [
+        CategoryWithStats(
+            id=category.id,
+            user_id=category.user_id,
+            name=category.name,
+            type=category.type,
+            is_system=category.is_system,
+            created_at=category.created_at,
+            transaction_count=int(count_val) if count_val else 0,
+            total_amount=float(total_val) if total_val else 0.0
         )
+        for category, count_val, total_val in result.all()
+    ]
     
+    aggregate_cache.put(current_user.id, cache_key, categories_with_stats, version)
     return categories_with_stats
 
 # get category by id
@@ -225,28 +225,28 @@ async def get_recent_transactions(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(Transaction
+    # category name joined in, no lookup per transaction
+    result = await db.execute(select(
+            Transaction.id,
+            Transaction.type,
+            Transaction.amount,
+            Transaction.currency,
+            Transaction.description,
+            Transaction.transaction_date,
+            Category.name.label("category_name")
+        ).outerjoin(Category, Transaction.category_id == Category.id
         ).where(Transaction.user_id == current_user.id
         ).order_by(Transaction.transaction_date.desc()).limit(limit))
 
-    transactions = result.scalars().all()
-    
-    data = []
-    for t in transactions:
-        category_name = None
-        if t.category_id:
-            category = await db.get(Category, t.category_id)
-            if category:
-                category_name = category.name
-        
-        data.append({
+    return [
+        {
             "id": t.id,
             "type": t.type,
             "amount": float(t.amount),
             "currency": t.currency,
             "description": t.description,
-            "category_name": category_name,
+            "category_name": t.category_name,
             "transaction_date": t.transaction_date.isoformat()
-        })
-    
-    return data
+        }
+        for t in result.all()
+    ]
@@ -1,64 +1,195 @@
+import asyncio
+import json
 from datetime import datetime
 
-from fastapi import Depends, Header, HTTPException, File, UploadFile, APIRouter, Form
+from fastapi import Depends, Header, HTTPException, File, UploadFile, APIRouter, Form, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.session import get_db
 from helpers.auth_dependencies import get_current_user
-from helpers.vision import extract_receipt_payload
-from typing import Optional
+from helpers.ocr_pool import ocr_pool, OcrPoolFull
+from helpers.ocr_cache import ocr_cache
+from helpers.uploads import retain_debug_upload
+from typing import List, Optional
 import os
 
+from models.import_jobs import ImportJob
 from models.users import User
-from schemas.receipt import ReceiptBaseModel
+from schemas.receipt import ReceiptBaseModel, BatchScanResult
 from schemas.transaction import TransactionRead
+from schemas.import_job import ScanJobRead
 from service.transaction_service import TransactionService
+from service.scan_service import scan_receipt_bytes, start_receipt_stream
+from service.scan_job_service import SCAN_JOB_TYPE, create_scan_job, scan_job_runner
 from repository.account_repository import AccountRepository
 router = APIRouter(prefix="/scan", tags=["scan"])
 
 
 API_KEY = os.getenv("API_KEY")
+SCAN_BATCH_MAX_FILES = int(os.getenv("SCAN_BATCH_MAX_FILES", "20"))
 async def verify_key(x_api_key: str = Header(...)):
     if API_KEY is None or x_api_key != API_KEY:
         raise HTTPException(status_code=403, detail="Invalid API key")
 
 
+# 429 with Retry-After when the OCR queue is full
+def _ocr_pool_full(e: OcrPoolFull) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many receipts are being processed, try again later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
 
+async def run_receipt_ocr(contents: bytes) -> ReceiptBaseModel:
+    try:
+        return await scan_receipt_bytes(contents)
+    except OcrPoolFull as e:
+        raise _ocr_pool_full(e)
 
-@router.post(
-    "",
-    response_model=ReceiptBaseModel,
-    dependencies=[Depends(verify_key), Depends(get_current_user)],
-)
-async def scan_receipt(file: UploadFile = File(...)):
-    image_path: str | None = None
+
+# read the whole upload in memory, nothing is written to disk
+async def read_upload(file: UploadFile) -> bytes:
     try:
         contents = await file.read()
-        with open(f"temp_{file.filename}", "wb") as f:
-            f.write(contents)
-            image_path = os.path.abspath(f.name)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to read uploaded file")
     finally:
         await file.close()
 
-    if not image_path:
-        os.remove(image_path)
-        raise HTTPException(status_code=404, detail="Missing 'image_path'")
+    if not contents:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+    retain_debug_upload(contents, file.filename)
+    return contents
+
+
+@router.post(
+    "",
+    response_model=ReceiptBaseModel,
+    dependencies=[Depends(verify_key), Depends(get_current_user)],
+)
+async def scan_receipt(file: UploadFile = File(...)):
+    contents = await read_upload(file)
     try:
-        payload = extract_receipt_payload(image_path)
+        payload = await run_receipt_ocr(contents)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process the receipt image: {e}")
-    finally:
-        if image_path and os.path.exists(image_path):
-            os.remove(image_path)
     return payload
 
 
+# one image of a batch, errors are reported inline instead of failing the whole batch
+async def _scan_batch_item(index: int, filename: Optional[str], contents: bytes, limit: asyncio.Semaphore) -> BatchScanResult:
+    if not contents:
+        return BatchScanResult(index=index, filename=filename, error="Uploaded file is empty", status_code=400)
+
+    async with limit:
+        try:
+            receipt = await run_receipt_ocr(contents)
+        except HTTPException as e:
+            return BatchScanResult(index=index, filename=filename, error=str(e.detail), status_code=e.status_code)
+        except Exception as e:
+            return BatchScanResult(
+                index=index,
+                filename=filename,
+                error=f"Failed to process the receipt image: {e}",
+                status_code=500,
+            )
+
+    return BatchScanResult(index=index, filename=filename, receipt=receipt)
+
+
+@router.post(
+    "/batch",
+    dependencies=[Depends(verify_key), Depends(get_current_user)],
+)
+async def scan_receipt_batch(
+    files: List[UploadFile] = File(...),
+    stream_format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+):
+    """
+    streams one BatchScanResult per image as soon as it is ready (not in upload order)
+    """
+    if len(files) > SCAN_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {SCAN_BATCH_MAX_FILES} files per batch")
+
+    # read everything before streaming, uploads are closed once the handler returns
+    uploads = []
+    for file in files:
+        try:
+            uploads.append((file.filename, await file.read()))
+        except Exception:
+            uploads.append((file.filename, b""))
+        finally:
+            await file.close()
+
+    for filename, contents in uploads:
+        if contents:
+            retain_debug_upload(contents, filename)
+
+    # never take more pool slots than there are workers, the rest waits here
+    limit = asyncio.Semaphore(max(1, ocr_pool.max_workers))
+
+    async def results():
+        tasks = [
+            asyncio.create_task(_scan_batch_item(i, filename, contents, limit))
+            for i, (filename, contents) in enumerate(uploads)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if stream_format == "sse":
+                    yield f"event: receipt\ndata: {result.model_dump_json()}\n\n"
+                else:
+                    yield result.model_dump_json() + "\n"
+            if stream_format == "sse":
+                yield "event: done\ndata: {}\n\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(results(), media_type=media_type)
+
+
+@router.post(
+    "/stream",
+    dependencies=[Depends(verify_key), Depends(get_current_user)],
+)
+async def scan_receipt_stream(file: UploadFile = File(...)):
+    """
+    line-by-line Tesseract scan streamed as SSE: one "item" event per product, then "done"
+    """
+    contents = await read_upload(file)
+    try:
+        items = await start_receipt_stream(contents)
+    except OcrPoolFull as e:
+        raise _ocr_pool_full(e)
+
+    async def events():
+        count = 0
+        try:
+            async for item in items:
+                count += 1
+                yield f"event: item\ndata: {item.model_dump_json()}\n\n"
+        except Exception as e:
+            error = {"detail": f"Failed to process the receipt image: {e}"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+            return
+        finally:
+            await items.aclose()
+        yield f"event: done\ndata: {json.dumps({'items': count})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @router.post(
     "/transaction",
     response_model=TransactionRead,
+    responses={202: {"model": ScanJobRead}},
     dependencies=[Depends(verify_key)],
 )
 async def scan_and_create_transaction(
@@ -66,30 +197,40 @@ async def scan_and_create_transaction(
     file: UploadFile = File(...),
     description: Optional[str] = Form(None),
     merchant_name: Optional[str] = Form(None),
+    background: bool = Form(False),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    background=true: answer 202 with a scan job, poll GET /scan/jobs/{job_id}
+    """
     repo = AccountRepository(db)
-    image_path: str | None = None
-    try:
-        contents = await file.read()
-        with open(f"temp_{file.filename}", "wb") as f:
-            f.write(contents)
-            image_path = os.path.abspath(f.name)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to read uploaded file")
-    finally:
-        await file.close()
-
-    if not image_path:
-        raise HTTPException(status_code=404, detail="Missing 'image_path'")
+    contents = await read_upload(file)
 
     service = TransactionService(db)
     account = await repo.get_by_id(account_id=account_id,user_id=current_user.id)
     if account is None:
         raise HTTPException(status_code=404, detail="Account not found")
+
+    if background:
+        job = await create_scan_job(
+            db,
+            user_id=current_user.id,
+            account_id=account_id,
+            contents=contents,
+            original_name=file.filename,
+            description=description,
+            merchant_name=merchant_name,
+        )
+        scan_job_runner.enqueue(job.id)
+        return JSONResponse(
+            status_code=202,
+            content=ScanJobRead.model_validate(job).model_dump(mode="json"),
+            headers={"Location": f"/scan/jobs/{job.id}"},
+        )
+
     try:
-        receipt_payload = extract_receipt_payload(image_path)
+        receipt_payload = await run_receipt_ocr(contents)
         transaction = await service.create_with_receipt(
             user_id=current_user.id,
             account_id=account_id,
@@ -100,10 +241,26 @@ async def scan_and_create_transaction(
             transaction_date=datetime.now(),
             merchant_name=merchant_name,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process the receipt image: {e}")
-    finally:
-        if image_path and os.path.exists(image_path):
-            os.remove(image_path)
 
-    return await service.build_transaction_read(transaction)
\ No newline at end of file
+    return await service.build_transaction_read(transaction)
+
+
+@router.get("/jobs/{job_id}", response_model=ScanJobRead, dependencies=[Depends(verify_key)])
+async def get_scan_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    job = await db.get(ImportJob, job_id)
+    if not job or job.user_id != current_user.id or job.type != SCAN_JOB_TYPE:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
+
+@router.get("/cache/stats", dependencies=[Depends(verify_key), Depends(get_current_user)])
+async def get_ocr_cache_stats():
+    return ocr_cache.stats()
\ No newline at end of file
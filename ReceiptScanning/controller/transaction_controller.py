@@ -1,19 +1,16 @@
 from typing import List, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func, and_
-from decimal import Decimal
 
 from db.session import get_db
 from models.users import User
 from models.transactions import Transaction
 from models.accounts import Account
-from models.merchants import Merchant
-from models.categories import Category
 from schemas.transaction import TransactionCreate, TransactionUpdate, TransactionRead
 from helpers.auth_dependencies import get_current_user
 from helpers.categorization import CategorizationService
+from repository.transaction_repository import TransactionRepository, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
@@ -44,7 +41,8 @@ async def create_transaction(
         user_id=current_user.id,
         merchant_name=payload.merchant_name,
         description=payload.description,
-        transaction_type=payload.type
+        transaction_type=payload.type,
+        merchant_id=merchant_id
     )
     
     new_transaction = Transaction(
@@ -64,11 +62,12 @@ async def create_transaction(
     await db.commit()
     await db.refresh(new_transaction)
     
-    return await _build_transaction_read(new_transaction, db)
+    return await TransactionRepository(db).get_read(new_transaction.id, current_user.id)
 
-# list transactions with filters
+# list transactions with filters, newest first
 @router.get("/", response_model=List[TransactionRead])
 async def list_transactions(
+    response: Response,
     account_id: Optional[int] = Query(None),
     category_id: Optional[int] = Query(None),
     type: Optional[str] = Query(None, pattern="^(expense|income|transfer)$"),
@@ -76,29 +75,39 @@ async def list_transactions(
     end_date: Optional[datetime] = Query(None),
     limit: int = Query(100, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    query = select(Transaction).where(Transaction.user_id == current_user.id)
-    
-    if account_id:
-        query = query.where(Transaction.account_id == account_id)
-    if category_id:
-        query = query.where(Transaction.category_id == category_id)
-    if type:
-        query = query.where(Transaction.type == type)
-    if start_date:
-        query = query.where(Transaction.transaction_date >= start_date)
-    if end_date:
-        query = query.where(Transaction.transaction_date <= end_date)
-    
-    query = query.order_by(Transaction.transaction_date.desc())
-    query = query.offset(offset).limit(limit)
-    
-    result = await db.execute(query)
-    transactions = result.scalars().all()
-    
-    return [await _build_transaction_read(t, db) for t in transactions]
+    """
+    cursor: value of the X-Next-Cursor header of the previous page; offset is only
+    kept for older clients and gets slower the deeper the page
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    transactions = await TransactionRepository(db).list_reads(
+        current_user.id,
+        account_id=account_id,
+        category_id=category_id,
+        transaction_type=type,
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit,
+        offset=offset,
+        after=after,
+    )
+    
+    # a full page may have a next one (limit=0 returns an empty page, as before)
+    if transactions and len(transactions) == limit:
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.transaction_date, last.id)
+    
+    return transactions
 
 # get transaction by id
 @router.get("/{transaction_id}", response_model=TransactionRead)
@@ -107,12 +116,12 @@ async def get_transaction(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    transaction = await db.get(Transaction, transaction_id)
+    transaction = await TransactionRepository(db).get_read(transaction_id, current_user.id)
     
-    if not transaction or transaction.user_id != current_user.id:
+    if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
-    return await _build_transaction_read(transaction, db)
+    return transaction
 
 # update transaction (if category changed, learn from correction)
 @router.put("/{transaction_id}", response_model=TransactionRead)
@@ -157,7 +166,7 @@ async def update_transaction(
     await db.commit()
     await db.refresh(transaction)
     
-    return await _build_transaction_read(transaction, db)
+    return await TransactionRepository(db).get_read(transaction.id, current_user.id)
 
 # delete transaction
 @router.delete("/{transaction_id}", status_code=204)
@@ -175,42 +184,3 @@ async def delete_transaction(
     await db.commit()
     
     return None
-
-# helper to build TransactionRead
-async def _build_transaction_read(transaction: Transaction, db: AsyncSession) -> TransactionRead:
-    # related entities
-    merchant_name = None
-    if transaction.merchant_id:
-        merchant = await db.get(Merchant, transaction.merchant_id)
-        if merchant:
-            merchant_name = merchant.display_name
-    
-    category_name = None
-    if transaction.category_id:
-        category = await db.get(Category, transaction.category_id)
-        if category:
-            category_name = category.name
-    
-    account_name = None
-    if transaction.account_id:
-        account = await db.get(Account, transaction.account_id)
-        if account:
-            account_name = account.name
-    
-    return TransactionRead(
-        id=transaction.id,
-        user_id=transaction.user_id,
-        account_id=transaction.account_id,
-        merchant_id=transaction.merchant_id,
-        category_id=transaction.category_id,
-        type=transaction.type,
-        amount=Decimal(str(transaction.amount)),
-        currency=transaction.currency,
-        transaction_date=transaction.transaction_date,
-        description=transaction.description,
-        source_type=transaction.source_type,
-        created_at=transaction.created_at,
-        merchant_name=merchant_name,
-        category_name=category_name,
-        account_name=account_name
-    )
@@ -1,4 +1,6 @@
 import os
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from dotenv import load_dotenv
 
@@ -24,6 +26,26 @@ AsyncSessionLocal = async_sessionmaker(
     class_=AsyncSession
 )
 
+# blocking code (OCR workers, scripts) cannot use the async engine
+SYNC_DATABASE_URL = "mysql+pymysql://{0}:{1}@{2}:{3}/{4}".format(
+    os.getenv("DATABASE_USER"),
+    os.getenv("DATABASE_PASSWORD"),
+    os.getenv("DATABASE_HOST"),
+    os.getenv("DATABASE_PORT"),
+    os.getenv("DATABASE_DB")
+)
+
+sync_engine = create_engine(
+    SYNC_DATABASE_URL,
+    future=True,
+    pool_pre_ping=True
+)
+
+SyncSessionLocal = sessionmaker(
+    bind=sync_engine,
+    expire_on_commit=False
+)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
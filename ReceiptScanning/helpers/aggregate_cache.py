@@ -0,0 +1,134 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.categories import Category
+from models.transactions import Transaction
+
+load_dotenv()
+
+# other worker processes do not see our invalidations, their entries expire after this
+STATS_CACHE_TTL_S = float(os.getenv("STATS_CACHE_TTL_S", "30"))
+# cached aggregates, and users whose version is remembered, least recently used dropped first
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "10000"))
+
+
+# per-user aggregates (category stats, ...) kept until one of the user's transactions changes
+class AggregateCache:
+    def __init__(self, ttl_s: float = STATS_CACHE_TTL_S, maxsize: int = STATS_CACHE_SIZE):
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, Hashable], Tuple[int, int, float, Any]]" = OrderedDict()
+        # user id -> clock value of the user's last invalidation
+        self._user_versions: "OrderedDict[int, int]" = OrderedDict()
+        self._clock = 0
+        # version of every user whose own version was dropped, it only grows so a
+        # value computed before the drop never matches again
+        self._floor = 0
+        # bumped by writes that cannot be traced to one user (bulk statements, categories)
+        self._global_version = 0
+        self._swept_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get((user_id, key))
+        if entry is None:
+            return None
+        if not self._is_current(user_id, entry):
+            del self._entries[(user_id, key)]
+            return None
+        self._entries.move_to_end((user_id, key))
+        return entry[3]
+
+    def _is_current(self, user_id: int, entry) -> bool:
+        user_version, global_version, stored_at, _ = entry
+        return (
+            (user_version, global_version) == self.version(user_id)
+            and time.monotonic() - stored_at < self.ttl_s
+        )
+
+    def version(self, user_id: int) -> Tuple[int, int]:
+        return self._user_versions.get(user_id, self._floor), self._global_version
+
+    def put(self, user_id: int, key: Hashable, value: Any, version: Tuple[int, int]) -> None:
+        # computed before a concurrent write landed, not worth keeping
+        if version != self.version(user_id):
+            return
+        self._sweep()
+        self._entries[(user_id, key)] = (*version, time.monotonic(), value)
+        self._entries.move_to_end((user_id, key))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    # drops expired and outdated entries, at most once per TTL so put stays cheap
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._swept_at < self.ttl_s:
+            return
+        self._swept_at = now
+        for (user_id, key), entry in list(self._entries.items()):
+            if not self._is_current(user_id, entry):
+                del self._entries[(user_id, key)]
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._clock += 1
+        self._user_versions[user_id] = self._clock
+        self._user_versions.move_to_end(user_id)
+        while len(self._user_versions) > self.maxsize:
+            _, dropped = self._user_versions.popitem(last=False)
+            self._floor = max(self._floor, dropped)
+
+    def invalidate_all(self) -> None:
+        self._global_version += 1
+        self._entries.clear()
+
+
+aggregate_cache = AggregateCache()
+
+
+def _invalidate(session: Session) -> None:
+    for user_id in session.info.get("aggregate_users", ()):
+        aggregate_cache.invalidate_user(user_id)
+    if session.info.get("aggregate_all"):
+        aggregate_cache.invalidate_all()
+
+
+@event.listens_for(Session, "before_flush")
+def _aggregates_before_flush(session, flush_context, instances):
+    for objects in (session.new, session.dirty, session.deleted):
+        for obj in objects:
+            if isinstance(obj, Transaction) and obj.user_id is not None:
+                session.info.setdefault("aggregate_users", set()).add(obj.user_id)
+            elif isinstance(obj, (Transaction, Category)):
+                session.info["aggregate_all"] = True
+
+
+# the flushing session reads its own writes at once, the other ones after the commit
+@event.listens_for(Session, "after_flush")
+def _aggregates_after_flush(session, flush_context):
+    _invalidate(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _aggregates_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Transaction, Category):
+        orm_execute_state.session.info["aggregate_all"] = True
+        aggregate_cache.invalidate_all()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _aggregates_after_transaction(session):
+    _invalidate(session)
+    session.info.pop("aggregate_users", None)
+    session.info.pop("aggregate_all", None)
@@ -1,11 +1,290 @@
-from typing import Optional
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import event, insert, select, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from helpers.keyword_matcher import KeywordMatcher
 from models.categories import Category
 from models.categorization_rules import CategorizationRule
 from models.merchants import Merchant
 from models.user_merchant_preferences import UserMerchantPreference
 
+load_dotenv()
+
+# other worker processes do not see our invalidations, their matchers expire after this
+RULES_CACHE_TTL_S = float(os.getenv("RULES_CACHE_TTL_S", "60"))
+MERCHANT_CACHE_SIZE = int(os.getenv("MERCHANT_CACHE_SIZE", "10000"))
+CATEGORIZATION_CONTEXT_TTL_S = float(os.getenv("CATEGORIZATION_CONTEXT_TTL_S", "60"))
+CATEGORIZATION_CONTEXT_SIZE = int(os.getenv("CATEGORIZATION_CONTEXT_SIZE", "1000"))
+
+
+# snapshot version of rules read from uncommitted changes, never fresh
+UNCOMMITTED_RULES = -1
+
+
+# compiled keyword rules and default ("Diverse") categories of every transaction type,
+# shared by every request of the process
+class KeywordRuleCache:
+    def __init__(self, ttl_s: float = RULES_CACHE_TTL_S):
+        self.ttl_s = ttl_s
+        # bumped whenever a rule or a category changes
+        self.version = 0
+        self._loaded: Optional[Tuple[int, float]] = None
+        self._matchers: Dict[str, KeywordMatcher] = {}
+        self._default_ids: Dict[str, int] = {}
+
+    def invalidate(self) -> None:
+        self.version += 1
+
+    def clear(self) -> None:
+        self.invalidate()
+        self._loaded = None
+        self._matchers = {}
+        self._default_ids = {}
+
+    def is_fresh(self, version: int, loaded_at: float) -> bool:
+        return version == self.version and time.monotonic() - loaded_at < self.ttl_s
+
+    async def _load(self, db: AsyncSession) -> Tuple[Dict[str, KeywordMatcher], Dict[str, int]]:
+        result = await db.execute(
+            select(Category.type, CategorizationRule.keyword, CategorizationRule.category_id)
+            .join(Category)
+            .where(CategorizationRule.is_active == True)
+            .order_by(Category.type, CategorizationRule.priority.desc(), CategorizationRule.id)
+        )
+        rules: Dict[str, list] = {}
+        for transaction_type, keyword, category_id in result:
+            rules.setdefault(transaction_type, []).append((keyword, category_id))
+
+        result = await db.execute(
+            select(Category.type, Category.id)
+            .where(
+                Category.is_system == True,
+                Category.name == "Diverse"  # Default "Other" category
+            ).order_by(Category.id.desc())
+        )
+        return {t: KeywordMatcher(type_rules) for t, type_rules in rules.items()}, dict(result.all())
+
+    # (version, matchers, default ids) as loaded, refreshes replace them instead of mutating
+    async def snapshot(self, db: AsyncSession) -> Tuple[int, Dict[str, KeywordMatcher], Dict[str, int]]:
+        if self._loaded and self.is_fresh(*self._loaded) and not has_pending_rule_changes(db):
+            return self._loaded[0], self._matchers, self._default_ids
+
+        # a change committed while the rules are loading must not be cached under the new version
+        version = self.version
+        matchers, default_ids = await self._load(db)
+        # checked after the load, which may have autoflushed the session's own changes:
+        # rules it has not committed yet are only for this session, never shared
+        if has_pending_rule_changes(db):
+            return UNCOMMITTED_RULES, matchers, default_ids
+
+        self._matchers, self._default_ids = matchers, default_ids
+        self._loaded = (version, time.monotonic())
+        return version, matchers, default_ids
+
+    async def get(self, db: AsyncSession, transaction_type: str) -> KeywordMatcher:
+        _, matchers, _ = await self.snapshot(db)
+        return matchers.get(transaction_type) or _NO_RULES
+
+    async def get_default_id(self, db: AsyncSession, transaction_type: str) -> Optional[int]:
+        _, _, default_ids = await self.snapshot(db)
+        return default_ids.get(transaction_type)
+
+
+def has_pending_rule_changes(db: AsyncSession) -> bool:
+    return bool(db.sync_session.info.get("rules_changed"))
+
+
+_NO_RULES = KeywordMatcher([])
+keyword_rule_cache = KeywordRuleCache()
+
+
+def _touches_rules(session: Session) -> bool:
+    return any(
+        isinstance(obj, (CategorizationRule, Category))
+        for objects in (session.new, session.dirty, session.deleted)
+        for obj in objects
+    )
+
+
+# the flushing session already reads its own changes, the others once they are committed
+@event.listens_for(Session, "before_flush")
+def _rules_before_flush(session, flush_context, instances):
+    if _touches_rules(session):
+        session.info["rules_changed"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _rules_after_flush(session, flush_context):
+    if session.info.get("rules_changed"):
+        keyword_rule_cache.invalidate()
+
+
+# insert()/update()/delete() statements skip the flush
+@event.listens_for(Session, "do_orm_execute")
+def _rules_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (CategorizationRule, Category):
+        orm_execute_state.session.info["rules_changed"] = True
+        keyword_rule_cache.invalidate()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _rules_after_transaction(session):
+    if session.info.pop("rules_changed", False):
+        keyword_rule_cache.invalidate()
+
+
+# normalized merchant name -> merchant id, least recently used names are dropped first
+class MerchantCache:
+    def __init__(self, maxsize: int = MERCHANT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, normalized_name: str) -> Optional[int]:
+        merchant_id = self._ids.get(normalized_name)
+        if merchant_id is not None:
+            self._ids.move_to_end(normalized_name)
+        return merchant_id
+
+    def put(self, normalized_name: str, merchant_id: int) -> None:
+        self._ids[normalized_name] = merchant_id
+        self._ids.move_to_end(normalized_name)
+        while len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+
+merchant_cache = MerchantCache()
+
+
+# a merchant inserted by a transaction that is rolled back must not stay cached
+@event.listens_for(Session, "after_commit")
+def _merchants_after_commit(session):
+    for normalized_name, merchant_id in session.info.pop("pending_merchants", {}).items():
+        merchant_cache.put(normalized_name, merchant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _merchants_after_rollback(session):
+    session.info.pop("pending_merchants", None)
+
+
+# everything categorize_transaction needs for one user, so categorizing costs no SQL
+@dataclass
+class CategorizationContext:
+    user_id: int
+    # merchant id -> category id chosen by the user
+    preferences: Dict[int, int]
+    matchers: Dict[str, KeywordMatcher]
+    default_ids: Dict[str, int]
+    rules_version: int
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def categorize(
+        self,
+        merchant_id: Optional[int],
+        merchant_name: Optional[str],
+        description: Optional[str],
+        transaction_type: str,
+        use_default: bool = True
+    ) -> Optional[int]:
+        if merchant_id and merchant_id in self.preferences:
+            return self.preferences[merchant_id]
+
+        text_to_analyze = f"{merchant_name or ''} {description or ''}".lower()
+        matcher = self.matchers.get(transaction_type)
+        category_id = matcher.first_match(text_to_analyze) if matcher else None
+        if category_id or not use_default:
+            return category_id
+
+        return self.default_ids.get(transaction_type)
+
+
+# per-user contexts, dropped after CATEGORIZATION_CONTEXT_TTL_S, on a rule change or on a correction
+class CategorizationContextCache:
+    def __init__(self, ttl_s: float = CATEGORIZATION_CONTEXT_TTL_S, maxsize: int = CATEGORIZATION_CONTEXT_SIZE):
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self._contexts: "OrderedDict[int, CategorizationContext]" = OrderedDict()
+        self._invalidations: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def invalidate(self, user_id: int) -> None:
+        self._contexts.pop(user_id, None)
+        self._invalidations[user_id] = self._invalidations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        self._contexts.clear()
+
+    def _is_fresh(self, context: CategorizationContext) -> bool:
+        return (
+            keyword_rule_cache.is_fresh(context.rules_version, context.loaded_at)
+            and time.monotonic() - context.loaded_at < self.ttl_s
+        )
+
+    async def get(self, db: AsyncSession, user_id: int) -> CategorizationContext:
+        # a session holding an uncommitted correction or rule change reads its own rows
+        # and the context it builds from them is never shared
+        uncommitted = user_id in db.info.get("corrected_users", ()) or has_pending_rule_changes(db)
+        context = None if uncommitted else self._contexts.get(user_id)
+        if context and self._is_fresh(context):
+            self._contexts.move_to_end(user_id)
+            return context
+
+        invalidations = self._invalidations.get(user_id, 0)
+        rules_version, matchers, default_ids = await keyword_rule_cache.snapshot(db)
+        loaded_at = time.monotonic()
+        result = await db.execute(
+            select(UserMerchantPreference.merchant_id, UserMerchantPreference.category_id)
+            .where(UserMerchantPreference.user_id == user_id)
+        )
+        context = CategorizationContext(
+            user_id=user_id,
+            preferences=dict(result.all()),
+            matchers=matchers,
+            default_ids=default_ids,
+            rules_version=rules_version,
+            loaded_at=loaded_at,
+        )
+
+        # a correction committed while loading, the next call reloads
+        shareable = not uncommitted and rules_version != UNCOMMITTED_RULES
+        if shareable and self._invalidations.get(user_id, 0) == invalidations:
+            self._contexts[user_id] = context
+            self._contexts.move_to_end(user_id)
+            while len(self._contexts) > self.maxsize:
+                self._contexts.popitem(last=False)
+        return context
+
+
+categorization_contexts = CategorizationContextCache()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _contexts_after_transaction(session):
+    for user_id in session.info.pop("corrected_users", ()):
+        categorization_contexts.invalidate(user_id)
+
+
 # automatic categorization based on keywords and user preferences
 class CategorizationService:    
     def __init__(self, db: AsyncSession):
@@ -16,91 +295,83 @@ class CategorizationService:
         user_id: int, 
         merchant_name: Optional[str], 
         description: Optional[str],
-        transaction_type: str
+        transaction_type: str,
+        merchant_id: Optional[int] = None
     ) -> Optional[int]:
 
-        # 1 user specific merchant preferences
-        if merchant_name:
+        if merchant_name and merchant_id is None:
+            # callers that already resolved the merchant pass its id
             merchant_id = await self._get_or_create_merchant(merchant_name)
-            if merchant_id:
-                category_id = await self._get_user_merchant_preference(user_id, merchant_id)
-                if category_id:
-                    return category_id
-                
+
+        # 1 user specific merchant preferences, 3 keyword rules, 4 default category
+        context = await self.get_context(user_id)
+        if merchant_id and merchant_id in context.preferences:
+            return context.preferences[merchant_id]
+
         # 2 check merchant default category
-                category_id = await self._get_merchant_default_category(merchant_id)
-                if category_id:
-                    return category_id
-        
-        # 3 keyword based categorization rules
-        text_to_analyze = f"{merchant_name or ''} {description or ''}".lower()
-        category_id = await self._apply_keyword_rules(text_to_analyze, transaction_type)
-        if category_id:
-            return category_id
-        
-        # 4 default category for transaction type
-        return await self._get_default_category(transaction_type)
+        if merchant_id:
+            category_id = await self._get_merchant_default_category(merchant_id)
+            if category_id:
+                return category_id
+
+        return context.categorize(None, merchant_name, description, transaction_type)
+
+    # preferences, rules and default categories of the user, loaded at most once per TTL
+    async def get_context(self, user_id: int) -> CategorizationContext:
+        return await categorization_contexts.get(self.db, user_id)
     
-    # helper to get/create merchant
+    # helper to get/create merchant: cached id, otherwise a single upsert
     async def _get_or_create_merchant(self, merchant_name: str) -> Optional[int]:
         normalized = merchant_name.lower().strip()
-        
-        result = await self.db.execute(select(Merchant).where(Merchant.normalized_name == normalized))
-        merchant = result.scalar_one_or_none()
-        
-        if not merchant:
-            merchant = Merchant(
-                normalized_name=normalized,
-                display_name=merchant_name
+
+        pending = self.db.info.setdefault("pending_merchants", {})
+        merchant_id = merchant_cache.get(normalized) or pending.get(normalized)
+        if merchant_id:
+            return merchant_id
+
+        values = {"normalized_name": normalized, "display_name": merchant_name}
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "mysql":
+            # LAST_INSERT_ID(id) makes lastrowid the existing id when the name is taken
+            stmt = mysql_insert(Merchant.__table__).values(**values)
+            stmt = stmt.on_duplicate_key_update(id=func.last_insert_id(Merchant.__table__.c.id))
+            result = await self.db.execute(stmt)
+            merchant_id = result.lastrowid
+        elif dialect == "sqlite":
+            await self.db.execute(
+                sqlite_insert(Merchant.__table__).values(**values)
+                .on_conflict_do_nothing(index_elements=["normalized_name"])
             )
-            self.db.add(merchant)
-            await self.db.flush()
-        
-        return merchant.id
+            result = await self.db.execute(select(Merchant.id).where(Merchant.normalized_name == normalized))
+            merchant_id = result.scalar_one()
+        else:
+            result = await self.db.execute(select(Merchant.id).where(Merchant.normalized_name == normalized))
+            merchant_id = result.scalar_one_or_none()
+            if merchant_id is None:
+                result = await self.db.execute(insert(Merchant.__table__).values(**values))
+                merchant_id = result.inserted_primary_key[0]
+
+        # cached once the transaction commits
+        pending[normalized] = merchant_id
+        return merchant_id
     
     # helper to get user preference for merchant
     async def _get_user_merchant_preference(self, user_id: int, merchant_id: int) -> Optional[int]:
-        result = await self.db.execute(select(UserMerchantPreference).where(
-            UserMerchantPreference.user_id == user_id,
-            UserMerchantPreference.merchant_id == merchant_id
-        ))
-        preference = result.scalar_one_or_none()
-        
-        return preference.category_id if preference else None
+        context = await self.get_context(user_id)
+        return context.preferences.get(merchant_id)
     
     # helper to get merchant's default category
     async def _get_merchant_default_category(self, merchant_id: int) -> Optional[int]:
         return None
     
-    # helper to apply keyword rules
+    # helper to apply keyword rules (highest priority first, then oldest rule)
     async def _apply_keyword_rules(self, text: str, transaction_type: str) -> Optional[int]:
-        result = await self.db.execute((
-            select(CategorizationRule)
-            .join(Category)
-            .where(
-                CategorizationRule.is_active == True,
-                Category.type == transaction_type
-            ).order_by(CategorizationRule.priority.desc())
-        ))
-        
-        rules = result.scalars().all()
-        
-        for rule in rules:
-            if rule.keyword.lower() in text:
-                return rule.category_id
-        
-        return None
+        matcher = await keyword_rule_cache.get(self.db, transaction_type)
+        return matcher.first_match(text)
     
     # helper to get system default category for transaction type
     async def _get_default_category(self, transaction_type: str) -> Optional[int]:
-        result = await self.db.execute(select(Category).where(
-            Category.is_system == True,
-            Category.type == transaction_type,
-            Category.name == "Diverse"  # Default "Other" category
-        ))
-        category = result.scalar_one_or_none()
-        
-        return category.id if category else None
+        return await keyword_rule_cache.get_default_id(self.db, transaction_type)
     
     # learn from user's correction
     async def learn_from_correction(
@@ -132,6 +403,10 @@ class CategorizationService:
         
         await self.db.flush()
 
+        # this session sees the new preference now, the other ones once it is committed
+        categorization_contexts.invalidate(user_id)
+        self.db.info.setdefault("corrected_users", set()).add(user_id)
+
 # functions to create default categories and rules
 async def create_default_categories(db: AsyncSession):
     default_categories = [
@@ -1,12 +1,23 @@
 import json
 import os
-from thefuzz import process, fuzz
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz as rfuzz
+from rapidfuzz import process as rprocess
+from rapidfuzz.utils import default_process
 
 DB_FILE = "baza_date_produse.json"
+PRODUCT_DICTIONARY = os.getenv("PRODUCT_DICTIONARY", "db")
+# partial_ratio needs shared bigrams: every break between two matched characters
+# costs an unmatched one, so with no shared bigram the score is at most 80
+INDEX_MAX_MISSED_SCORE = 80
 
-def incarca_baza_date():
-    if os.path.exists(DB_FILE):
-        with open(DB_FILE, "r", encoding="utf-8") as f:
+def incarca_baza_date(path=None):
+    path = path or DB_FILE
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     else:
         return {
@@ -15,11 +26,11 @@ def incarca_baza_date():
             "Lactate": ["lapte", "branza", "unt"]
         }
 
-def salveaza_baza_date(db):
-    with open(DB_FILE, "w", encoding="utf-8") as f:
+def salveaza_baza_date(db, path=None):
+    with open(path or DB_FILE, "w", encoding="utf-8") as f:
         json.dump(db, f, indent=4, ensure_ascii=False)
 
-def cere_categorie_manual(produs, db):
+def alege_categorie_manual(produs, db):
     # print(f"\n" + "="*50)
     # print(f"[?] NU recunosc produsul: '{produs}'")
     # print("-" * 50)
@@ -38,32 +49,214 @@ def cere_categorie_manual(produs, db):
         
         if categorie_aleasa in db:
             print(f"Adaug '{produs}' in categoria existenta: {categorie_aleasa}")
-        else:
-            db[categorie_aleasa] = []
-            
-        cuvant_cheie = produs.lower()
-        if cuvant_cheie not in db[categorie_aleasa]:
-            db[categorie_aleasa].append(cuvant_cheie)
-            salveaza_baza_date(db)
             
         return categorie_aleasa
 
+def cere_categorie_manual(produs, db):
+    categorie_aleasa = alege_categorie_manual(produs, db)
+    db.setdefault(categorie_aleasa, [])
+        
+    cuvant_cheie = produs.lower()
+    if cuvant_cheie not in db[categorie_aleasa]:
+        db[categorie_aleasa].append(cuvant_cheie)
+        salveaza_baza_date(db)
+        
+    return categorie_aleasa
+
+def _bigrame(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+# minimum bigram positions of the shorter string (length n) found in the other one
+# for partial_ratio to round to at least prag: 3M - 1 - (n + w) adjacent matches
+def _bigrame_minime(n, prag_siguranta):
+    r = (prag_siguranta - 0.5) / 100
+    return np.maximum(1, np.ceil(2 * n * (1.5 * r - 1) / (2 - r) - 1))
+
+
+# keyword dictionary loaded once, with a bigram index so each product is only
+# scored against keywords it shares characters with; reloads when the file changes
+class ProductClassifier:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DB_FILE
+        self._lock = threading.Lock()
+        self._load()
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _load(self) -> None:
+        mtime = self._mtime()
+        self._reset(incarca_baza_date(self.path))
+        self._mtime_loaded = mtime
+
+    def _reset(self, db: Dict[str, List[str]]) -> None:
+        with self._lock:
+            self.db: Dict[str, List[str]] = db
+            self._categories: List[str] = []
+            self._category_ids: Dict[str, int] = {}
+            self._keywords: List[str] = []
+            self._keyword_categories: List[int] = []
+            self._indexed = set()
+            self._lengths: List[int] = []
+            # one entry per bigram position, a keyword repeating a bigram is listed twice
+            self._postings: Dict[str, List[int]] = {}
+            self._arrays: Dict[str, np.ndarray] = {}
+            self._lengths_array: Optional[np.ndarray] = None
+            for categorie, keywords in db.items():
+                for keyword in keywords:
+                    self._add(categorie, keyword)
+                self._category(categorie)
+
+    def _category(self, categorie: str) -> int:
+        if categorie not in self._category_ids:
+            self._category_ids[categorie] = len(self._categories)
+            self._categories.append(categorie)
+        return self._category_ids[categorie]
+
+    def _add(self, categorie: str, keyword: str) -> None:
+        cat_id = self._category(categorie)
+        if (cat_id, keyword) in self._indexed:
+            return
+        self._indexed.add((cat_id, keyword))
+
+        processed = default_process(keyword)
+        idx = len(self._keywords)
+        self._keywords.append(processed)
+        self._keyword_categories.append(cat_id)
+        self._lengths.append(len(processed))
+        for i in range(len(processed) - 1):
+            bigram = processed[i:i + 2]
+            self._postings.setdefault(bigram, []).append(idx)
+            self._arrays.pop(bigram, None)
+        self._lengths_array = None
+
+    def reload_if_changed(self) -> bool:
+        if self._mtime() != self._mtime_loaded:
+            self._load()
+            return True
+        return False
+
+    # pick up keywords learned elsewhere, True when something changed; force
+    # re-reads the file even when its mtime did not move (coarse mtime resolution)
+    def refresh(self, force: bool = False) -> bool:
+        if not force:
+            return self.reload_if_changed()
+        mtime = self._mtime()
+        db = incarca_baza_date(self.path)
+        self._mtime_loaded = mtime
+        if db == self.db:
+            return False
+        self._reset(db)
+        return True
+
+    # a manually categorized product becomes a keyword (the whole file is rewritten)
+    def learn(self, produs: str, categorie: str) -> None:
+        cuvant_cheie = produs.lower()
+        with self._lock:
+            keywords = self.db.setdefault(categorie, [])
+            if cuvant_cheie in keywords:
+                return
+            keywords.append(cuvant_cheie)
+            self._add(categorie, cuvant_cheie)
+        salveaza_baza_date(self.db, self.path)
+        self._mtime_loaded = self._mtime()
+
+    def _posting_array(self, bigram: str) -> np.ndarray:
+        array = self._arrays.get(bigram)
+        if array is None:
+            array = np.array(self._postings.get(bigram, ()), dtype=np.int64)
+            self._arrays[bigram] = array
+        return array
+
+    def _candidates(self, query: str, prag_siguranta: int) -> np.ndarray:
+        if self._lengths_array is None:
+            self._lengths_array = np.array(self._lengths, dtype=np.int64)
+        lengths = self._lengths_array
+        if prag_siguranta <= INDEX_MAX_MISSED_SCORE or len(query) < 2:
+            return np.arange(len(self._keywords))
+
+        bigrams = _bigrame(query)
+        hits = np.bincount(
+            np.concatenate([self._posting_array(b) for b in bigrams] or [np.zeros(0, dtype=np.int64)]),
+            minlength=len(self._keywords),
+        )
+        # keywords not longer than the product: enough of their bigram positions occur in it;
+        # longer keywords only need one shared bigram (the bound is on the product's positions)
+        shorter = lengths <= len(query)
+        mask = np.where(shorter, hits >= _bigrame_minime(lengths, prag_siguranta), hits >= 1)
+        mask |= lengths < 2
+        return np.flatnonzero(mask)
+
+    # (category, score) per product, the same as extractOne with partial_ratio on
+    # every category: rounded scores, the first category wins a tie
+    def classify_many(self, produse: List[str], prag_siguranta: int = 85) -> List[Tuple[Optional[str], int]]:
+        if not produse:
+            return []
+        results = []
+        with self._lock:
+            categories = list(self._categories)
+            keyword_categories = np.array(self._keyword_categories, dtype=np.int64)
+            for produs in produse:
+                query = default_process(produs.lower())
+                columns = self._candidates(query, prag_siguranta)
+                if not len(columns):
+                    results.append((None, 0))
+                    continue
+
+                # below the cutoff the score is 0, those products go to the manual path anyway
+                scores = rprocess.cdist(
+                    [query],
+                    [self._keywords[i] for i in columns],
+                    scorer=rfuzz.partial_ratio,
+                    dtype=np.float64,
+                    score_cutoff=max(0, prag_siguranta - 0.5),
+                )[0]
+                best = np.full(len(categories), -1.0)
+                np.maximum.at(best, keyword_categories[columns], scores)
+                rounded = np.round(best)
+                cat_id = int(np.argmax(rounded))
+                score = int(rounded[cat_id])
+                results.append((categories[cat_id], score) if score > 0 else (None, 0))
+        return results
+
+
+_classifier: Optional[ProductClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+# PRODUCT_DICTIONARY=db (product_keywords table) or json (DB_FILE)
+def get_product_classifier() -> ProductClassifier:
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                if PRODUCT_DICTIONARY == "db":
+                    from helpers.product_dictionary import DbProductClassifier
+
+                    _classifier = DbProductClassifier()
+                else:
+                    _classifier = ProductClassifier(DB_FILE)
+    return _classifier
+
+
 def clasifica_produse(lista_produse, prag_siguranta=85):
-    db = incarca_baza_date()
+    classifier = get_product_classifier()
+    classifier.refresh()
     rezultate_finale = []
 
-    for nume_produs, pret in lista_produse:
-        best_score = 0
-        categorie_gasita = None
-        
-        cheie_produs = nume_produs.lower()
+    nume_produse = [nume_produs for nume_produs, _ in lista_produse]
+    scoruri = classifier.classify_many(nume_produse, prag_siguranta)
+    for i, (nume_produs, pret) in enumerate(lista_produse):
+        categorie_gasita, best_score = scoruri[i]
 
-        for cat, keywords in db.items():
-            match = process.extractOne(cheie_produs, keywords, scorer=fuzz.partial_ratio)
-            if match:
-                if match[1] > best_score:
-                    best_score = match[1]
-                    categorie_gasita = cat
+        # another worker may have learned it meanwhile, read through before asking
+        if best_score < prag_siguranta and classifier.refresh(force=True):
+            scoruri[i:] = classifier.classify_many(nume_produse[i:], prag_siguranta)
+            categorie_gasita, best_score = scoruri[i]
 
         if best_score >= prag_siguranta:
             rezultate_finale.append({
@@ -72,13 +265,15 @@ def clasifica_produse(lista_produse, prag_siguranta=85):
                 "categorie": categorie_gasita
             })
         else:
-            cat_manuala = cere_categorie_manual(nume_produs, db)
+            cat_manuala = alege_categorie_manual(nume_produs, classifier.db)
+            classifier.learn(nume_produs, cat_manuala)
             rezultate_finale.append({
                 "produs": nume_produs,
                 "pret": pret,
                 "categorie": cat_manuala
             })
 
-            db = incarca_baza_date()
+            # the new keyword can change the match of the products that follow
+            scoruri[i + 1:] = classifier.classify_many(nume_produse[i + 1:], prag_siguranta)
 
     return rezultate_finale
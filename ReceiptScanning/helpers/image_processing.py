@@ -1,3 +1,5 @@
+import time
+
 import cv2 as cv
 import numpy as np
 import pytesseract
@@ -9,87 +11,143 @@ def show_image(title,image):
     cv.destroyAllWindows()
 
 
-def extrage_bon(image, cfg=None):
-    default_cfg = {
-        "median_blur_ksize": 15,
-        "gauss_sigma": 75,
-        "sharpen_weight_1": 1.4,
-        "sharpen_weight_2": -0.9,
-        "threshold_value": 30,
-        "adaptive_blocksize": 11,
-        "adaptive_C": 2,
-        "erode_kernel_size": 3,
-        "erode_iterations": 1,
-        "canny_lower_coef": 0.67,
-        "canny_upper_coef": 1.33,
-        "contour_min_points": 150,
-        "offset_y": 50,
-        "offset_x": 10,
-    }
-
-    if cfg is None:
-        cfg = default_cfg
-    else:
-        temp = default_cfg.copy()
-        temp.update(cfg)
-        cfg = temp
+# decode an in-memory upload (bytes/memoryview) or read a path from disk
+def incarca_imagine(sursa):
+    if isinstance(sursa, str):
+        return cv.imread(sursa)
+    buf = np.frombuffer(sursa, dtype=np.uint8)
+    if buf.size == 0:
+        return None
+    return cv.imdecode(buf, cv.IMREAD_COLOR)
+
+
+BON_DEFAULT_CFG = {
+    "median_blur_ksize": 15,
+    "gauss_sigma": 75,
+    "sharpen_weight_1": 1.4,
+    "sharpen_weight_2": -0.9,
+    "threshold_value": 30,
+    "adaptive_blocksize": 11,
+    "adaptive_C": 2,
+    "erode_kernel_size": 3,
+    "erode_iterations": 1,
+    "canny_lower_coef": 0.67,
+    "canny_upper_coef": 1.33,
+    "contour_min_points": 150,
+    "offset_y": 50,
+    "offset_x": 10,
+    # pyramid mode: detect contours on a copy whose longest side is at most this many px
+    "detect_max_side": None,
+}
+
+
+def _ksize_impar(value, minim=3):
+    k = max(minim, int(round(value)))
+    return k if k % 2 == 1 else k + 1
+
 
+def _cronometreaza(timings, stage, start):
+    if timings is not None:
+        now = time.perf_counter()
+        timings[stage] = timings.get(stage, 0.0) + (now - start) * 1000
+        return now
+    return start
+
+
+# bounding box (xmin, ymin, xmax, ymax) of the receipt in original coordinates, None if not found
+def limite_bon(image, cfg=None, timings=None):
+    cfg = {**BON_DEFAULT_CFG, **(cfg or {})}
     if image is None or image.size == 0:
         return None
 
     h, w = image.shape[:2]
-    original_image = image.copy()
+    t = time.perf_counter()
+
+    scale = 1.0
+    max_side = cfg["detect_max_side"]
+    if max_side and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        image = cv.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv.INTER_AREA)
+        t = _cronometreaza(timings, "resize", t)
+
+    median_ksize = cfg["median_blur_ksize"] if scale == 1.0 else _ksize_impar(cfg["median_blur_ksize"] * scale)
+    blocksize = cfg["adaptive_blocksize"] if scale == 1.0 else _ksize_impar(cfg["adaptive_blocksize"] * scale)
 
     gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
-    mblur = cv.medianBlur(gray, cfg["median_blur_ksize"])
-    gblur = cv.GaussianBlur(mblur, (0, 0), cfg["gauss_sigma"])
+    t = _cronometreaza(timings, "gray", t)
+    mblur = cv.medianBlur(gray, median_ksize)
+    t = _cronometreaza(timings, "median_blur", t)
+    gblur = cv.GaussianBlur(mblur, (0, 0), cfg["gauss_sigma"] * scale)
+    t = _cronometreaza(timings, "gaussian_blur", t)
     sharpen = cv.addWeighted(
         mblur, cfg["sharpen_weight_1"],
         gblur, cfg["sharpen_weight_2"],
         0
     )
+    t = _cronometreaza(timings, "sharpen", t)
     thresh = cv.adaptiveThreshold(
         sharpen,
         255,
         cv.ADAPTIVE_THRESH_GAUSSIAN_C,
         cv.THRESH_BINARY,
-        cfg["adaptive_blocksize"],
+        blocksize,
         cfg["adaptive_C"]
     )
+    t = _cronometreaza(timings, "adaptive_threshold", t)
 
     median = np.median(thresh)
     lower = int(max(0, cfg["canny_lower_coef"] * median))
     upper = int(min(255, cfg["canny_upper_coef"] * median))
     edges = cv.Canny(thresh, lower, upper)
+    t = _cronometreaza(timings, "canny", t)
 
     contours, _ = cv.findContours(edges, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
 
     xmin, ymin = np.inf, np.inf
     xmax, ymax = -np.inf, -np.inf
     found = False
+    min_points = cfg["contour_min_points"] * scale
 
     for c in contours:
-        if len(c) > cfg["contour_min_points"]:
+        if len(c) > min_points:
             pts = c.reshape(-1, 2)
             xmin = min(xmin, pts[:, 0].min())
             xmax = max(xmax, pts[:, 0].max())
             ymin = min(ymin, pts[:, 1].min())
             ymax = max(ymax, pts[:, 1].max())
             found = True
+    _cronometreaza(timings, "contours", t)
 
     if not found:
-        return original_image
+        return None
+
+    if scale != 1.0:
+        # round inwards so the downscaled box never grows past the paper edge
+        xmin, ymin = int(np.ceil(xmin / scale)), int(np.ceil(ymin / scale))
+        xmax, ymax = int(np.floor(xmax / scale)), int(np.floor(ymax / scale))
 
     xmin = int(max(0, xmin + cfg["offset_x"]))
     ymin = int(max(0, ymin + cfg["offset_y"]))
     xmax = int(min(w, xmax - cfg["offset_x"]))
     ymax = int(min(h, ymax - cfg["offset_y"]))
     if xmin >= xmax or ymin >= ymax:
-        return original_image
+        return None
 
-    result = original_image[ymin:ymax, xmin:xmax].copy()
+    return xmin, ymin, xmax, ymax
+
+
+def extrage_bon(image, cfg=None, timings=None):
+    if image is None or image.size == 0:
+        return None
+
+    box = limite_bon(image, cfg, timings)
+    if box is None:
+        return image.copy()
+
+    xmin, ymin, xmax, ymax = box
+    result = image[ymin:ymax, xmin:xmax].copy()
     if result.size == 0:
-        return original_image
+        return image.copy()
 
     return result
 
@@ -113,27 +171,33 @@ def preprocesare_generala(image):
     )
     return resized, binary
 
-def extrage_linii_text(gray_image, binary_image):
-    kernel = cv.getStructuringElement(cv.MORPH_RECT, (30, 1))
-    dilated = cv.dilate(binary_image, kernel, iterations=1)
-    
-    projection = np.sum(dilated, axis=1)
-    lines = []
-    start = -1
-    threshold = 10 
-    
-    for y, val in enumerate(projection):
-        if val > threshold and start == -1:
-            start = y
-        elif val <= threshold and start != -1:
-            end = y
-            if end - start > 15: 
-                lines.append((max(0, start-2), min(binary_image.shape[0], end+2)))
-            start = -1
-            
-    if start != -1:
-        lines.append((start, binary_image.shape[0]))
+# (y1, y2) of every text band in a row projection: runs above threshold, found with diff/flatnonzero
+def detecteaza_benzi(projection, threshold=10, min_height=15, pad=2):
+    height = len(projection)
+    mask = np.asarray(projection) > threshold
+    if not mask.any():
+        return []
+
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # a band still open at the bottom is kept as is, like the original loop did
+    open_tail = mask[-1]
+    closed_starts = starts[:-1] if open_tail else starts
+    closed_ends = ends[:-1] if open_tail else ends
 
+    keep = (closed_ends - closed_starts) > min_height
+    lines = [
+        (max(0, int(y1) - pad), min(height, int(y2) + pad))
+        for y1, y2 in zip(closed_starts[keep], closed_ends[keep])
+    ]
+    if open_tail:
+        lines.append((int(starts[-1]), height))
+    return lines
+
+
+def _decupeaza_linii(gray_image, lines):
     slices = []
     for (y1, y2) in lines:
         roi = gray_image[y1:y2, :]
@@ -141,12 +205,55 @@ def extrage_linii_text(gray_image, binary_image):
             roi, 10, 10, 10, 10, cv.BORDER_CONSTANT, value=(255, 255, 255)
         )
         slices.append(roi_padded)
-        
     return slices
 
+
+def extrage_linii_text(gray_image, binary_image):
+    kernel = cv.getStructuringElement(cv.MORPH_RECT, (30, 1))
+    dilated = cv.dilate(binary_image, kernel, iterations=1)
+    
+    projection = np.sum(dilated, axis=1)
+    lines = detecteaza_benzi(projection, threshold=10, min_height=15, pad=2)
+    return _decupeaza_linii(gray_image, lines)
+
+
+# cheaper alternative to preprocesare_generala + extrage_linii_text:
+# lines are detected at the original scale and only the detected bands are upscaled 2x
+def extrage_linii_text_benzi(image, scale=2.0):
+    gray = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+    denoised = cv.bilateralFilter(gray, 5, 50, 50)
+    kernel_reparare = cv.getStructuringElement(cv.MORPH_ELLIPSE, (3, 3))
+    repaired = cv.morphologyEx(denoised, cv.MORPH_CLOSE, kernel_reparare)
+    binary = cv.adaptiveThreshold(
+        repaired,
+        255,
+        cv.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv.THRESH_BINARY_INV,
+        15,
+        4
+    )
+
+    kernel = cv.getStructuringElement(cv.MORPH_RECT, (15, 1))
+    dilated = cv.dilate(binary, kernel, iterations=1)
+    projection = np.sum(dilated, axis=1)
+    lines = detecteaza_benzi(projection, threshold=10, min_height=int(15 / scale), pad=1)
+
+    w = int(gray.shape[1] * scale)
+    slices = []
+    for (y1, y2) in lines:
+        band = cv.resize(gray[y1:y2, :], (w, int((y2 - y1) * scale)), interpolation=cv.INTER_CUBIC)
+        slices.append(cv.copyMakeBorder(
+            band, 10, 10, 10, 10, cv.BORDER_CONSTANT, value=(255, 255, 255)
+        ))
+    return slices
+
+def binarizeaza_linie(img_linie):
+    _, bw = cv.threshold(img_linie, 0, 255, cv.THRESH_BINARY + cv.THRESH_OTSU)
+    return bw
+
 def proceseaza_linie_ocr(img_linie):
     config = "--psm 6"
-    _, bw = cv.threshold(img_linie, 0, 255, cv.THRESH_BINARY + cv.THRESH_OTSU)
+    bw = binarizeaza_linie(img_linie)
     
     text = pytesseract.image_to_string(bw, lang='ron+eng', config=config)
     return text.strip()
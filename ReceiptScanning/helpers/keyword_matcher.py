@@ -0,0 +1,78 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Aho-Corasick automaton over lowercase keywords: every keyword found in a text
+# in a single pass, whatever the number of keywords
+class KeywordMatcher:
+    def __init__(self, keywords: Iterable[Tuple[str, object]]):
+        """keywords: (keyword, value) pairs in priority order, the first match in
+        that order wins. An empty keyword matches every text."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # best (lowest) rank of a keyword ending in the state, own or through fail links
+        self._rank: List[Optional[int]] = [None]
+        self._values: List[object] = []
+        self._always: Optional[int] = None
+
+        for rank, (keyword, value) in enumerate(keywords):
+            self._values.append(value)
+            keyword = keyword.lower()
+            if not keyword:
+                if self._always is None:
+                    self._always = rank
+                continue
+            self._add(keyword, rank)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _add(self, keyword: str, rank: int) -> None:
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._rank.append(None)
+            state = nxt
+        if self._rank[state] is None:
+            self._rank[state] = rank
+
+    def _link(self) -> None:
+        # breadth first, so the fail target of a state is always finished before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            fail_rank = self._rank[self._fail[state]]
+            if fail_rank is not None and (self._rank[state] is None or fail_rank < self._rank[state]):
+                self._rank[state] = fail_rank
+            for ch, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                queue.append(nxt)
+
+    def first_match(self, text: str) -> Optional[object]:
+        """Value of the highest priority keyword contained in text, None if none is."""
+        best = self._always
+        if best == 0 or len(self._goto) == 1:
+            return self._values[best] if best is not None else None
+
+        goto, fail, ranks = self._goto, self._fail, self._rank
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            rank = ranks[state]
+            if rank is not None and (best is None or rank < best):
+                best = rank
+                if best == 0:
+                    break
+        return self._values[best] if best is not None else None
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from helpers.vision import PARSER_VERSION
+from schemas.receipt import ReceiptBaseModel
+
+load_dotenv()
+
+
+# content-addressed cache of parsed receipts: in-memory LRU + optional SQLite tier
+class OcrResultCache:
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if disk_path:
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "OcrResultCache":
+        return cls(
+            max_bytes=int(os.getenv("OCR_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            disk_path=os.getenv("OCR_CACHE_PATH") or None,
+        )
+
+    @staticmethod
+    def key_for(contents: bytes) -> str:
+        return f"{hashlib.sha256(contents).hexdigest()}:{PARSER_VERSION}"
+
+    def get(self, key: str) -> Optional[ReceiptBaseModel]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return ReceiptBaseModel.model_validate_json(payload)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT payload FROM ocr_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    self._stats["disk_hits"] += 1
+                    self._remember(key, row[0])
+                    return ReceiptBaseModel.model_validate_json(row[0])
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, receipt: ReceiptBaseModel) -> None:
+        payload = receipt.model_dump_json()
+        with self._lock:
+            self._remember(key, payload)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (key, payload, created_at) VALUES (?, ?, ?)",
+                    (key, payload, time.time()),
+                )
+                self._conn.commit()
+
+    # hash + lookup in one call so callers can run it off the event loop
+    def lookup(self, contents: bytes) -> Tuple[str, Optional[ReceiptBaseModel]]:
+        key = self.key_for(contents)
+        return key, self.get(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "hits": hits,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM ocr_cache")
+                self._conn.commit()
+
+    # caller holds the lock
+    def _remember(self, key: str, payload: str) -> None:
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+
+        self._entries[key] = payload
+        self._size += size
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self._stats["evictions"] += 1
+
+
+ocr_cache = OcrResultCache.from_env()
@@ -0,0 +1,165 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+import cv2 as cv
+import numpy as np
+import pytesseract
+from dotenv import load_dotenv
+
+from helpers.image_processing import binarizeaza_linie
+
+load_dotenv()
+
+# Windows installs are not on PATH: the binary is looked up under this folder
+TESSERACT_PATH = os.getenv("TESSERACT_PATH")
+
+OCR_LANG = "ron+eng"
+OCR_PSM = 6
+# white rows between stacked lines so tesseract never merges two of them
+_STACK_GAP = 24
+
+
+# recognizes all line ROIs of one receipt, one string per ROI (same order)
+class OcrEngine(ABC):
+    name = "base"
+
+    @abstractmethod
+    def recognize_lines(self, images: List[np.ndarray]) -> List[str]:
+        ...
+
+
+# legacy behaviour: one tesseract process per line
+class PytesseractLineEngine(OcrEngine):
+    name = "line"
+
+    def recognize_lines(self, images: List[np.ndarray]) -> List[str]:
+        config = f"--psm {OCR_PSM}"
+        return [
+            pytesseract.image_to_string(binarizeaza_linie(img), lang=OCR_LANG, config=config).strip()
+            for img in images
+        ]
+
+
+# one tesseract process per receipt: lines are stacked into a single page
+# and words are mapped back to their ROI by vertical position
+class PytesseractBatchEngine(OcrEngine):
+    name = "batch"
+
+    def recognize_lines(self, images: List[np.ndarray]) -> List[str]:
+        if not images:
+            return []
+
+        page, offsets = _stack_lines([binarizeaza_linie(img) for img in images])
+        data = pytesseract.image_to_data(
+            page,
+            lang=OCR_LANG,
+            config=f"--psm {OCR_PSM}",
+            output_type=pytesseract.Output.DICT,
+        )
+
+        # words grouped per ROI and, inside it, per tesseract text line, so a ROI
+        # comes out the way image_to_string prints it: words joined by one space,
+        # text lines by a newline
+        lines: List[Dict[tuple, List[str]]] = [{} for _ in images]
+        for text, top, height, block, par, line in zip(
+            data["text"], data["top"], data["height"],
+            data["block_num"], data["par_num"], data["line_num"],
+        ):
+            text = text.strip()
+            if not text:
+                continue
+            center = top + height / 2
+            idx = bisect_right(offsets, center) - 1
+            if 0 <= idx < len(images):
+                lines[idx].setdefault((block, par, line), []).append(text)
+
+        return ["\n".join(" ".join(words) for words in roi.values()) for roi in lines]
+
+
+# warm tesseract instances through the C API, one per worker thread
+class TesserocrEngine(OcrEngine):
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path: Optional[str] = None):
+        import tesserocr  # optional dependency
+
+        self._tesserocr = tesserocr
+        self._tessdata_path = tessdata_path
+        self._local = threading.local()
+
+    def _get_api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": OCR_LANG, "psm": self._tesserocr.PSM.SINGLE_BLOCK}
+            if self._tessdata_path:
+                kwargs["path"] = self._tessdata_path
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+        return api
+
+    def recognize_lines(self, images: List[np.ndarray]) -> List[str]:
+        from PIL import Image
+
+        api = self._get_api()
+        results = []
+        for img in images:
+            api.SetImage(Image.fromarray(binarizeaza_linie(img)))
+            results.append(api.GetUTF8Text().strip())
+        api.Clear()
+        return results
+
+
+def _stack_lines(images: List[np.ndarray]):
+    width = max(img.shape[1] for img in images)
+    parts = []
+    offsets = []
+    y = 0
+    for img in images:
+        if img.shape[1] < width:
+            img = cv.copyMakeBorder(
+                img, 0, 0, 0, width - img.shape[1], cv.BORDER_CONSTANT, value=255
+            )
+        offsets.append(y)
+        parts.append(img)
+        parts.append(np.full((_STACK_GAP, width), 255, dtype=img.dtype))
+        y += img.shape[0] + _STACK_GAP
+    return np.vstack(parts), offsets
+
+
+# without TESSERACT_PATH pytesseract keeps its default and finds tesseract on PATH
+def configure_tesseract() -> None:
+    if TESSERACT_PATH:
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH + r"Tesseract-OCR/tesseract.exe"
+
+
+def create_ocr_engine(kind: str = "auto") -> OcrEngine:
+    configure_tesseract()
+    if kind == "line":
+        return PytesseractLineEngine()
+    if kind == "batch":
+        return PytesseractBatchEngine()
+    if kind == "tesserocr":
+        return TesserocrEngine(os.getenv("TESSDATA_PATH"))
+    if kind == "auto":
+        try:
+            return TesserocrEngine(os.getenv("TESSDATA_PATH"))
+        except ImportError:
+            return PytesseractBatchEngine()
+    raise ValueError(f"Unknown OCR engine '{kind}'")
+
+
+_engine: Optional[OcrEngine] = None
+_engine_lock = threading.Lock()
+
+
+# process-wide engine, picked with OCR_ENGINE=auto|tesserocr|batch|line
+def get_ocr_engine() -> OcrEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_ocr_engine(os.getenv("OCR_ENGINE", "auto"))
+    return _engine
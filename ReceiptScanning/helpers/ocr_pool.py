@@ -0,0 +1,132 @@
+import asyncio
+import multiprocessing.util
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# process workers exit without running atexit handlers, multiprocessing finalizers still run
+def _init_process_worker() -> None:
+    multiprocessing.util.Finalize(None, _flush_learned_keywords, exitpriority=10)
+
+
+# keywords the classifier learned in this worker and has not written yet
+def _flush_learned_keywords() -> None:
+    product_dictionary = sys.modules.get("helpers.product_dictionary")
+    if product_dictionary is not None:
+        product_dictionary.product_keyword_writer.stop()
+
+
+class OcrPoolFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("OCR queue is full")
+        self.retry_after = retry_after
+
+
+# bounded executor for OCR + parsing so blocking work never runs on the event loop
+class OcrWorkerPool:
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 16,
+        kind: str = "thread",
+        retry_after: int = 5,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError("OCR pool kind must be either 'thread' or 'process'")
+
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        # process mode only: threads for work that cannot be sent to a process
+        self._thread_executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls) -> "OcrWorkerPool":
+        return cls(
+            max_workers=int(os.getenv("OCR_POOL_WORKERS", "4")),
+            max_queue=int(os.getenv("OCR_POOL_MAX_QUEUE", "16")),
+            kind=os.getenv("OCR_POOL_KIND", "thread"),
+            retry_after=int(os.getenv("OCR_POOL_RETRY_AFTER", "5")),
+        )
+
+    # jobs currently running or waiting for a worker
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_init_process_worker
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="ocr"
+                )
+        return self._executor
+
+    def _get_thread_executor(self) -> Executor:
+        if self.kind == "thread":
+            return self._get_executor()
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="ocr-thread"
+            )
+        return self._thread_executor
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await self._run(self._get_executor(), fn, *args)
+
+    # for work that cannot be pickled (generators, callbacks into the event loop):
+    # it always runs on a thread, but holds a slot of this pool like any other job
+    async def submit_in_thread(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await self._run(self._get_thread_executor(), fn, *args)
+
+    async def _run(self, executor: Executor, fn: Callable[..., Any], *args: Any) -> Any:
+        # counter is only touched from the event loop thread, no lock needed
+        if self._pending >= self.capacity:
+            raise OcrPoolFull(self.retry_after)
+
+        loop = asyncio.get_running_loop()
+        future = executor.submit(fn, *args)
+        self._pending += 1
+        # released when the job itself ends: a cancelled caller does not stop a
+        # job that already runs, so it keeps counting against the capacity
+        future.add_done_callback(lambda _: self._release(loop))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        # done callbacks run on the worker thread, the counter stays on the loop thread
+        try:
+            loop.call_soon_threadsafe(self._decrement)
+        except RuntimeError:
+            # loop already closed
+            self._decrement()
+
+    def _decrement(self) -> None:
+        self._pending -= 1
+
+    # wait=True also lets process workers write what they learned before they exit
+    def shutdown(self, wait: bool = False) -> None:
+        for executor in (self._executor, self._thread_executor):
+            if executor is not None:
+                executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+        self._thread_executor = None
+
+
+ocr_pool = OcrWorkerPool.from_env()
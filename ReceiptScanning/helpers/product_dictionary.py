@@ -0,0 +1,217 @@
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from rapidfuzz.utils import default_process
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from db.session import SyncSessionLocal
+from helpers.category import DB_FILE, ProductClassifier, incarca_baza_date
+from models.product_keywords import ProductKeyword
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_FLUSH_SIZE = int(os.getenv("KEYWORD_FLUSH_SIZE", "100"))
+KEYWORD_FLUSH_INTERVAL_S = float(os.getenv("KEYWORD_FLUSH_INTERVAL_S", "2"))
+KEYWORD_REFRESH_S = float(os.getenv("KEYWORD_REFRESH_S", "30"))
+
+
+def normalize_keyword(text: str) -> str:
+    return default_process(text)[:255]
+
+
+# insert keywords, the ones already present (learned by another worker) are left alone
+def upsert_keywords(db: Session, rows: List[Dict[str, str]]) -> None:
+    unique: Dict[str, Dict[str, str]] = {}
+    for row in rows:
+        if row["keyword"]:
+            unique.setdefault(row["keyword"], row)
+    if not unique:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(ProductKeyword)
+        stmt = stmt.on_duplicate_key_update(keyword=stmt.inserted.keyword)
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(ProductKeyword).on_conflict_do_nothing(index_elements=["keyword"])
+    else:
+        stmt = insert(ProductKeyword)
+    db.execute(stmt, list(unique.values()))
+
+
+# write-behind for learned keywords: submit() only queues, a background thread
+# inserts them in batches of KEYWORD_FLUSH_SIZE or every KEYWORD_FLUSH_INTERVAL_S
+class KeywordWriter:
+    def __init__(
+        self,
+        session_factory: sessionmaker = SyncSessionLocal,
+        batch_size: int = KEYWORD_FLUSH_SIZE,
+        interval_s: float = KEYWORD_FLUSH_INTERVAL_S,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.interval_s = interval_s
+        self.written = 0
+        self._queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()._after_fork())
+
+    # a forked OCR worker has no writer thread and may hold copies of locked locks
+    def _after_fork(self) -> None:
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def submit(self, keyword: str, category: str) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="keyword-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put((keyword, category))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending = [item]
+            deadline = time.monotonic() + self.interval_s
+            while len(pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write(pending)
+                    return
+                pending.append(item)
+            self._write(pending)
+
+    def _write(self, pending: List[Tuple[str, str]]) -> None:
+        rows = [{"keyword": keyword, "category": category} for keyword, category in pending]
+        with self._write_lock:
+            try:
+                with self.session_factory() as db:
+                    upsert_keywords(db, rows)
+                    db.commit()
+                self.written += len(rows)
+            except Exception:
+                logger.exception("Failed to save %d learned product keywords", len(rows))
+
+    # write everything still queued, from the calling thread
+    def flush(self) -> None:
+        pending = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                pending.append(item)
+        if pending:
+            self._write(pending)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+product_keyword_writer = KeywordWriter()
+
+
+# product dictionary kept in the product_keywords table: each worker keeps the
+# whole dictionary indexed in memory and reads new rows (id > last seen) through
+class DbProductClassifier(ProductClassifier):
+    def __init__(
+        self,
+        session_factory: sessionmaker = SyncSessionLocal,
+        writer: Optional[KeywordWriter] = None,
+        refresh_s: float = KEYWORD_REFRESH_S,
+        seed_path: Optional[str] = DB_FILE,
+    ):
+        self.session_factory = session_factory
+        self.writer = writer or product_keyword_writer
+        self.refresh_s = refresh_s
+        self.seed_path = seed_path
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        super().__init__(seed_path)
+
+    def _rows(self, db: Session, after_id: int):
+        return db.execute(
+            select(ProductKeyword.id, ProductKeyword.keyword, ProductKeyword.category)
+            .where(ProductKeyword.id > after_id)
+            .order_by(ProductKeyword.id)
+        ).all()
+
+    def _load(self) -> None:
+        with self.session_factory() as db:
+            rows = self._rows(db, 0)
+            # first start: the table is seeded from the JSON dictionary
+            if not rows and self.seed_path:
+                upsert_keywords(db, [
+                    {"keyword": normalize_keyword(keyword), "category": category}
+                    for category, keywords in incarca_baza_date(self.seed_path).items()
+                    for keyword in keywords
+                ])
+                db.commit()
+                rows = self._rows(db, 0)
+
+        dictionary: Dict[str, List[str]] = {}
+        for _, keyword, category in rows:
+            dictionary.setdefault(category, []).append(keyword)
+        self._reset(dictionary)
+        self._last_id = rows[-1][0] if rows else 0
+        self._refreshed_at = time.monotonic()
+
+    def reload_if_changed(self) -> bool:
+        return self.refresh()
+
+    def refresh(self, force: bool = False) -> bool:
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_s:
+            return False
+        with self.session_factory() as db:
+            rows = self._rows(db, self._last_id)
+        self._refreshed_at = time.monotonic()
+
+        with self._lock:
+            for row_id, keyword, category in rows:
+                # rows this worker learned itself are already indexed
+                if (self._category(category), keyword) not in self._indexed:
+                    self.db.setdefault(category, []).append(keyword)
+                    self._add(category, keyword)
+                self._last_id = row_id
+        return bool(rows)
+
+    def learn(self, produs: str, categorie: str) -> None:
+        keyword = normalize_keyword(produs)
+        with self._lock:
+            keywords = self.db.setdefault(categorie, [])
+            if not keyword or keyword in keywords:
+                return
+            keywords.append(keyword)
+            self._add(categorie, keyword)
+        self.writer.submit(keyword, categorie)
@@ -0,0 +1,125 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Pattern, Tuple
+
+# how many lines from the top of the receipt are scanned for the chain name / CIF
+HEADER_LINES = 8
+
+# lines that end item parsing on every receipt
+GENERIC_STOP_WORDS: Tuple[str, ...] = (
+    r"SUBTOTAL", r"TOTAL", r"TVA\b", r"CARD\b", r"CASH\b", r"BON\b", r"FISCAL\b", r"DATA\b", r"ORA\b",
+    r"EXCEPTATE", r"VAN\.?", r"POS:", r"OP:", r"TR:",
+    r"C\.I\.F\.", r"COD\b", r"IDENTIFICARE", r"FISCALA", r"MUNICIPIUL", r"SECTOR\b",
+    r"S\.?C\.?\s",
+)
+DISCOUNT_WORDS: Tuple[str, ...] = ("REDUCERE", "DISCOUNT")
+
+# the line ending the items; TOTAL REDUCERE / TOTAL DISCOUNT lines are discounts, not the total
+_TOTAL_LINE_RE = re.compile(r"^\s*TOTAL(?!.*(?:" + "|".join(DISCOUNT_WORDS) + "))", re.IGNORECASE)
+
+
+# shared by the batch and streaming parsers, so both stop at the same line
+def is_total_line(line: str) -> bool:
+    return _TOTAL_LINE_RE.match(line) is not None
+
+
+def _stop_pattern(words: Tuple[str, ...]) -> Pattern:
+    return re.compile(r"^\s*(" + "|".join(words) + ")", re.IGNORECASE)
+
+
+def _discount_pattern(words: Tuple[str, ...]) -> Pattern:
+    return re.compile(
+        r"\b(?:" + "|".join(words) + r")\b.*(?P<amount>[-+]?\d+(?:[.,]\d{1,2}))\s*(?:LEI)?\s*$",
+        re.IGNORECASE,
+    )
+
+
+# line patterns and layout rules for the receipts of one store chain
+@dataclass
+class ReceiptProfile:
+    name: str
+    # chain names / CIF numbers (regex) looked for in the header
+    markers: Tuple[str, ...] = ()
+    # never the chain name itself, house-brand products start with it
+    stop_words: Tuple[str, ...] = ()
+    discount_words: Tuple[str, ...] = ()
+    # lines an item name may span; only lower it for a chain whose stored
+    # receipts show names never wrap
+    max_name_lines: int = 2
+    stop_re: Pattern = field(init=False, repr=False)
+    discount_re: Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.stop_re = _stop_pattern(GENERIC_STOP_WORDS + self.stop_words)
+        self.discount_re = _discount_pattern(DISCOUNT_WORDS + self.discount_words)
+
+
+GENERIC_PROFILE = ReceiptProfile(name="generic")
+
+_profiles: List[ReceiptProfile] = []
+_detector: Optional[Pattern] = None
+
+
+def register_profile(profile: ReceiptProfile) -> ReceiptProfile:
+    global _detector
+    _profiles.append(profile)
+    _detector = None
+    return profile
+
+
+def get_profiles() -> List[ReceiptProfile]:
+    return list(_profiles)
+
+
+def _build_detector() -> Pattern:
+    # one alternation with a named group per profile, so the header is scanned once
+    groups = [
+        f"(?P<p{i}>{'|'.join(profile.markers)})"
+        for i, profile in enumerate(_profiles)
+        if profile.markers
+    ]
+    return re.compile("|".join(groups) or r"(?!)", re.IGNORECASE)
+
+
+# pick the chain profile from the first header lines, generic when nothing matches
+def detect_profile(lines: List[str], header_lines: int = HEADER_LINES) -> ReceiptProfile:
+    global _detector
+    if _detector is None:
+        _detector = _build_detector()
+
+    m = _detector.search("\n".join(lines[:header_lines]))
+    if not m:
+        return GENERIC_PROFILE
+    return _profiles[int(m.lastgroup[1:])]
+
+
+def get_profile(name: str) -> ReceiptProfile:
+    for profile in _profiles:
+        if profile.name == name:
+            return profile
+    if name == GENERIC_PROFILE.name:
+        return GENERIC_PROFILE
+    raise ValueError(f"Unknown receipt profile '{name}'")
+
+
+register_profile(ReceiptProfile(
+    name="kaufland",
+    markers=(r"\bKAUFLAND\b", r"\b(?:RO\s*)?15991149\b"),
+    stop_words=(r"REST\b",),
+))
+register_profile(ReceiptProfile(
+    name="lidl",
+    markers=(r"\bLIDL\b", r"\b(?:RO\s*)?22891860\b"),
+    stop_words=(r"REST\b", r"SUMA\b"),
+    discount_words=("LIDL PLUS",),
+))
+register_profile(ReceiptProfile(
+    name="mega_image",
+    markers=(r"\bMEGA\s+IMAGE\b", r"\b(?:RO\s*)?6719278\b"),
+    stop_words=(r"REST\b",),
+))
+register_profile(ReceiptProfile(
+    name="carrefour",
+    markers=(r"\bCARREFOUR\b", r"\b(?:RO\s*)?11588780\b"),
+    stop_words=(r"REST\b", r"NR\.?\s*ARTICOLE\b"),
+))
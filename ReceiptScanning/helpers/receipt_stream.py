@@ -0,0 +1,64 @@
+import os
+
+from dotenv import load_dotenv
+
+from helpers.image_processing import (
+    extrage_bon,
+    extrage_linii_text,
+    extrage_linii_text_benzi,
+    incarca_imagine,
+    preprocesare_generala,
+)
+from helpers.ocr_engine import get_ocr_engine
+from helpers.receipt_profiles import is_total_line
+from helpers.vision import iter_receipt_items
+
+load_dotenv()
+
+# receipt contours are detected on a copy downscaled to this size (0 = full resolution)
+BON_DETECT_MAX_SIDE = int(os.getenv("BON_DETECT_MAX_SIDE", "1600"))
+# full: upscale + denoise the whole receipt, benzi: only the detected line bands
+OCR_LINE_MODE = os.getenv("OCR_LINE_MODE", "full")
+# lines sent to the OCR engine at once, OCR stops after the chunk holding TOTAL
+OCR_CHUNK_LINES = int(os.getenv("OCR_CHUNK_LINES", "16"))
+
+
+def linii_bon(IMAGINE_BON):
+    img = incarca_imagine(IMAGINE_BON)
+    if img is None:
+        sursa = IMAGINE_BON if isinstance(IMAGINE_BON, str) else "<bytes>"
+        print(f"Eroare: Imaginea '{sursa}' nu exista sau nu a putut fi citita.")
+        return None
+
+    bon = extrage_bon(img, {"detect_max_side": BON_DETECT_MAX_SIDE})
+    if bon is None or bon.size == 0:
+        print("Eroare: extrage_bon a returnat o imagine goala.")
+        return None
+    if OCR_LINE_MODE == "benzi":
+        return extrage_linii_text_benzi(bon)
+    gray_upscaled, binary_map = preprocesare_generala(bon)
+    return extrage_linii_text(gray_upscaled, binary_map)
+
+
+# OCR chunk by chunk, nothing after the TOTAL line is ever read
+def ocr_linii_pana_la_total(slices_linii, chunk=OCR_CHUNK_LINES):
+    engine = get_ocr_engine()
+    chunk = max(1, chunk)
+    for start in range(0, len(slices_linii), chunk):
+        total_gasit = False
+        for text_raw in engine.recognize_lines(slices_linii[start:start + chunk]):
+            if len(text_raw) < 3:
+                continue
+            rand = text_raw.upper().strip()
+            total_gasit = total_gasit or is_total_line(rand)
+            yield rand
+        if total_gasit:
+            return
+
+
+# products are yielded while the receipt is still being OCR-ed
+def stream_receipt_items(IMAGINE_BON):
+    slices_linii = linii_bon(IMAGINE_BON)
+    if not slices_linii:
+        return
+    yield from iter_receipt_items(ocr_linii_pana_la_total(slices_linii), stop_at_total=True)
@@ -6,19 +6,17 @@ from thefuzz import fuzz
 from helpers.category import *
 from helpers.image_processing import *
 from helpers.text_processing import *
+from helpers.receipt_stream import linii_bon, ocr_linii_pana_la_total
 from dotenv import load_dotenv
 import sys
 
 load_dotenv()
 
-base_path = rf"{os.getenv('TESSERACT_PATH')}"
-TESSERACT_CMD = base_path + r"Tesseract-OCR/tesseract.exe"
 # if len(sys.argv) < 2:
 #     raise ValueError("Utilizare: python main.py <cale_catre_imagine_bon>")
 #     sys.exit(1)
 
 # IMAGINE_BON = sys.argv[1]
-pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
 def afisare_rezultate(rezultate, rand_total):
     data = {
@@ -39,29 +37,11 @@ def afisare_rezultate(rezultate, rand_total):
     return data
 
 def return_results(IMAGINE_BON):
-    img = cv.imread(IMAGINE_BON)
-    if img is None:
-        print(f"Eroare: Imaginea '{IMAGINE_BON}' nu exista sau nu a putut fi citita.")
-        return
-
-    bon = extrage_bon(img)
-    # show_image("Bon Decupat", bon)
-    if bon is None or bon.size == 0:
-        print("Eroare: extrage_bon a returnat o imagine goala.")
+    slices_linii = linii_bon(IMAGINE_BON)
+    if slices_linii is None:
         return None
-    gray_upscaled, binary_map = preprocesare_generala(bon)
-    # show_image("Binarizare pentru Linii", binary_map)
-    
-    slices_linii = extrage_linii_text(gray_upscaled, binary_map)
-    text_integral = ""
-    
-    for i, slice_img in enumerate(slices_linii):
-        text_raw = proceseaza_linie_ocr(slice_img)
-        if len(text_raw) < 3: 
-            continue 
-        text_integral += text_raw.upper().strip() + "\n"
 
-    randuri = text_integral.split('\n')
+    randuri = list(ocr_linii_pana_la_total(slices_linii))
     date_brute_produse, rand_total = extrage_date_produse(randuri)
     
     if not date_brute_produse:
@@ -0,0 +1,22 @@
+import os
+import uuid
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# uploads are only kept on disk when SCAN_DEBUG_DIR is set
+SCAN_DEBUG_DIR = os.getenv("SCAN_DEBUG_DIR")
+
+
+def retain_debug_upload(contents: bytes, filename: Optional[str]) -> Optional[str]:
+    if not SCAN_DEBUG_DIR:
+        return None
+
+    os.makedirs(SCAN_DEBUG_DIR, exist_ok=True)
+    safe_name = os.path.basename(filename or "upload")
+    path = os.path.join(SCAN_DEBUG_DIR, f"{uuid.uuid4().hex}_{safe_name}")
+    with open(path, "wb") as f:
+        f.write(contents)
+    return path
@@ -1,10 +1,18 @@
 import re
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
-from google.cloud import vision
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from helpers.receipt_profiles import GENERIC_PROFILE, HEADER_LINES, ReceiptProfile, detect_profile, is_total_line
+from helpers.vision_client import get_vision_batcher
 from schemas.receipt import ReceiptBaseModel, ProductBaseModel
 
 
+# bump whenever parsing changes so cached OCR results are not reused
+PARSER_VERSION = "4"
+
+# raw image bytes (preferred) or a path on disk
+ImageSource = Union[bytes, bytearray, memoryview, str]
+
+
 @dataclass
 class Item:
     quantity: float
@@ -26,27 +34,14 @@ _QTY_LINE_RE = re.compile(
     re.VERBOSE | re.IGNORECASE,
 )
 
-_DISCOUNT_LINE_RE = re.compile(
-    r"\b(?:REDUCERE|DISCOUNT)\b.*(?P<amount>[-+]?\d+(?:[.,]\d{1,2}))\s*(?:LEI)?\s*$",
-    re.IGNORECASE,
-)
-
 _SALE_PERCENTAGE_RE = re.compile(
     r"(?P<percent>\d+(?:[.,]\d+)?)\s*%",
     re.IGNORECASE,
 )
 
-_STOP_RE = re.compile(
-    r"""
-    ^\s*(
-        SUBTOTAL|TOTAL|TVA\b|CARD\b|CASH\b|BON\b|FISCAL\b|DATA\b|ORA\b|
-        EXCEPTATE|VAN\.?|POS:|OP:|TR:|
-        C\.I\.F\.|COD\b|IDENTIFICARE|FISCALA|MUNICIPIUL|SECTOR\b|
-        S\.?C\.?\s
-    )
-    """,
-    re.IGNORECASE | re.VERBOSE,
-)
+# generic patterns, chain-specific ones live in helpers.receipt_profiles
+_STOP_RE = GENERIC_PROFILE.stop_re
+_DISCOUNT_LINE_RE = GENERIC_PROFILE.discount_re
 
 _IGNORE_NAME_LINE_RE = re.compile(
     r"^\s*[-+]\s*\d+(?:[.,]\d+)?\s*LEI\b",
@@ -56,6 +51,28 @@ _END_OF_LINE_PRICE_RE = re.compile(
     r"\s+(?P<price>\d+(?:[.,]\d{2}))\s*[A-Z]?\s*$",
     re.IGNORECASE
 )
+_TRAILING_PRICE_RE = re.compile(r"\s+\d+(?:[.,]\d{2})\s*[A-Z]?\s*$")
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+_NEGATIVE_LINE_RE = re.compile(r"^\s*-\d")
+_NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d{1,2})")
+
+# line tags produced by _classify_lines
+STOP = "STOP"
+DISCOUNT = "DISCOUNT"
+QTY = "QTY"
+PRICE = "PRICE"
+NEGATIVE = "NEGATIVE"
+NAME = "NAME"
+
+
+@dataclass(slots=True)
+class LineToken:
+    tag: str
+    text: str
+    match: Optional[re.Match] = None
+    # a discount line with no item before it is read as a quantity line
+    qty_match: Optional[re.Match] = None
+
 
 def _norm_decimal(s: str) -> float:
     s = s.strip().replace(" ", "")
@@ -71,8 +88,8 @@ def _norm_decimal(s: str) -> float:
 
 def _clean_name(name: str) -> str:
     name = name.strip()
-    name = re.sub(r"\s+\d+(?:[.,]\d{2})\s*[A-Z]?\s*$", "", name).strip()
-    name = re.sub(r"\s{2,}", " ", name)
+    name = _TRAILING_PRICE_RE.sub("", name).strip()
+    name = _MULTI_SPACE_RE.sub(" ", name)
     return name
 
 
@@ -84,7 +101,7 @@ def _extract_lines_from_vision(full_text: str) -> List[str]:
 def _extract_prices(line: str, qty: float, unit_price_raw: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
     unit_price = _norm_decimal(unit_price_raw) if unit_price_raw else None
 
-    numbers = re.findall(r"-?\d+(?:[.,]\d{1,2})", line)
+    numbers = _NUMBER_RE.findall(line)
     prices: List[float] = []
     for num in numbers:
         val = _norm_decimal(num)
@@ -99,112 +116,207 @@ def _extract_prices(line: str, qty: float, unit_price_raw: Optional[str]) -> Tup
     return unit_price, line_price
 
 
-def _parse_items_from_lines(lines: List[str]) -> List[Item]:
-    items: List[Item] = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        if _STOP_RE.search(line):
-            i += 1
-            continue
-        discount_match = _DISCOUNT_LINE_RE.search(line)
-        if discount_match and items:
-            raw_amount = discount_match.group("amount")
-            discount_val = _norm_decimal(raw_amount)
-            if "-" not in raw_amount and discount_val > 0:
-                discount_val = -discount_val
-            items[-1].price = round(max(items[-1].price + discount_val, 0.0), 2)
-            sale_match = _SALE_PERCENTAGE_RE.search(line)
-            if sale_match:
-                pct_value = _norm_decimal(sale_match.group("percent"))
-                items[-1].sale = pct_value / 100.0
-
-            i += 1
-            continue
-        m = _QTY_LINE_RE.match(line)
-        if not m:
-            i += 1
-            continue
-
-        qty = _norm_decimal(m.group("qty"))
-        unit = m.group("unit").upper().rstrip(".")
-        _, current_line_price = _extract_prices(line, qty, m.group("unit_price"))
-        if current_line_price is None:
-            current_line_price = 0.0
-
-        i += 1
-        name_parts: List[str] = []
-        while i < len(lines):
-            nxt = lines[i].strip()
-
-            if _STOP_RE.search(nxt):
-                break
-            if _DISCOUNT_LINE_RE.search(nxt):
-                break
-            if _QTY_LINE_RE.match(nxt):
-                break
-            price_on_name_match = _END_OF_LINE_PRICE_RE.search(nxt)
-            if price_on_name_match:
-                found_price = _norm_decimal(price_on_name_match.group("price"))
+# classify every line once, in the order the parser checks the patterns
+def _classify_line(line: str, profile: ReceiptProfile = GENERIC_PROFILE) -> LineToken:
+    text = line.strip()
+    if profile.stop_re.search(text):
+        return LineToken(STOP, text)
+    m = profile.discount_re.search(text)
+    if m:
+        return LineToken(DISCOUNT, text, m, _QTY_LINE_RE.match(text))
+    m = _QTY_LINE_RE.match(text)
+    if m:
+        return LineToken(QTY, text, m, m)
+    m = _END_OF_LINE_PRICE_RE.search(text)
+    if m:
+        return LineToken(PRICE, text, m)
+    if _NEGATIVE_LINE_RE.match(text):
+        return LineToken(NEGATIVE, text)
+    return LineToken(NAME, text)
+
+
+def _classify_lines(lines: List[str], profile: ReceiptProfile = GENERIC_PROFILE) -> List[LineToken]:
+    return [_classify_line(line, profile) for line in lines]
+
+
+# assembles Items from tagged lines: a QTY line opens an item, the next one or
+# two NAME lines (or one PRICE line) give its name, DISCOUNT lines adjust the last item
+class _ItemAssembler:
+    def __init__(self, max_name_lines: int = 2):
+        self.max_name_lines = max_name_lines
+        self.items: List[Item] = []
+        self._open: Optional[LineToken] = None
+        self._qty = 0.0
+        self._unit = ""
+        self._price = 0.0
+        self._name_parts: List[str] = []
+
+    def feed(self, token: LineToken) -> None:
+        if self._open is not None:
+            if token.tag == PRICE:
+                found_price = _norm_decimal(token.match.group("price"))
                 if found_price > 0.0:
-                    current_line_price = found_price
-                nxt = _END_OF_LINE_PRICE_RE.sub("", nxt)
-                name_parts.append(nxt)
-                i += 1
-                break
-            if re.match(r"^\s*-\d", nxt):
-                break
-
-            name_parts.append(nxt)
-            i += 1
-            if len(name_parts) >= 2:
-                break
-
-        name = _clean_name(" ".join(name_parts))
+                    self._price = found_price
+                self._name_parts.append(token.text[:token.match.start()])
+                self._finish()
+                return
+            if token.tag == NAME:
+                self._name_parts.append(token.text)
+                if len(self._name_parts) >= self.max_name_lines:
+                    self._finish()
+                return
+            self._finish()
+
+        if token.tag == STOP:
+            return
+        if token.tag == DISCOUNT and self.items:
+            self._apply_discount(token)
+            return
+        if token.qty_match is not None:
+            self._start(token)
+
+    def close(self) -> List[Item]:
+        if self._open is not None:
+            self._finish()
+        return self.items
+
+    def _start(self, token: LineToken) -> None:
+        m = token.qty_match
+        self._open = token
+        self._qty = _norm_decimal(m.group("qty"))
+        self._unit = m.group("unit").upper().rstrip(".")
+        _, line_price = _extract_prices(token.text, self._qty, m.group("unit_price"))
+        self._price = line_price if line_price is not None else 0.0
+        self._name_parts = []
+
+    def _finish(self) -> None:
+        name = _clean_name(" ".join(self._name_parts))
         sale_pct = 0.0
-        full_item_text = line + " " + " ".join(name_parts)
+        full_item_text = self._open.text + " " + " ".join(self._name_parts)
         sale_match_name = _SALE_PERCENTAGE_RE.search(full_item_text)
         if sale_match_name:
-            pct_value = _norm_decimal(sale_match_name.group("percent"))
-            sale_pct = pct_value / 100.0
+            sale_pct = _norm_decimal(sale_match_name.group("percent")) / 100.0
 
         if name:
-            items.append(Item(quantity=qty, unit=unit, name=name, price=current_line_price, sale=sale_pct))
-
-    return items
-
-
-def google_ocr_full_text(image_path: str) -> str:
-    client = vision.ImageAnnotatorClient()
+            self.items.append(Item(quantity=self._qty, unit=self._unit, name=name, price=self._price, sale=sale_pct))
+        self._open = None
+
+    def _apply_discount(self, token: LineToken) -> None:
+        raw_amount = token.match.group("amount")
+        discount_val = _norm_decimal(raw_amount)
+        if "-" not in raw_amount and discount_val > 0:
+            discount_val = -discount_val
+        item = self.items[-1]
+        item.price = round(max(item.price + discount_val, 0.0), 2)
+        sale_match = _SALE_PERCENTAGE_RE.search(token.text)
+        if sale_match:
+            item.sale = _norm_decimal(sale_match.group("percent")) / 100.0
+
+
+# incremental parser: feed lines as OCR produces them, get back the items that
+# can no longer change (the last item waits, a later DISCOUNT line may still apply to it)
+class ReceiptStreamParser:
+    def __init__(self, profile: Optional[ReceiptProfile] = None):
+        self.profile = profile
+        self.total_seen = False
+        self._header: List[str] = []
+        self._assembler: Optional[_ItemAssembler] = None
+        self._emitted = 0
+
+    def feed(self, line: str) -> List[Item]:
+        if is_total_line(line):
+            self.total_seen = True
+
+        if self._assembler is None:
+            # the chain profile is only known once the header lines are in
+            self._header.append(line)
+            if self.profile is None and len(self._header) < HEADER_LINES:
+                return []
+            self._start()
+        else:
+            self._assembler.feed(_classify_line(line, self.profile))
+        return self._ready(final=False)
+
+    def close(self) -> List[Item]:
+        if self._assembler is None:
+            self._start()
+        self._assembler.close()
+        return self._ready(final=True)
+
+    def _start(self) -> None:
+        if self.profile is None:
+            self.profile = detect_profile(self._header)
+        self._assembler = _ItemAssembler(self.profile.max_name_lines)
+        for line in self._header:
+            self._assembler.feed(_classify_line(line, self.profile))
+        self._header = []
+
+    def _ready(self, final: bool) -> List[Item]:
+        items = self._assembler.items
+        end = len(items) if final else len(items) - 1
+        if end <= self._emitted:
+            return []
+        ready = items[self._emitted:end]
+        self._emitted = end
+        return ready
+
+
+def _to_product(item: Item) -> ProductBaseModel:
+    return ProductBaseModel(
+        name=item.name,
+        price=item.price,
+        quantity=item.quantity,
+        unit=item.unit,
+        sale=item.sale,
+    )
 
-    with open(image_path, "rb") as f:
-        content = f.read()
 
-    image = vision.Image(content=content)
+# yields products while lines are still being read; with stop_at_total the
+# source is not consumed past the TOTAL line
+def iter_receipt_items(
+    lines: Iterable[str],
+    profile: Optional[ReceiptProfile] = None,
+    stop_at_total: bool = False,
+) -> Iterator[ProductBaseModel]:
+    parser = ReceiptStreamParser(profile)
+    for line in lines:
+        for item in parser.feed(line):
+            yield _to_product(item)
+        if stop_at_total and parser.total_seen:
+            break
+    for item in parser.close():
+        yield _to_product(item)
+
+
+def _parse_items_from_lines(lines: List[str], profile: Optional[ReceiptProfile] = None) -> List[Item]:
+    parser = ReceiptStreamParser(profile)
+    items: List[Item] = []
+    for line in lines:
+        items.extend(parser.feed(line))
+    items.extend(parser.close())
+    return items
 
-    resp = client.document_text_detection(
-        image=image,
-        image_context=vision.ImageContext(language_hints=["ro", "en"]),
-    )
 
-    if resp.error.message:
-        raise RuntimeError(f"Google Vision API error: {resp.error.message}")
+def _image_bytes(image: ImageSource) -> bytes:
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            return f.read()
+    return bytes(image)
 
-    if not resp.full_text_annotation or not resp.full_text_annotation.text:
-        return ""
 
-    return resp.full_text_annotation.text
+def google_ocr_full_text(image: ImageSource) -> str:
+    return get_vision_batcher().annotate(_image_bytes(image))
 
 
-def extract_receipt_items(image_path: str) -> List[Item]:
-    full_text = google_ocr_full_text(image_path)
+def extract_receipt_items(image: ImageSource) -> List[Item]:
+    full_text = google_ocr_full_text(image)
     lines = _extract_lines_from_vision(full_text)
     return _parse_items_from_lines(lines)
 
 
 
-def extract_receipt_payload(image_path: str) -> ReceiptBaseModel:
-    full_text = google_ocr_full_text(image_path)
+# parse Vision full text into the receipt payload, no OCR involved (used to reparse stored raw_text)
+def parse_receipt_text(full_text: str) -> ReceiptBaseModel:
     lines = _extract_lines_from_vision(full_text)
     items = _parse_items_from_lines(lines)
     total = (
@@ -222,16 +334,9 @@ def extract_receipt_payload(image_path: str) -> ReceiptBaseModel:
     return ReceiptBaseModel(
         total=total,
         raw_text=full_text,
-        product=[
-            ProductBaseModel(
-                name=it.name,
-                price=it.price,
-                quantity=it.quantity,
-                unit=it.unit,
-                sale=it.sale,
-            )
-            for it in items
-        ],
+        product=[_to_product(it) for it in items],
     )
 
 
+def extract_receipt_payload(image: ImageSource) -> ReceiptBaseModel:
+    return parse_receipt_text(google_ocr_full_text(image))
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Vision accepts at most 16 images per synchronous batch request
+MAX_VISION_BATCH = 16
+LANGUAGE_HINTS = ["ro", "en"]
+
+# full text of one image, or the error Vision returned for it
+AnnotateResult = Union[str, Exception]
+
+
+class VisionBackend(ABC):
+    name = "base"
+
+    # one result per content, in the same order
+    @abstractmethod
+    def annotate(self, contents: List[bytes]) -> List[AnnotateResult]:
+        ...
+
+
+# real Google Vision, one client per process created on first use
+class GoogleVisionBackend(VisionBackend):
+    name = "google"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google.cloud import vision
+
+                    self._client = vision.ImageAnnotatorClient()
+        return self._client
+
+    def annotate(self, contents: List[bytes]) -> List[AnnotateResult]:
+        from google.cloud import vision
+
+        requests = [
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=content),
+                features=[vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)],
+                image_context=vision.ImageContext(language_hints=LANGUAGE_HINTS),
+            )
+            for content in contents
+        ]
+        batch = self._get_client().batch_annotate_images(requests=requests)
+
+        results: List[AnnotateResult] = []
+        for resp in batch.responses:
+            if resp.error.message:
+                results.append(RuntimeError(f"Google Vision API error: {resp.error.message}"))
+            elif not resp.full_text_annotation or not resp.full_text_annotation.text:
+                results.append("")
+            else:
+                results.append(resp.full_text_annotation.text)
+        return results
+
+
+def _recording_path(directory: str, content: bytes) -> str:
+    return os.path.join(directory, f"{hashlib.sha256(content).hexdigest()}.json")
+
+
+# offline stand-in: replays responses recorded by RecordingVisionBackend
+class ReplayVisionBackend(VisionBackend):
+    name = "replay"
+
+    def __init__(self, directory: str, latency_ms: float = 0.0):
+        self.directory = directory
+        self.latency_ms = latency_ms
+
+    def annotate(self, contents: List[bytes]) -> List[AnnotateResult]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        results: List[AnnotateResult] = []
+        for content in contents:
+            path = _recording_path(self.directory, content)
+            if not os.path.exists(path):
+                results.append(RuntimeError(f"No recorded Vision response for {os.path.basename(path)}"))
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                recorded = json.load(f)
+            if recorded.get("error"):
+                results.append(RuntimeError(recorded["error"]))
+            else:
+                results.append(recorded.get("text", ""))
+        return results
+
+
+# wraps another backend and stores every response for later replay
+class RecordingVisionBackend(VisionBackend):
+    name = "record"
+
+    def __init__(self, inner: VisionBackend, directory: str):
+        self.inner = inner
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def annotate(self, contents: List[bytes]) -> List[AnnotateResult]:
+        results = self.inner.annotate(contents)
+        for content, result in zip(contents, results):
+            recorded = {"error": str(result)} if isinstance(result, Exception) else {"text": result}
+            with open(_recording_path(self.directory, content), "w", encoding="utf-8") as f:
+                json.dump(recorded, f, ensure_ascii=False)
+        return results
+
+
+# collects images submitted from many OCR workers during a short window
+# and sends them to the backend as one batch request
+class VisionBatcher:
+    def __init__(
+        self,
+        backend: VisionBackend,
+        window_ms: float = 20.0,
+        max_batch: int = MAX_VISION_BATCH,
+        max_inflight: int = 4,
+        timeout_s: Optional[float] = 60.0,
+    ):
+        self.backend = backend
+        self.window_ms = window_ms
+        self.max_batch = max(1, min(max_batch, MAX_VISION_BATCH))
+        self.max_inflight = max_inflight
+        # how long annotate() waits for its batch before giving up
+        self.timeout_s = timeout_s
+        self.batches_sent = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._dispatcher: Optional[ThreadPoolExecutor] = None
+        self._collector: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._collector is None:
+                self._dispatcher = ThreadPoolExecutor(
+                    max_workers=self.max_inflight, thread_name_prefix="vision"
+                )
+                self._collector = threading.Thread(
+                    target=self._collect, name="vision-batcher", daemon=True
+                )
+                self._collector.start()
+
+    def submit(self, content: bytes) -> Future:
+        future: Future = Future()
+        if self.window_ms <= 0 or self.max_batch == 1:
+            self._send([(content, future)])
+            return future
+
+        if self._collector is None:
+            self._start()
+        self._queue.put((content, future))
+        return future
+
+    def annotate(self, content: bytes) -> str:
+        return self.submit(content).result(timeout=self.timeout_s)
+
+    def _collect(self) -> None:
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.window_ms / 1000
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatcher.submit(self._send, pending)
+
+    def _send(self, pending) -> None:
+        with self._lock:
+            self.batches_sent += 1
+        try:
+            results = self.backend.annotate([content for content, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        # a short response must not leave the remaining callers waiting forever
+        for _, future in pending[len(results):]:
+            future.set_exception(
+                RuntimeError(f"Vision returned {len(results)} responses for {len(pending)} images")
+            )
+
+
+def create_vision_backend(kind: str = "google") -> VisionBackend:
+    replay_dir = os.getenv("VISION_REPLAY_DIR", "vision_recordings")
+    if kind == "google":
+        return GoogleVisionBackend()
+    if kind == "replay":
+        return ReplayVisionBackend(replay_dir, float(os.getenv("VISION_REPLAY_LATENCY_MS", "0")))
+    if kind == "record":
+        return RecordingVisionBackend(GoogleVisionBackend(), replay_dir)
+    raise ValueError(f"Unknown Vision backend '{kind}'")
+
+
+_batcher: Optional[VisionBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+# process-wide batcher, VISION_BACKEND=google|replay|record
+def get_vision_batcher() -> VisionBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = VisionBatcher(
+                    create_vision_backend(os.getenv("VISION_BACKEND", "google")),
+                    window_ms=float(os.getenv("VISION_BATCH_WINDOW_MS", "20")),
+                    max_batch=int(os.getenv("VISION_BATCH_SIZE", str(MAX_VISION_BATCH))),
+                    max_inflight=int(os.getenv("VISION_MAX_INFLIGHT", "4")),
+                    timeout_s=float(os.getenv("VISION_TIMEOUT_S", "60")),
+                )
+    return _batcher
@@ -1,3 +1,4 @@
+import asyncio
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,6 +12,9 @@ from controller.dashboard_controller import router as dashboard_router
 from models.base import Base
 from db.session import engine, get_db
 from helpers.categorization import create_default_categories, create_default_rules
+from helpers.ocr_pool import ocr_pool
+from helpers.product_dictionary import product_keyword_writer
+from service.scan_job_service import scan_job_runner
 
 origins = [
     "http://localhost:5173",
@@ -28,7 +32,11 @@ async def lifespan(app: FastAPI):
         await create_default_rules(db)
         break
 
+    await scan_job_runner.start()
     yield
+    await scan_job_runner.stop()
+    await asyncio.to_thread(ocr_pool.shutdown, True)
+    await asyncio.to_thread(product_keyword_writer.stop)
     await engine.dispose()
 
 
@@ -40,6 +48,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    # next page token of GET /transactions
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(auth_router)
@@ -17,7 +17,14 @@ class ImportJob(Base):
     original_name: Mapped[Optional[str]] = mapped_column(String(255))
     storage_path: Mapped[Optional[str]] = mapped_column(String(500))
     processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # when a worker took the job, its lease on a "processing" job starts here
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # receipt scan jobs: where the transaction goes and what it became
+    account_id: Mapped[Optional[int]] = mapped_column(ForeignKey("accounts.id"), nullable=True)
+    transaction_id: Mapped[Optional[int]] = mapped_column(ForeignKey("transactions.id"), nullable=True)
+    description: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    merchant_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     user: Mapped["User"] = relationship(back_populates="import_jobs")
\ No newline at end of file
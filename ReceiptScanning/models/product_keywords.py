@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from models.base import Base
+
+
+# product name keyword -> category used by the receipt classifier (helpers/category.py)
+class ProductKeyword(Base):
+    __tablename__ = "product_keywords"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # lowercase, letters and digits only (rapidfuzz default_process)
+    keyword: Mapped[str] = mapped_column(String(255), unique=True)
+    category: Mapped[str] = mapped_column(String(100))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
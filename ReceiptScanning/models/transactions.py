@@ -2,7 +2,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import String, DateTime, ForeignKey, Numeric, func
+from sqlalchemy import String, DateTime, ForeignKey, Index, Numeric, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from models.base import Base
@@ -10,6 +10,26 @@ from models.base import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # keyset pagination of a user's transactions, newest first
+        Index("ix_transactions_user_id_transaction_date_id", "user_id", "transaction_date", "id"),
+        # covering indexes of the dashboard / stats aggregates, amount is included so the
+        # sums are read from the index alone
+        # totals per type, expenses by category (and uncategorized) in a date range
+        Index(
+            "ix_transactions_user_id_type_transaction_date",
+            "user_id", "type", "transaction_date", "category_id", "amount",
+        ),
+        # month totals and income vs expenses: a date range grouped by type
+        Index("ix_transactions_user_id_transaction_date_type", "user_id", "transaction_date", "type", "amount"),
+        # category stats and the list filtered by category
+        Index(
+            "ix_transactions_user_id_category_id_transaction_date",
+            "user_id", "category_id", "transaction_date", "amount",
+        ),
+        # account balances: income/expense sums per account
+        Index("ix_transactions_account_id_type", "account_id", "type", "amount"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -1,4 +1,4 @@
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -17,27 +17,43 @@ class AccountRepository:
         )
         return result.scalars().first()
 
+    # accounts with sum(income) - sum(expenses) and their transaction count in one GROUP BY;
+    # a transfer has no counterpart account here, it is counted but moves no money
+    @staticmethod
+    def _with_balance_query():
+        balance = func.coalesce(
+            func.sum(
+                case(
+                    (Transaction.type == "income", Transaction.amount),
+                    (Transaction.type == "expense", -Transaction.amount),
+                    else_=0,
+                )
+            ),
+            0,
+        )
+        return (
+            select(Account, balance.label("balance"), func.count(Transaction.id).label("count"))
+            .outerjoin(Transaction, Transaction.account_id == Account.id)
+            .group_by(Account.id)
+        )
+
+    async def list_with_balance(self, user_id: int) -> List[Tuple[Account, float, int]]:
+        result = await self.db.execute(
+            self._with_balance_query()
+            .where(Account.user_id == user_id)
+            .order_by(Account.is_default.desc(), Account.created_at)
+        )
+        return [(account, float(balance), int(count)) for account, balance, count in result.all()]
+
     async def get_with_balance(
         self, account_id: int, user_id: int
     ) -> Optional[Tuple[Account, float, int]]:
-        account = await self.get_by_id(account_id, user_id)
-        if not account:
-            return None
-
         result = await self.db.execute(
-            select(
-                func.sum(
-                    case(
-                        (Transaction.type == "income", Transaction.amount),
-                        else_=-Transaction.amount,
-                    )
-                ).label("balance"),
-                func.count(Transaction.id).label("count"),
-            ).where(Transaction.account_id == account.id)
+            self._with_balance_query().where(Account.id == account_id, Account.user_id == user_id)
         )
+        row = result.first()
+        if not row:
+            return None
 
-        balance_val, count_val = result.one()
-        balance = float(balance_val) if balance_val is not None else 0.0
-        transaction_count = int(count_val) if count_val is not None else 0
-
-        return account, balance, transaction_count
+        account, balance, count = row
+        return account, float(balance), int(count)
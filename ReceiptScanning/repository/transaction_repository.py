@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.accounts import Account
+from models.categories import Category
+from models.merchants import Merchant
+from models.transactions import Transaction
+from schemas.transaction import TransactionRead
+
+
+# opaque page token: position (transaction_date, id) of the last transaction of a page
+def encode_cursor(transaction_date: datetime, transaction_id: int) -> str:
+    raw = json.dumps({"d": transaction_date.isoformat(), "i": transaction_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["d"]), int(data["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class TransactionRepository:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    # transactions with their merchant, category and account names in one joined query
+    @staticmethod
+    def _read_query():
+        return (
+            select(
+                Transaction,
+                Merchant.display_name.label("merchant_name"),
+                Category.name.label("category_name"),
+                Account.name.label("account_name"),
+            )
+            .outerjoin(Merchant, Transaction.merchant_id == Merchant.id)
+            .outerjoin(Category, Transaction.category_id == Category.id)
+            .outerjoin(Account, Transaction.account_id == Account.id)
+        )
+
+    # newest first; id breaks ties between transactions with the same date, so pages never overlap
+    @staticmethod
+    def paginate(query, limit: int, offset: int = 0, after: Optional[Tuple[datetime, int]] = None):
+        query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+        if after is not None:
+            after_date, after_id = after
+            # the extra date <= bound lets the (user_id, transaction_date, id) index seek to the cursor
+            query = query.where(
+                Transaction.transaction_date <= after_date,
+                or_(Transaction.transaction_date < after_date, Transaction.id < after_id),
+            )
+        else:
+            query = query.offset(offset)
+        return query.limit(limit)
+
+    @staticmethod
+    def to_read(
+        transaction: Transaction,
+        merchant_name: Optional[str],
+        category_name: Optional[str],
+        account_name: Optional[str],
+    ) -> TransactionRead:
+        return TransactionRead(
+            id=transaction.id,
+            user_id=transaction.user_id,
+            account_id=transaction.account_id,
+            merchant_id=transaction.merchant_id,
+            category_id=transaction.category_id,
+            type=transaction.type,
+            amount=Decimal(str(transaction.amount)),
+            currency=transaction.currency,
+            transaction_date=transaction.transaction_date,
+            description=transaction.description,
+            source_type=transaction.source_type,
+            created_at=transaction.created_at,
+            merchant_name=merchant_name,
+            category_name=category_name,
+            account_name=account_name,
+        )
+
+    async def get_read(self, transaction_id: int, user_id: int) -> Optional[TransactionRead]:
+        result = await self.db.execute(
+            self._read_query().where(Transaction.id == transaction_id, Transaction.user_id == user_id)
+        )
+        row = result.first()
+        return self.to_read(*row) if row else None
+
+    async def list_reads(
+        self,
+        user_id: int,
+        account_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        transaction_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> List[TransactionRead]:
+        # after: (transaction_date, id) of the last row already returned, the page
+        # starts right after it (keyset pagination) and offset is ignored
+        query = self._read_query().where(Transaction.user_id == user_id)
+
+        if account_id:
+            query = query.where(Transaction.account_id == account_id)
+        if category_id:
+            query = query.where(Transaction.category_id == category_id)
+        if transaction_type:
+            query = query.where(Transaction.type == transaction_type)
+        if start_date:
+            query = query.where(Transaction.transaction_date >= start_date)
+        if end_date:
+            query = query.where(Transaction.transaction_date <= end_date)
+
+        query = self.paginate(query, limit, offset, after)
+        result = await self.db.execute(query)
+        return [self.to_read(*row) for row in result.all()]
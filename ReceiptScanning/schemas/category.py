@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 class CategoryBase(BaseModel):
@@ -27,3 +27,22 @@ class CategoryRead(BaseModel):
 class CategoryWithStats(CategoryRead):
     transaction_count: int = 0
     total_amount: float = 0.0
+
+
+class RecategorizationMove(BaseModel):
+    old_category_id: Optional[int]
+    new_category_id: int
+    count: int
+
+class RecategorizationChange(BaseModel):
+    transaction_id: int
+    user_id: int
+    old_category_id: Optional[int]
+    new_category_id: int
+
+class RecategorizationRead(BaseModel):
+    dry_run: bool
+    scanned: int
+    changed: int
+    moves: List[RecategorizationMove]
+    changes: List[RecategorizationChange]
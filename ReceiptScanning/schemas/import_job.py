@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class ScanJobRead(BaseModel):
+    id: int
+    status: str
+    original_name: Optional[str] = None
+    account_id: Optional[int] = None
+    transaction_id: Optional[int] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    processed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -13,4 +13,12 @@ class ProductBaseModel(BaseModel):
 class ReceiptBaseModel(BaseModel):
     total: float = 0.0
     raw_text: str | None = None
-    product: List[ProductBaseModel] = Field(default_factory=list)
\ No newline at end of file
+    product: List[ProductBaseModel] = Field(default_factory=list)
+
+
+class BatchScanResult(BaseModel):
+    index: int
+    filename: Optional[str] = None
+    receipt: Optional[ReceiptBaseModel] = None
+    error: Optional[str] = None
+    status_code: int = 200
@@ -0,0 +1,238 @@
+"""EXPLAIN the SQL of the transaction hot paths and fail on a full scan.
+
+Seeds a throwaway database (or --url), calls the dashboard, transaction,
+account and category stats endpoints in-process, records every statement
+they send and runs EXPLAIN on each one with its real parameters. Exits with 1
+when a plan reads a whole table (or a whole index) of a table outside
+--allow-scan.
+
+SQLite does not index foreign keys on its own while InnoDB does, so on SQLite
+every foreign key column gets an index first to get the plans MySQL would use.
+
+Usage (from ReceiptScanning/):
+    python -m scripts.explain_hot_queries [--users 5] [--transactions 20000]
+                                          [--allow-scan categories] [--url URL] [--verbose]
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import Index, event, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from db.session import get_db
+from helpers.categorization import create_default_categories
+from helpers.security import create_access_token
+from main import app
+from models.accounts import Account
+from models.base import Base
+from models.categories import Category
+from models.merchants import Merchant
+from models.transactions import Transaction
+from models.users import User
+
+JWT_COOKIE_NAME = "access_token"
+
+_SQLITE_SCAN_RE = re.compile(r"^SCAN (\w+)")
+
+
+def _index_foreign_keys(sync_conn) -> None:
+    for table in Base.metadata.sorted_tables:
+        indexed = {tuple(c.name for c in index.columns)[0] for index in table.indexes}
+        for fk in table.foreign_keys:
+            column = fk.parent.name
+            if column not in indexed and not fk.parent.primary_key:
+                Index(f"ix_fk_{table.name}_{column}", fk.parent).create(sync_conn, checkfirst=True)
+                indexed.add(column)
+
+
+async def _seed(session_factory, users: int, transactions: int):
+    rng = random.Random(7)
+    async with session_factory() as db:
+        await create_default_categories(db)
+        categories = (await db.execute(select(Category.id, Category.type))).all()
+
+        user_rows = [
+            User(username=f"explain{i}", email=f"explain{i}@example.com", password_hash="x")
+            for i in range(users)
+        ]
+        merchants = [Merchant(normalized_name=f"explain magazin {i}", display_name=f"Magazin {i}") for i in range(50)]
+        db.add_all(user_rows + merchants)
+        await db.flush()
+        accounts = [
+            Account(user_id=user.id, name=name, type="card", currency="RON")
+            for user in user_rows for name in ("Card", "Cash", "Economii")
+        ]
+        db.add_all(accounts)
+        await db.flush()
+
+        start = datetime.utcnow() - timedelta(days=730)
+        rows = []
+        for i in range(transactions):
+            account = rng.choice(accounts)
+            type_ = rng.choices(["expense", "income", "transfer"], weights=[8, 2, 1])[0]
+            same_type = [c.id for c in categories if c.type == type_]
+            rows.append({
+                "user_id": account.user_id,
+                "account_id": account.id,
+                "merchant_id": rng.choice(merchants).id if rng.random() < 0.7 else None,
+                "category_id": rng.choice(same_type) if same_type and rng.random() < 0.8 else None,
+                "type": type_,
+                "amount": Decimal(rng.randint(100, 50000)) / 100,
+                "currency": "RON",
+                "transaction_date": start + timedelta(minutes=rng.randint(0, 730 * 24 * 60)),
+                "created_at": start,
+                "source_type": "manual",
+            })
+        for first in range(0, len(rows), 10_000):
+            await db.execute(insert(Transaction.__table__), rows[first:first + 10_000])
+        await db.commit()
+        return user_rows[0].id, accounts[0].id, categories[0].id
+
+
+def _requests(account_id: int, category_id: int):
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return [
+        ("transactions list", "/transactions/", {"limit": 100}),
+        ("transactions list by category", "/transactions/", {"category_id": category_id}),
+        ("transactions list by type and date", "/transactions/", {
+            "type": "expense", "start_date": (month_start - timedelta(days=90)).isoformat(),
+        }),
+        ("transactions next page", "/transactions/", "cursor"),
+        ("transaction by id", "/transactions/{transaction_id}", {}),
+        ("dashboard summary", "/dashboard/summary", {}),
+        ("dashboard expenses by category", "/dashboard/expenses-by-category", {}),
+        ("dashboard income vs expenses", "/dashboard/income-vs-expenses", {"months": 12}),
+        ("dashboard recent", "/dashboard/recent-transactions", {}),
+        ("accounts with balance", "/accounts/with-balance", {}),
+        ("account details", f"/accounts/{account_id}/details", {}),
+        ("category stats", "/categories/stats", {}),
+        ("category stats by date", "/categories/stats", {"start_date": month_start.isoformat()}),
+    ]
+
+
+async def _record(engine, session_factory, user_id: int, account_id: int, category_id: int):
+    recorded = []
+    current = {"label": None}
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["label"] and statement.lstrip().upper().startswith("SELECT"):
+            recorded.append((current["label"], statement, parameters))
+
+    async def _get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _get_db
+    event.listen(engine.sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://explain") as client:
+            client.cookies.set(JWT_COOKIE_NAME, create_access_token({"sub": str(user_id)}))
+            first_page = await client.get("/transactions/", params={"limit": 100})
+            transaction_id = first_page.json()[0]["id"]
+            cursor = first_page.headers.get("X-Next-Cursor")
+
+            for label, path, params in _requests(account_id, category_id):
+                if params == "cursor":
+                    params = {"limit": 100, "cursor": cursor}
+                current["label"] = label
+                r = await client.get(path.format(transaction_id=transaction_id), params=params)
+                current["label"] = None
+                if r.status_code != 200:
+                    raise RuntimeError(f"{label}: {path} returned {r.status_code} {r.text}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _on_execute)
+        app.dependency_overrides.clear()
+    return recorded
+
+
+async def _explain(engine, statement: str, parameters):
+    async with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+            return [row[-1] for row in result]
+        result = await conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+        return [dict(row._mapping) for row in result]
+
+
+def _full_scans(dialect: str, plan, allowed) -> list:
+    scans = []
+    for step in plan:
+        if dialect == "sqlite":
+            m = _SQLITE_SCAN_RE.match(step)
+            if m and m.group(1) not in allowed and m.group(1) != "CONSTANT":
+                scans.append(step)
+        # MySQL: ALL is a table scan, index a scan of a whole index
+        elif step.get("type") in ("ALL", "index") and step.get("table") not in allowed:
+            scans.append(f"{step.get('table')}: type={step.get('type')} key={step.get('key')}")
+    return scans
+
+
+async def _run(args) -> int:
+    tmpdir = None
+    url = args.url
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'explain.sqlite')}"
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            if engine.dialect.name == "sqlite":
+                await conn.run_sync(_index_foreign_keys)
+
+        user_id, account_id, category_id = await _seed(session_factory, args.users, args.transactions)
+        async with engine.begin() as conn:
+            if engine.dialect.name == "sqlite":
+                await conn.execute(text("ANALYZE"))
+            else:
+                await conn.execute(text("ANALYZE TABLE transactions, accounts, categories, merchants"))
+
+        recorded = await _record(engine, session_factory, user_id, account_id, category_id)
+
+        failures = 0
+        for label, statement, parameters in recorded:
+            plan = await _explain(engine, statement, parameters)
+            scans = _full_scans(engine.dialect.name, plan, set(args.allow_scan))
+            status = "FULL SCAN" if scans else "ok"
+            print(f"[{status}] {label}: {' '.join(statement.split())[:110]}")
+            if args.verbose or scans:
+                for step in plan:
+                    print(f"    {step}")
+            failures += bool(scans)
+
+        print(f"{len(recorded)} statements, {failures} with a full scan")
+        return 1 if failures else 0
+    finally:
+        await engine.dispose()
+        if tmpdir:
+            tmpdir.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=20_000)
+    parser.add_argument(
+        "--allow-scan", nargs="*", default=["categories"],
+        help="small lookup tables that may be scanned",
+    )
+    parser.add_argument("--url", help="async database URL, a temporary SQLite file by default")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Re-run the categorization rules over stored transactions.
+
+Without --apply only the diff is printed (old -> new category, number of
+transactions). With --apply every chunk is written with one bulk UPDATE per
+target category and committed.
+
+Usage (from ReceiptScanning/):
+    python -m scripts.recategorize_transactions [--user-id N] [--type expense|income|transfer]
+                                                [--chunk-size 1000] [--apply]
+"""
+import argparse
+import asyncio
+
+from db.session import AsyncSessionLocal, engine
+from service.recategorization_service import RecategorizationResult, TransactionRecategorizer
+
+
+async def _run(args) -> RecategorizationResult:
+    try:
+        async with AsyncSessionLocal() as db:
+            recategorizer = TransactionRecategorizer(db, chunk_size=args.chunk_size, max_changes=0)
+            return await recategorizer.run(
+                user_id=args.user_id, transaction_type=args.type, dry_run=not args.apply
+            )
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--type", choices=["expense", "income", "transfer"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--apply", action="store_true", help="write the changes, default is a dry run")
+    args = parser.parse_args()
+
+    result = asyncio.run(_run(args))
+    for (old_id, new_id), count in sorted(result.moves.items(), key=lambda m: -m[1]):
+        print(f"{old_id} -> {new_id}: {count}")
+    action = "would change" if result.dry_run else "changed"
+    print(f"scanned={result.scanned} {action}={result.changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Reparse stored receipts from Receipt.raw_text with the current parser, no OCR.
+
+Products of every receipt are replaced and Receipt.total is updated. Progress is
+checkpointed after each batch, so an interrupted run continues where it stopped
+(a checkpoint written by another PARSER_VERSION is ignored).
+
+Usage (from ReceiptScanning/):
+    python -m scripts.reparse_receipts [--batch-size 500] [--workers 4] [--limit N]
+                                       [--checkpoint reparse_checkpoint.json] [--restart]
+"""
+import argparse
+import asyncio
+import os
+
+from db.session import engine
+from service.reparse_service import REPARSE_CHECKPOINT, ReceiptReparser, ReparseProgress
+
+
+def _print_progress(progress: ReparseProgress) -> None:
+    rate = progress.processed / progress.elapsed_s if progress.elapsed_s else 0.0
+    print(
+        f"last_id={progress.last_id} processed={progress.processed} updated={progress.updated} "
+        f"skipped={progress.skipped} failed={progress.failed} ({rate:.0f} receipts/s)",
+        flush=True,
+    )
+
+
+async def _run(args) -> ReparseProgress:
+    reparser = ReceiptReparser(
+        batch_size=args.batch_size,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        on_progress=_print_progress,
+    )
+    try:
+        return await reparser.run(resume=not args.restart, limit=args.limit)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--checkpoint", default=REPARSE_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    progress = asyncio.run(_run(args))
+    print("done")
+    _print_progress(progress)
+    if progress.failed_ids:
+        print(f"failed receipts: {progress.failed_ids}")
+
+
+if __name__ == "__main__":
+    main()
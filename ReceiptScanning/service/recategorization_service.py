@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from helpers.categorization import categorization_contexts
+from models.merchants import Merchant
+from models.transactions import Transaction
+
+
+@dataclass
+class RecategorizationResult:
+    dry_run: bool
+    scanned: int = 0
+    changed: int = 0
+    # (old category id, new category id) -> number of transactions moved
+    moves: Dict[Tuple[Optional[int], int], int] = field(default_factory=dict)
+    # first max_changes individual changes, for the dry-run diff
+    changes: List[dict] = field(default_factory=list)
+
+
+# re-runs the categorization rules over stored transactions: rows are read in id
+# order in chunks and every chunk is written with one UPDATE ... WHERE id IN (...)
+# per target category instead of one statement per transaction
+class TransactionRecategorizer:
+    def __init__(self, db: AsyncSession, chunk_size: int = 1000, max_changes: int = 1000):
+        self.db = db
+        self.chunk_size = max(1, chunk_size)
+        self.max_changes = max_changes
+
+    def _query(self, last_id: int, user_id: Optional[int], transaction_type: Optional[str]):
+        stmt = (
+            select(
+                Transaction.id,
+                Transaction.user_id,
+                Transaction.type,
+                Transaction.category_id,
+                Transaction.merchant_id,
+                Transaction.description,
+                Merchant.display_name,
+            )
+            .outerjoin(Merchant, Transaction.merchant_id == Merchant.id)
+            .where(Transaction.id > last_id)
+            .order_by(Transaction.id)
+            .limit(self.chunk_size)
+        )
+        if user_id is not None:
+            stmt = stmt.where(Transaction.user_id == user_id)
+        if transaction_type is not None:
+            stmt = stmt.where(Transaction.type == transaction_type)
+        return stmt
+
+    async def _regroup(self, rows, result: RecategorizationResult) -> Dict[int, List[int]]:
+        targets: Dict[int, List[int]] = {}
+        for transaction_id, user_id, transaction_type, old_id, merchant_id, description, merchant_name in rows:
+            context = await categorization_contexts.get(self.db, user_id)
+            # the default category only fills uncategorized rows, a category the user
+            # picked is replaced by a preference or a rule, never by the fallback
+            new_id = context.categorize(
+                merchant_id, merchant_name, description, transaction_type, use_default=old_id is None
+            )
+            if new_id is None or new_id == old_id:
+                continue
+
+            targets.setdefault(new_id, []).append(transaction_id)
+            result.changed += 1
+            result.moves[(old_id, new_id)] = result.moves.get((old_id, new_id), 0) + 1
+            if len(result.changes) < self.max_changes:
+                result.changes.append({
+                    "transaction_id": transaction_id,
+                    "user_id": user_id,
+                    "old_category_id": old_id,
+                    "new_category_id": new_id,
+                })
+        return targets
+
+    async def run(
+        self,
+        user_id: Optional[int] = None,
+        transaction_type: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> RecategorizationResult:
+        result = RecategorizationResult(dry_run=dry_run)
+        last_id = 0
+        while True:
+            rows = (await self.db.execute(self._query(last_id, user_id, transaction_type))).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            result.scanned += len(rows)
+
+            targets = await self._regroup(rows, result)
+            if dry_run:
+                continue
+            for category_id, ids in targets.items():
+                await self.db.execute(
+                    update(Transaction)
+                    .where(Transaction.id.in_(ids))
+                    .values(category_id=category_id)
+                    .execution_options(synchronize_session=False)
+                )
+            # one commit per chunk keeps the row locks short
+            await self.db.commit()
+
+        return result
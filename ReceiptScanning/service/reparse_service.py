@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Callable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from db.session import AsyncSessionLocal
+from helpers.vision import PARSER_VERSION, parse_receipt_text
+from models.products import Product
+from models.receipts import Receipt
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REPARSE_CHECKPOINT = os.getenv("REPARSE_CHECKPOINT", "reparse_checkpoint.json")
+
+
+@dataclass
+class ReparseProgress:
+    parser_version: str = PARSER_VERSION
+    # receipts are read in id order, everything up to last_id is done
+    last_id: int = 0
+    processed: int = 0
+    updated: int = 0
+    # the new parser found no products, the stored ones are kept
+    skipped: int = 0
+    failed: int = 0
+    failed_ids: List[int] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+
+# runs in the worker processes: (receipt id, raw_text) -> (id, total, product rows) or (id, error)
+def _parse_batch(rows: List[Tuple[int, str]]) -> List[tuple]:
+    parsed = []
+    for receipt_id, raw_text in rows:
+        try:
+            payload = parse_receipt_text(raw_text)
+        except Exception as e:
+            parsed.append((receipt_id, None, str(e)))
+            continue
+        products = [
+            {
+                "receipt_id": receipt_id,
+                "name": p.name[:255],
+                "price": p.price,
+                "quantity": p.quantity,
+                "unit": p.unit[:10],
+                "sale": p.sale,
+            }
+            for p in payload.product
+        ]
+        parsed.append((receipt_id, payload.total, products))
+    return parsed
+
+
+def load_checkpoint(path: str) -> Optional[ReparseProgress]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        progress = ReparseProgress(**json.load(f))
+    # a newer parser has to go over every receipt again
+    if progress.parser_version != PARSER_VERSION:
+        return None
+    return progress
+
+
+def save_checkpoint(path: str, progress: ReparseProgress) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(asdict(progress), f)
+    os.replace(tmp_path, path)
+
+
+# re-runs the Vision parser over the stored raw_text of every receipt, no OCR:
+# one session streams receipts with a server-side cursor, another writes the results
+class ReceiptReparser:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        batch_size: int = 500,
+        workers: int = os.cpu_count() or 1,
+        kind: str = "process",
+        checkpoint_path: Optional[str] = REPARSE_CHECKPOINT,
+        on_progress: Optional[Callable[[ReparseProgress], None]] = None,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError("Reparse pool kind must be either 'thread' or 'process'")
+
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.kind = kind
+        self.checkpoint_path = checkpoint_path
+        self.on_progress = on_progress
+
+    def _executor(self) -> Executor:
+        if self.kind == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reparse")
+
+    async def _parse(self, executor: Executor, rows: List[Tuple[int, str]]) -> List[tuple]:
+        # one chunk per worker so a batch costs a single round trip per process
+        loop = asyncio.get_running_loop()
+        size = -(-len(rows) // self.workers)
+        chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(executor, _parse_batch, chunk) for chunk in chunks)
+        )
+        return [parsed for chunk in results for parsed in chunk]
+
+    async def _write(self, writer, parsed: List[tuple], progress: ReparseProgress) -> None:
+        receipt_ids = []
+        products = []
+        totals = []
+        for receipt_id, total, result in parsed:
+            if total is None:
+                progress.failed += 1
+                progress.failed_ids.append(receipt_id)
+                logger.warning("Reparse of receipt %s failed: %s", receipt_id, result)
+            elif not result:
+                progress.skipped += 1
+            else:
+                receipt_ids.append(receipt_id)
+                products.extend(result)
+                totals.append({"id": receipt_id, "total": Decimal(str(total))})
+
+        if receipt_ids:
+            await writer.execute(delete(Product).where(Product.receipt_id.in_(receipt_ids)))
+            await writer.execute(insert(Product), products)
+            await writer.execute(update(Receipt), totals)
+        await writer.commit()
+        progress.updated += len(receipt_ids)
+
+    async def run(self, resume: bool = True, limit: Optional[int] = None) -> ReparseProgress:
+        progress = None
+        if resume and self.checkpoint_path:
+            progress = load_checkpoint(self.checkpoint_path)
+        progress = progress or ReparseProgress()
+        started = time.monotonic() - progress.elapsed_s
+
+        stmt = (
+            select(Receipt.id, Receipt.raw_text)
+            .where(Receipt.id > progress.last_id, Receipt.raw_text.is_not(None))
+            .order_by(Receipt.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        executor = self._executor()
+        try:
+            async with self.session_factory() as reader, self.session_factory() as writer:
+                result = await reader.stream(stmt)
+                async for batch in result.partitions(self.batch_size):
+                    rows = [(receipt_id, raw_text) for receipt_id, raw_text in batch]
+                    parsed = await self._parse(executor, rows)
+                    await self._write(writer, parsed, progress)
+
+                    progress.processed += len(rows)
+                    progress.last_id = rows[-1][0]
+                    progress.elapsed_s = round(time.monotonic() - started, 3)
+                    if self.checkpoint_path:
+                        await asyncio.to_thread(save_checkpoint, self.checkpoint_path, progress)
+                    if self.on_progress:
+                        self.on_progress(progress)
+        finally:
+            executor.shutdown(wait=True)
+
+        return progress
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from db.session import AsyncSessionLocal
+from helpers.ocr_pool import OcrPoolFull
+from models.accounts import Account
+from models.import_jobs import ImportJob
+from service.scan_service import scan_receipt_bytes
+from service.transaction_service import TransactionService
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SCAN_JOB_TYPE = "receipt_scan"
+SCAN_JOB_DIR = os.getenv("SCAN_JOB_DIR", "scan_jobs")
+# a "processing" job whose worker has not finished it after this long is taken over
+SCAN_JOB_LEASE_S = float(os.getenv("SCAN_JOB_LEASE_S", "900"))
+
+
+def _write_job_file(contents: bytes) -> str:
+    os.makedirs(SCAN_JOB_DIR, exist_ok=True)
+    path = os.path.abspath(os.path.join(SCAN_JOB_DIR, f"{uuid.uuid4().hex}.img"))
+    with open(path, "wb") as f:
+        f.write(contents)
+    return path
+
+
+def _read_job_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _remove_job_file(path: Optional[str]) -> None:
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+# create a pending scan job, the upload waits on disk until a worker picks it up
+async def create_scan_job(
+    db: AsyncSession,
+    user_id: int,
+    account_id: int,
+    contents: bytes,
+    original_name: Optional[str],
+    description: Optional[str],
+    merchant_name: Optional[str],
+) -> ImportJob:
+    storage_path = await asyncio.to_thread(_write_job_file, contents)
+    job = ImportJob(
+        user_id=user_id,
+        type=SCAN_JOB_TYPE,
+        status="pending",
+        original_name=original_name,
+        storage_path=storage_path,
+        account_id=account_id,
+        description=description,
+        merchant_name=merchant_name,
+    )
+    db.add(job)
+    try:
+        await db.commit()
+    except Exception:
+        await asyncio.to_thread(_remove_job_file, storage_path)
+        raise
+    await db.refresh(job)
+    return job
+
+
+# in-process workers: OCR, parsing and create_with_receipt outside the HTTP request
+class ScanJobRunner:
+    def __init__(
+        self,
+        workers: int = 2,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        lease_s: float = SCAN_JOB_LEASE_S,
+    ):
+        self.workers = workers
+        self.session_factory = session_factory
+        self.lease_s = lease_s
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        # ids waiting in the queue, recovery runs again and again over the same jobs
+        self._queued: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def enqueue(self, job_id: int) -> None:
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._recover()))
+
+    # jobs nobody has claimed, or whose lease ran out, every worker process may queue
+    # them: only one of them wins the claim
+    def _claimable(self, now: datetime):
+        return or_(
+            ImportJob.status == "pending",
+            (ImportJob.status == "processing")
+            & or_(ImportJob.claimed_at.is_(None), ImportJob.claimed_at < now - timedelta(seconds=self.lease_s)),
+        )
+
+    async def _recover(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as db:
+                    result = await db.execute(
+                        select(ImportJob.id)
+                        .where(ImportJob.type == SCAN_JOB_TYPE, self._claimable(datetime.utcnow()))
+                        .order_by(ImportJob.id)
+                    )
+                    for job_id in result.scalars():
+                        self.enqueue(job_id)
+            except Exception:
+                logger.exception("Scan job recovery failed")
+            await asyncio.sleep(self.lease_s)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self.process(job_id)
+            except Exception:
+                logger.exception("Scan job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _scan(self, contents: bytes):
+        # background jobs wait for a free OCR slot instead of failing
+        while True:
+            try:
+                return await scan_receipt_bytes(contents)
+            except OcrPoolFull as e:
+                await asyncio.sleep(e.retry_after)
+
+    # conditional UPDATE, the claim time returned is the lease this worker holds
+    async def _claim(self, db: AsyncSession, job_id: int) -> Optional[datetime]:
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, self._claimable(now))
+            .values(status="processing", claimed_at=now)
+        )
+        await db.commit()
+        return now if result.rowcount == 1 else None
+
+    # written only while the lease is still ours, a worker that took the job over wins
+    async def _finish(self, db: AsyncSession, job_id: int, claimed_at: datetime, **values) -> bool:
+        result = await db.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.id == job_id,
+                ImportJob.status == "processing",
+                ImportJob.claimed_at == claimed_at,
+            )
+            .values(processed_at=datetime.utcnow(), **values)
+        )
+        return result.rowcount == 1
+
+    async def process(self, job_id: int) -> None:
+        async with self.session_factory() as db:
+            claimed_at = await self._claim(db, job_id)
+            if claimed_at is None:
+                return
+
+            job = await db.get(ImportJob, job_id, populate_existing=True)
+            storage_path = job.storage_path
+
+            try:
+                contents = await asyncio.to_thread(_read_job_file, storage_path)
+                receipt_payload = await self._scan(contents)
+
+                account = await db.get(Account, job.account_id)
+                if account is None or account.user_id != job.user_id:
+                    raise HTTPException(status_code=404, detail="Account not found")
+
+                transaction = await TransactionService(db).create_with_receipt(
+                    user_id=job.user_id,
+                    account_id=job.account_id,
+                    receipt_payload=receipt_payload,
+                    transaction_type="expense",
+                    description=job.description,
+                    currency=account.currency,
+                    transaction_date=job.created_at,
+                    merchant_name=job.merchant_name,
+                    # committed below with the job status: a crash in between would
+                    # leave the job "processing" and recovery would scan it again
+                    commit=False,
+                )
+                owned = await self._finish(
+                    db, job_id, claimed_at, status="done", transaction_id=transaction.id, error_message=None
+                )
+            except Exception as e:
+                await db.rollback()
+                detail = e.detail if isinstance(e, HTTPException) else f"Failed to process the receipt image: {e}"
+                owned = await self._finish(db, job_id, claimed_at, status="failed", error_message=str(detail)[:500])
+
+            if not owned:
+                # the lease ran out and another worker has the job, its result is the one kept
+                logger.warning("Scan job %s was taken over, dropping this result", job_id)
+                await db.rollback()
+                return
+            await db.commit()
+            await asyncio.to_thread(_remove_job_file, storage_path)
+
+
+scan_job_runner = ScanJobRunner(workers=int(os.getenv("SCAN_JOB_WORKERS", "2")))
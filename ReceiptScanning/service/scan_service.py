@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from typing import AsyncIterator
+
+from helpers.ocr_cache import ocr_cache
+from helpers.ocr_pool import ocr_pool, OcrPoolFull
+from helpers.receipt_stream import stream_receipt_items
+from helpers.vision import extract_receipt_payload
+from schemas.receipt import ReceiptBaseModel, ProductBaseModel
+
+
+# OCR cache first, then the bounded worker pool (raises OcrPoolFull when it is full)
+async def scan_receipt_bytes(contents: bytes) -> ReceiptBaseModel:
+    key, cached = await asyncio.to_thread(ocr_cache.lookup, contents)
+    if cached is not None:
+        return cached
+
+    payload = await ocr_pool.submit(extract_receipt_payload, contents)
+    await asyncio.to_thread(ocr_cache.put, key, payload)
+    return payload
+
+
+# line-by-line Tesseract OCR in a worker thread, products are handed to the event
+# loop as soon as the parser releases them; raises OcrPoolFull before anything starts
+async def start_receipt_stream(contents: bytes) -> AsyncIterator[ProductBaseModel]:
+    if ocr_pool.queue_depth >= ocr_pool.capacity:
+        raise OcrPoolFull(ocr_pool.retry_after)
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in stream_receipt_items(contents):
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    # the generator cannot be sent to another process: it runs on a thread, but
+    # holds a pool slot until the stream ends, whatever the pool kind
+    worker = asyncio.ensure_future(ocr_pool.submit_in_thread(produce))
+    # produce never ran (e.g. the pool filled up meanwhile), end the stream with its error
+    worker.add_done_callback(
+        lambda f: None if f.cancelled() or f.exception() is None else queue.put_nowait(f.exception())
+    )
+
+    async def items():
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # client went away: the worker stops after the line it is on
+            stopped.set()
+            await asyncio.wait({worker})
+
+    return items()
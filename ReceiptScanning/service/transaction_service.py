@@ -7,11 +7,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from helpers.categorization import CategorizationService
 from models.accounts import Account
-from models.categories import Category
-from models.merchants import Merchant
 from models.products import Product
 from models.receipts import Receipt
 from models.transactions import Transaction
+from repository.transaction_repository import TransactionRepository
 from schemas.receipt import ReceiptBaseModel
 from schemas.transaction import TransactionRead
 
@@ -31,7 +30,9 @@ class TransactionService:
 		currency: str = "RON",
 		transaction_date: Optional[datetime] = None,
 		merchant_name: Optional[str] = None,
+		commit: bool = True,
 	) -> Transaction:
+		# commit=False only flushes, the caller commits the transaction together with its own writes
 		account = await self.db.get(Account, account_id)
 		if not account or account.user_id != user_id:
 			raise HTTPException(status_code=404, detail="Account not found")
@@ -49,6 +50,7 @@ class TransactionService:
 			merchant_name=merchant_name,
 			description=description,
 			transaction_type=transaction_type,
+			merchant_id=merchant_id,
 		)
 
 		transaction = Transaction(
@@ -80,43 +82,12 @@ class TransactionService:
 		)
 
 		self.db.add(transaction)
-		await self.db.commit()
+		if commit:
+			await self.db.commit()
+		else:
+			await self.db.flush()
 		await self.db.refresh(transaction)
 		return transaction
 
 	async def build_transaction_read(self, transaction: Transaction) -> TransactionRead:
-		merchant_name = None
-		if transaction.merchant_id:
-			merchant = await self.db.get(Merchant, transaction.merchant_id)
-			if merchant:
-				merchant_name = merchant.display_name
-
-		category_name = None
-		if transaction.category_id:
-			category = await self.db.get(Category, transaction.category_id)
-			if category:
-				category_name = category.name
-
-		account_name = None
-		if transaction.account_id:
-			account = await self.db.get(Account, transaction.account_id)
-			if account:
-				account_name = account.name
-
-		return TransactionRead(
-			id=transaction.id,
-			user_id=transaction.user_id,
-			account_id=transaction.account_id,
-			merchant_id=transaction.merchant_id,
-			category_id=transaction.category_id,
-			type=transaction.type,
-			amount=Decimal(str(transaction.amount)),
-			currency=transaction.currency,
-			transaction_date=transaction.transaction_date,
-			description=transaction.description,
-			source_type=transaction.source_type,
-			created_at=transaction.created_at,
-			merchant_name=merchant_name,
-			category_name=category_name,
-			account_name=account_name,
-		)
+		return await TransactionRepository(self.db).get_read(transaction.id, transaction.user_id)
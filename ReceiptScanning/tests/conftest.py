@@ -1,12 +1,16 @@
 import asyncio
+import inspect
 import pytest
 
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from main import app
 from models.base import Base
 from db.session import get_db
+from helpers.aggregate_cache import aggregate_cache
+from helpers.categorization import categorization_contexts, keyword_rule_cache, merchant_cache
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -47,7 +51,14 @@ async def db_session() -> AsyncSession:
 			await trans.rollback()
 
 @pytest.fixture(autouse=True)
-def override_get_db(db_session: AsyncSession):
+def override_get_db(request):
+	# plain (sync) tests never reach the database, they run without an event loop
+	if not inspect.iscoroutinefunction(request.function):
+		yield
+		return
+
+	db_session = request.getfixturevalue("db_session")
+
 	async def _get_test_db():
 		yield db_session
 
@@ -55,6 +66,32 @@ def override_get_db(db_session: AsyncSession):
 	yield
 	app.dependency_overrides.clear()
 
+# SQL sent by the test session, clear() it right before the part being measured
+@pytest.fixture
+def sql_statements(db_session: AsyncSession):
+	statements = []
+
+	def _record(conn, cursor, statement, parameters, context, executemany):
+		statements.append(statement)
+
+	sync_conn = db_session.bind.sync_connection
+	event.listen(sync_conn, "before_cursor_execute", _record)
+	yield statements
+	event.remove(sync_conn, "before_cursor_execute", _record)
+
+# every test rolls its rows back, ids cached by an earlier test point to nothing
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+	merchant_cache.clear()
+	keyword_rule_cache.clear()
+	categorization_contexts.clear()
+	aggregate_cache.invalidate_all()
+	yield
+	merchant_cache.clear()
+	keyword_rule_cache.clear()
+	categorization_contexts.clear()
+	aggregate_cache.invalidate_all()
+
 @pytest.fixture
 async def async_client():
 	transport = ASGITransport(app=app)
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+
+from models.transactions import Transaction
+
+JWT_COOKIE_NAME = "access_token"
+
+
+async def _login(async_client: AsyncClient):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+
+
+async def _account(async_client: AsyncClient, name: str, is_default: bool = False):
+    r = await async_client.post("/accounts/", json={"name": name, "type": "card", "is_default": is_default})
+    return r.json()
+
+
+def _transaction(account, type_, amount):
+    return Transaction(user_id=account["user_id"], account_id=account["id"], type=type_, amount=Decimal(amount))
+
+
+@pytest.mark.anyio
+async def test_accounts_with_balance_in_one_query(async_client: AsyncClient, db_session, sql_statements):
+    await _login(async_client)
+    card = await _account(async_client, "Card", is_default=True)
+    cash = await _account(async_client, "Cash")
+    empty = await _account(async_client, "Economii")
+
+    db_session.add_all([
+        _transaction(card, "income", "1000.00"),
+        _transaction(card, "expense", "250.50"),
+        _transaction(card, "transfer", "100.00"),
+        _transaction(cash, "expense", "20.00"),
+    ])
+    await db_session.commit()
+
+    sql_statements.clear()
+    r = await async_client.get("/accounts/with-balance")
+    assert r.status_code == 200
+    # every account with its balance in one query, the current user may come from the identity map
+    assert len([s for s in sql_statements if not s.startswith("SELECT users.")]) == 1
+
+    balances = {a["name"]: (a["balance"], a["transaction_count"]) for a in r.json()}
+    assert balances == {"Card": (749.5, 3), "Cash": (-20.0, 1), "Economii": (0.0, 0)}
+    assert r.json()[0]["id"] == card["id"]
+
+    r = await async_client.get(f"/accounts/{card['id']}/details")
+    assert (r.json()["balance"], r.json()["transaction_count"]) == (749.5, 3)
+    r = await async_client.get(f"/accounts/{empty['id']}/details")
+    assert (r.json()["balance"], r.json()["transaction_count"]) == (0.0, 0)
+    r = await async_client.get("/accounts/999999/details")
+    assert r.status_code == 404
@@ -0,0 +1,86 @@
+import pytest
+
+from helpers.categorization import CategorizationService, categorization_contexts
+from models.categories import Category
+from models.categorization_rules import CategorizationRule
+from models.merchants import Merchant
+from models.users import User
+
+
+async def _setup(db_session):
+    user = User(username="radush", email="a@radush.ro", password_hash="x")
+    supermarket = Category(name="Supermarket", type="expense", is_system=True)
+    restaurants = Category(name="Restaurante", type="expense", is_system=True)
+    other = Category(name="Diverse", type="expense", is_system=True)
+    lidl = Merchant(normalized_name="lidl", display_name="Lidl")
+    kfc = Merchant(normalized_name="kfc", display_name="KFC")
+    db_session.add_all([user, supermarket, restaurants, other, lidl, kfc])
+    await db_session.flush()
+    db_session.add(CategorizationRule(keyword="lidl", category_id=supermarket.id, priority=10, is_active=True))
+    # committed like rules set up earlier, uncommitted ones are never cached
+    await db_session.commit()
+    return user, supermarket, restaurants, other, lidl, kfc
+
+
+@pytest.mark.anyio
+async def test_categorizing_many_transactions_reuses_the_context(db_session, sql_statements):
+    user, supermarket, _, other, lidl, kfc = await _setup(db_session)
+    service = CategorizationService(db_session)
+
+    assert await service.categorize_transaction(user.id, "Lidl", None, "expense", merchant_id=lidl.id) == supermarket.id
+
+    sql_statements.clear()
+    for _ in range(20):
+        assert await service.categorize_transaction(user.id, "Lidl", None, "expense", merchant_id=lidl.id) == supermarket.id
+        assert await service.categorize_transaction(user.id, "KFC", "meniu", "expense", merchant_id=kfc.id) == other.id
+        assert await service.categorize_transaction(user.id, None, "plata", "income") is None
+    assert sql_statements == []
+
+
+@pytest.mark.anyio
+async def test_learn_from_correction_invalidates_the_context(db_session):
+    user, supermarket, restaurants, _, lidl, kfc = await _setup(db_session)
+    service = CategorizationService(db_session)
+    assert await service.categorize_transaction(user.id, "KFC", None, "expense", merchant_id=kfc.id) != restaurants.id
+
+    await service.learn_from_correction(user.id, kfc.id, restaurants.id)
+    assert await service.categorize_transaction(user.id, "KFC", None, "expense", merchant_id=kfc.id) == restaurants.id
+    # a merchant preference wins over the keyword rules
+    await service.learn_from_correction(user.id, lidl.id, restaurants.id)
+    assert await service.categorize_transaction(user.id, "Lidl", None, "expense", merchant_id=lidl.id) == restaurants.id
+
+    await db_session.commit()
+    assert len(categorization_contexts) == 0
+
+
+@pytest.mark.anyio
+async def test_context_expires_after_ttl(db_session, sql_statements, monkeypatch):
+    user, supermarket, _, _, lidl, _ = await _setup(db_session)
+    service = CategorizationService(db_session)
+    first = await service.get_context(user.id)
+    assert await service.get_context(user.id) is first
+
+    monkeypatch.setattr(categorization_contexts, "ttl_s", 0)
+    sql_statements.clear()
+    second = await service.get_context(user.id)
+    assert second is not first
+    assert len(sql_statements) == 1
+    assert second.categorize(lidl.id, "lidl", None, "expense") == supermarket.id
+
+
+@pytest.mark.anyio
+async def test_uncommitted_correction_is_not_shared(db_session):
+    user, _, restaurants, other, _, kfc = await _setup(db_session)
+    service = CategorizationService(db_session)
+    assert await service.categorize_transaction(user.id, "KFC", None, "expense", merchant_id=kfc.id) == other.id
+
+    await service.learn_from_correction(user.id, kfc.id, restaurants.id)
+    # only this session sees the correction until it is committed
+    assert await service.categorize_transaction(user.id, "KFC", None, "expense", merchant_id=kfc.id) == restaurants.id
+    assert len(categorization_contexts) == 0
+
+    user_id, kfc_id = user.id, kfc.id
+    await db_session.rollback()
+    context = await service.get_context(user_id)
+    assert kfc_id not in context.preferences
+    assert await service.get_context(user_id) is context
@@ -0,0 +1,116 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+
+from helpers.aggregate_cache import AggregateCache
+from models.categories import Category
+from models.transactions import Transaction
+
+JWT_COOKIE_NAME = "access_token"
+
+
+async def _setup(async_client: AsyncClient, db_session):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+    account = (await async_client.post("/accounts/", json={"name": "Card", "type": "card"})).json()
+
+    supermarket = Category(name="Supermarket", type="expense", is_system=True)
+    transport = Category(name="Transport", type="expense", is_system=True)
+    salary = Category(name="Salariu", type="income", is_system=True)
+    db_session.add_all([supermarket, transport, salary])
+    await db_session.flush()
+    for category, amount, day in [
+        (supermarket, "10.00", 1), (supermarket, "15.50", 10), (supermarket, "4.50", 20), (salary, "3000", 5),
+    ]:
+        db_session.add(Transaction(
+            user_id=account["user_id"], account_id=account["id"], type=category.type,
+            amount=Decimal(amount), category_id=category.id, transaction_date=datetime(2026, 3, day),
+        ))
+    await db_session.commit()
+    return account, supermarket.id, transport.id, salary.id
+
+
+def _stats(response):
+    return {c["name"]: (c["transaction_count"], c["total_amount"]) for c in response.json()}
+
+
+@pytest.mark.anyio
+async def test_category_stats_in_one_query(async_client: AsyncClient, db_session, sql_statements):
+    await _setup(async_client, db_session)
+
+    sql_statements.clear()
+    r = await async_client.get("/categories/stats")
+    assert r.status_code == 200
+    # the current user may come from the identity map, everything else is one query
+    assert len([s for s in sql_statements if not s.startswith("SELECT users.")]) == 1
+    assert _stats(r) == {"Supermarket": (3, 30.0), "Transport": (0, 0.0), "Salariu": (1, 3000.0)}
+
+    r = await async_client.get("/categories/stats", params={"type": "expense", "start_date": "2026-03-05T00:00:00"})
+    assert _stats(r) == {"Supermarket": (2, 20.0), "Transport": (0, 0.0)}
+    r = await async_client.get(
+        "/categories/stats",
+        params={"start_date": "2026-03-05T00:00:00", "end_date": "2026-03-15T00:00:00"},
+    )
+    assert _stats(r) == {"Supermarket": (1, 15.5), "Transport": (0, 0.0), "Salariu": (1, 3000.0)}
+
+
+@pytest.mark.anyio
+async def test_category_stats_are_cached_until_a_transaction_changes(
+    async_client: AsyncClient, db_session, sql_statements
+):
+    account, supermarket, transport, _ = await _setup(async_client, db_session)
+    first = (await async_client.get("/categories/stats")).json()
+
+    sql_statements.clear()
+    assert (await async_client.get("/categories/stats")).json() == first
+    assert [s for s in sql_statements if "GROUP BY" in s] == []
+
+    r = await async_client.post("/transactions/", json={
+        "account_id": account["id"], "type": "expense", "amount": "7.00",
+        "description": "bilet", "transaction_date": "2026-03-12T10:00:00",
+    })
+    assert r.status_code == 201
+    transaction = await db_session.get(Transaction, r.json()["id"])
+    transaction.category_id = transport
+    await db_session.commit()
+
+    r = await async_client.get("/categories/stats")
+    assert _stats(r)["Transport"] == (1, 7.0)
+
+
+def test_aggregate_cache_drops_least_recently_used_entries():
+    cache = AggregateCache(ttl_s=60, maxsize=2)
+    for user_id in (1, 2):
+        cache.put(user_id, "stats", user_id, cache.version(user_id))
+    assert cache.get(1, "stats") == 1
+    cache.put(3, "stats", 3, cache.version(3))
+
+    assert len(cache) == 2
+    assert cache.get(2, "stats") is None
+    assert (cache.get(1, "stats"), cache.get(3, "stats")) == (1, 3)
+
+
+def test_aggregate_cache_purges_expired_entries_on_put():
+    cache = AggregateCache(ttl_s=0, maxsize=10)
+    cache.put(1, "stats", "old", cache.version(1))
+    cache.put(2, "stats", "new", cache.version(2))
+    assert len(cache) == 1
+
+
+def test_aggregate_cache_forgets_users_without_reusing_their_versions():
+    cache = AggregateCache(ttl_s=60, maxsize=1)
+    before_write = cache.version(1)
+    cache.invalidate_user(1)
+    cache.invalidate_user(2)
+
+    assert len(cache._user_versions) == 1
+    # computed before the write of user 1, it must not be stored once user 1 is forgotten
+    cache.put(1, "stats", "stale", before_write)
+    assert cache.get(1, "stats") is None
+    cache.put(1, "stats", "fresh", cache.version(1))
+    assert cache.get(1, "stats") == "fresh"
@@ -0,0 +1,114 @@
+import cv2 as cv
+import numpy as np
+
+from helpers import image_processing
+from helpers.image_processing import (
+    detecteaza_benzi,
+    extrage_bon,
+    extrage_linii_text,
+    extrage_linii_text_benzi,
+    limite_bon,
+    preprocesare_generala,
+)
+
+
+def _receipt_photo(width=1500, height=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    img = cv.GaussianBlur(rng.normal(70, 25, (height, width, 3)).clip(0, 255).astype(np.uint8), (0, 0), 3)
+
+    x0, y0, x1, y1 = int(width * 0.22), int(height * 0.08), int(width * 0.78), int(height * 0.93)
+    corners = [np.array(p, dtype=float) for p in [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]]
+    edges = []
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        t = np.linspace(0, 1, 300)[:, None]
+        edges.append(a + (b - a) * t + rng.normal(0, 3, (300, 2)))
+    cv.fillPoly(img, [np.vstack(edges).astype(np.int32)], (235, 235, 230))
+
+    for i, y in enumerate(range(y0 + 80, y1 - 50, 50)):
+        cv.putText(img, f"PRODUS {i:02d}   {i + 1},49 B", (x0 + 30, y), cv.FONT_HERSHEY_SIMPLEX, 1.0, (30, 30, 30), 2)
+    return (img + rng.normal(0, 6, img.shape)).clip(0, 255).astype(np.uint8)
+
+
+def _iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+def test_pyramid_crop_matches_full_resolution_crop():
+    img = _receipt_photo()
+    full = limite_bon(img)
+    pyramid = limite_bon(img, {"detect_max_side": 800})
+
+    assert full is not None and pyramid is not None
+    assert _iou(full, pyramid) > 0.95
+
+
+def test_pyramid_box_is_rounded_inwards(monkeypatch):
+    # paper found at x 101..500, y 51..700 on the 0.4x copy of a 1500x2000 image
+    xs = np.linspace(101, 500, 200).astype(np.int32)
+    ys = np.linspace(51, 700, 200).astype(np.int32)
+    contour = np.stack([xs, ys], axis=1).reshape(-1, 1, 2)
+    monkeypatch.setattr(image_processing.cv, "findContours", lambda *args: ([contour], None))
+
+    img = np.full((2000, 1500, 3), 128, dtype=np.uint8)
+    xmin, ymin, xmax, ymax = limite_bon(img, {"detect_max_side": 800, "offset_x": 0, "offset_y": 0})
+
+    # mapped back to the small copy, the box stays inside what was detected there
+    assert (xmin, ymin, xmax, ymax) == (253, 128, 1250, 1750)
+    assert xmin * 0.4 >= 101 and ymin * 0.4 >= 51
+    assert xmax * 0.4 <= 500 and ymax * 0.4 <= 700
+
+
+def test_extrage_bon_records_stage_timings():
+    timings = {}
+    bon = extrage_bon(_receipt_photo(), {"detect_max_side": 800}, timings)
+
+    assert bon is not None and bon.size > 0
+    assert {"resize", "median_blur", "canny", "contours"} <= set(timings)
+
+
+# the row-by-row loop extrage_linii_text used before detecteaza_benzi
+def _benzi_bucla(projection, threshold=10):
+    height = len(projection)
+    lines = []
+    start = -1
+    for y, val in enumerate(projection):
+        if val > threshold and start == -1:
+            start = y
+        elif val <= threshold and start != -1:
+            if y - start > 15:
+                lines.append((max(0, start - 2), min(height, y + 2)))
+            start = -1
+    if start != -1:
+        lines.append((start, height))
+    return lines
+
+
+def test_detecteaza_benzi_matches_row_loop():
+    rng = np.random.default_rng(3)
+    for _ in range(500):
+        n = int(rng.integers(1, 400))
+        runs = np.repeat(rng.random(n) < 0.5, int(rng.integers(1, 30)))[:n]
+        projection = runs * rng.integers(0, 40, n)
+        assert detecteaza_benzi(projection) == _benzi_bucla(projection)
+
+
+def _receipt_lines(lines=12):
+    img = np.full((40 + lines * 60, 900, 3), 255, dtype=np.uint8)
+    for i in range(lines):
+        cv.putText(img, f"PRODUS TEST {i:02d}     {i + 1},49 B", (20, 50 + i * 60), cv.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return img
+
+
+def test_band_mode_finds_the_same_lines():
+    img = _receipt_lines()
+    gray, binary = preprocesare_generala(img)
+    full = extrage_linii_text(gray, binary)
+    benzi = extrage_linii_text_benzi(img)
+
+    assert len(benzi) == len(full) == 12
+    for a, b in zip(full, benzi):
+        assert a.shape[1] == b.shape[1]
+        assert abs(a.shape[0] - b.shape[0]) <= 8
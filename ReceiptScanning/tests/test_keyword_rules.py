@@ -0,0 +1,144 @@
+import random
+
+import pytest
+from sqlalchemy import update
+
+from helpers.categorization import UNCOMMITTED_RULES, CategorizationService, keyword_rule_cache
+from helpers.keyword_matcher import KeywordMatcher
+from models.categories import Category
+from models.categorization_rules import CategorizationRule
+
+
+def _linear_scan(rules, text):
+    for keyword, value in rules:
+        if keyword.lower() in text.lower():
+            return value
+    return None
+
+
+def test_matcher_returns_the_first_rule_in_priority_order():
+    matcher = KeywordMatcher([("hers", 1), ("she", 2), ("he", 3), ("his", 4)])
+
+    assert matcher.first_match("ushers") == 1
+    assert matcher.first_match("usher") == 2
+    assert matcher.first_match("the") == 3
+    assert matcher.first_match("this") == 4
+    assert matcher.first_match("nothing") is None
+    assert KeywordMatcher([]).first_match("text") is None
+
+
+def test_matcher_empty_keyword_matches_everything():
+    matcher = KeywordMatcher([("lidl", 1), ("", 2), ("kaufland", 3)])
+
+    assert matcher.first_match("lidl discount") == 1
+    assert matcher.first_match("kaufland") == 2
+    assert matcher.first_match("") == 2
+
+
+def test_matcher_agrees_with_linear_scan():
+    rng = random.Random(7)
+    for _ in range(300):
+        rules = [
+            ("".join(rng.choice("abc") for _ in range(rng.randint(1, 4))), i)
+            for i in range(rng.randint(1, 12))
+        ]
+        matcher = KeywordMatcher(rules)
+        for _ in range(10):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 15)))
+            assert matcher.first_match(text) == _linear_scan(rules, text)
+
+
+async def _rules_setup(db_session):
+    supermarket = Category(name="Supermarket", type="expense", is_system=True)
+    transport = Category(name="Transport", type="expense", is_system=True)
+    salary = Category(name="Salariu", type="income", is_system=True)
+    db_session.add_all([supermarket, transport, salary])
+    await db_session.flush()
+    db_session.add_all([
+        CategorizationRule(keyword="mega", category_id=supermarket.id, priority=10, is_active=True),
+        CategorizationRule(keyword="taxi", category_id=transport.id, priority=5, is_active=True),
+        CategorizationRule(keyword="Mega Taxi", category_id=transport.id, priority=1, is_active=True),
+        CategorizationRule(keyword="firma", category_id=salary.id, priority=10, is_active=True),
+    ])
+    # committed like rules set up earlier, uncommitted ones are never cached
+    await db_session.commit()
+    return supermarket, transport, salary
+
+
+@pytest.mark.anyio
+async def test_keyword_rules_are_cached_per_transaction_type(db_session, sql_statements):
+    supermarket, transport, salary = await _rules_setup(db_session)
+    service = CategorizationService(db_session)
+
+    assert await service._apply_keyword_rules("mega taxi srl", "expense") == supermarket.id
+    assert await service._apply_keyword_rules("firma srl", "expense") is None
+    assert await service._apply_keyword_rules("firma srl", "income") == salary.id
+
+    # the listener sees this session's queries, so the empty list below means something
+    assert any("FROM categorization_rules" in statement for statement in sql_statements)
+    sql_statements.clear()
+    assert await service._apply_keyword_rules("taxi aeroport", "expense") == transport.id
+    assert await service._apply_keyword_rules("firma", "income") == salary.id
+    assert sql_statements == []
+
+
+@pytest.mark.anyio
+async def test_rule_changes_invalidate_the_cache(db_session):
+    supermarket, transport, _ = await _rules_setup(db_session)
+    service = CategorizationService(db_session)
+    assert await service._apply_keyword_rules("mega taxi", "expense") == supermarket.id
+
+    rule = CategorizationRule(keyword="taxi", category_id=transport.id, priority=20, is_active=True)
+    db_session.add(rule)
+    await db_session.flush()
+    assert await service._apply_keyword_rules("mega taxi", "expense") == transport.id
+
+    rule.is_active = False
+    await db_session.flush()
+    assert await service._apply_keyword_rules("mega taxi", "expense") == supermarket.id
+
+    await db_session.execute(
+        update(CategorizationRule).where(CategorizationRule.keyword == "mega").values(is_active=False)
+    )
+    assert await service._apply_keyword_rules("mega taxi", "expense") == transport.id
+
+
+@pytest.mark.anyio
+async def test_cache_expires_after_ttl(db_session, monkeypatch):
+    supermarket, _, _ = await _rules_setup(db_session)
+    service = CategorizationService(db_session)
+    version = keyword_rule_cache.version
+    assert await service._apply_keyword_rules("mega", "expense") == supermarket.id
+
+    # a change made by another process, the local version counter does not move
+    await db_session.execute(
+        CategorizationRule.__table__.update().values(is_active=False)
+    )
+    assert keyword_rule_cache.version == version
+    assert await service._apply_keyword_rules("mega", "expense") == supermarket.id
+
+    monkeypatch.setattr(keyword_rule_cache, "ttl_s", 0)
+    assert await service._apply_keyword_rules("mega", "expense") is None
+
+
+@pytest.mark.anyio
+async def test_uncommitted_rules_are_not_shared(db_session):
+    supermarket, transport, _ = await _rules_setup(db_session)
+    service = CategorizationService(db_session)
+    version, shared, _ = await keyword_rule_cache.snapshot(db_session)
+    assert shared["expense"].first_match("mega taxi") == supermarket.id
+
+    db_session.add(CategorizationRule(keyword="taxi", category_id=transport.id, priority=20, is_active=True))
+    await db_session.flush()
+    # the session reads its own rule, the process-wide cache does not keep it
+    assert await service._apply_keyword_rules("mega taxi", "expense") == transport.id
+    pending_version, pending, _ = await keyword_rule_cache.snapshot(db_session)
+    assert pending_version == UNCOMMITTED_RULES
+    assert not keyword_rule_cache.is_fresh(pending_version, 0)
+    assert keyword_rule_cache._matchers["expense"] is shared["expense"]
+
+    await db_session.commit()
+    version, committed, _ = await keyword_rule_cache.snapshot(db_session)
+    assert version != UNCOMMITTED_RULES
+    assert keyword_rule_cache._matchers is committed
+    assert committed["expense"].first_match("mega taxi") == transport.id
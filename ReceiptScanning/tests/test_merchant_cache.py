@@ -0,0 +1,74 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from helpers.categorization import CategorizationService, MerchantCache, merchant_cache
+from models.merchants import Merchant
+
+JWT_COOKIE_NAME = "access_token"
+
+
+def test_merchant_cache_evicts_least_recently_used():
+    cache = MerchantCache(maxsize=2)
+    cache.put("lidl", 1)
+    cache.put("kaufland", 2)
+    assert cache.get("lidl") == 1
+    cache.put("omv", 3)
+
+    assert cache.get("kaufland") is None
+    assert cache.get("lidl") == 1
+    assert cache.get("omv") == 3
+    assert len(cache) == 2
+
+
+@pytest.mark.anyio
+async def test_get_or_create_merchant_upserts_and_caches_after_commit(db_session):
+    service = CategorizationService(db_session)
+
+    first = await service._get_or_create_merchant("Lidl Discount ")
+    assert await service._get_or_create_merchant("lidl discount") == first
+    assert merchant_cache.get("lidl discount") is None
+
+    # another process inserted the name in the meantime
+    db_session.add(Merchant(normalized_name="kaufland", display_name="Kaufland"))
+    await db_session.flush()
+    existing = (await db_session.execute(select(Merchant.id).where(Merchant.normalized_name == "kaufland"))).scalar_one()
+    assert await service._get_or_create_merchant("KAUFLAND") == existing
+
+    await db_session.commit()
+    assert merchant_cache.get("lidl discount") == first
+    assert merchant_cache.get("kaufland") == existing
+
+    count = await db_session.execute(select(func.count()).select_from(Merchant))
+    assert count.scalar_one() == 2
+    merchant = await db_session.get(Merchant, first)
+    assert merchant.display_name == "Lidl Discount "
+    assert merchant.created_at is not None
+
+
+@pytest.mark.anyio
+async def test_create_transaction_resolves_the_merchant_once(async_client: AsyncClient, sql_statements):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    await async_client.post("/auth/register", json=payload)
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+    account = (await async_client.post("/accounts/", json={"name": "Card", "type": "card"})).json()
+
+    def _resolving():
+        return [
+            s for s in sql_statements
+            if s.startswith("INSERT INTO merchants") or "WHERE merchants.normalized_name" in s
+        ]
+
+    body = {"account_id": account["id"], "type": "expense", "amount": "12.50", "merchant_name": "Mega Image",
+            "transaction_date": "2026-01-10T12:00:00"}
+    sql_statements.clear()
+    r = await async_client.post("/transactions/", json=body)
+    assert r.status_code == 201
+    assert len(_resolving()) == 2
+
+    sql_statements.clear()
+    r = await async_client.post("/transactions/", json=body)
+    assert r.status_code == 201
+    assert _resolving() == []
+    assert r.json()["merchant_name"] == "Mega Image"
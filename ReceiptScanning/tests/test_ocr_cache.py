@@ -0,0 +1,53 @@
+from helpers.ocr_cache import OcrResultCache
+from schemas.receipt import ReceiptBaseModel, ProductBaseModel
+
+
+def _receipt(total: float) -> ReceiptBaseModel:
+    return ReceiptBaseModel(
+        total=total,
+        raw_text="1 BUC x 4,99\nPAINE 4,99 A\nTOTAL 4,99",
+        product=[ProductBaseModel(name="PAINE", price=total, quantity=1, unit="BUC")],
+    )
+
+
+def test_ocr_cache_counts_hits_and_misses():
+    cache = OcrResultCache()
+    key, cached = cache.lookup(b"receipt-image")
+    assert cached is None
+
+    cache.put(key, _receipt(4.99))
+    _, cached = cache.lookup(b"receipt-image")
+    assert cached == _receipt(4.99)
+
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hits"] == 1
+
+
+def test_ocr_cache_evicts_least_recently_used_by_size():
+    entry_size = len(_receipt(1.0).model_dump_json())
+    cache = OcrResultCache(max_bytes=entry_size * 2)
+
+    cache.put("a", _receipt(1.0))
+    cache.put("b", _receipt(2.0))
+    assert cache.get("a") is not None
+    cache.put("c", _receipt(3.0))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= entry_size * 2
+
+
+def test_ocr_cache_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "ocr_cache.sqlite")
+    key = OcrResultCache.key_for(b"receipt-image")
+    OcrResultCache(disk_path=path).put(key, _receipt(9.5))
+
+    restarted = OcrResultCache(disk_path=path)
+    assert restarted.get(key) == _receipt(9.5)
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get(key) is not None
+    assert restarted.stats()["memory_hits"] == 1
@@ -0,0 +1,75 @@
+import shutil
+
+import cv2 as cv
+import numpy as np
+import pytest
+import pytesseract
+
+from helpers import ocr_engine
+from helpers.image_processing import extrage_linii_text_benzi
+from helpers.ocr_engine import OcrEngine, PytesseractBatchEngine, PytesseractLineEngine, create_ocr_engine
+
+LINES = [
+    "S.C. MEGA IMAGE S.R.L.",
+    "2,000 BUC. x 4,50",
+    "PAINE ALBA FELIATA    9,00 B",
+    "LAPTE ZUZU 1.5L    7,49 B",
+    "TOTAL 16,49",
+]
+
+
+def _receipt(lines):
+    img = np.full((60 + 40 * len(lines), 800, 3), 245, dtype=np.uint8)
+    for i, text in enumerate(lines):
+        cv.putText(img, text, (20, 50 + i * 40), cv.FONT_HERSHEY_SIMPLEX, 0.8, (25, 25, 25), 2)
+    return img
+
+
+def _ocr_data(words):
+    # image_to_data output for (text, top, height, block, par, line) tuples
+    keys = ["text", "top", "height", "block_num", "par_num", "line_num"]
+    return {key: [word[i] for word in words] for i, key in enumerate(keys)}
+
+
+def test_ocr_engine_is_abstract():
+    with pytest.raises(TypeError):
+        OcrEngine()
+
+
+def test_batch_engine_keeps_the_text_lines_of_each_roi(monkeypatch):
+    rois = [np.full((30, 200), 255, dtype=np.uint8), np.full((60, 120), 255, dtype=np.uint8)]
+    # stacked page: first ROI at y=0, second at y=30 + gap
+    second = 30 + 24
+    monkeypatch.setattr(pytesseract, "image_to_data", lambda *args, **kwargs: _ocr_data([
+        ("PAINE", 5, 20, 1, 1, 1),
+        ("ALBA", 5, 20, 1, 1, 1),
+        ("", 5, 20, 1, 1, 1),
+        ("9,00", 6, 20, 1, 1, 1),
+        ("REDUCERE", second + 5, 20, 1, 1, 2),
+        ("-1,00", second + 5, 20, 1, 1, 2),
+        ("TOTAL", second + 35, 20, 1, 1, 3),
+    ]))
+
+    assert PytesseractBatchEngine().recognize_lines(rois) == [
+        "PAINE ALBA 9,00",
+        "REDUCERE -1,00\nTOTAL",
+    ]
+
+
+@pytest.mark.skipif(shutil.which("tesseract") is None, reason="tesseract is not installed")
+def test_batch_engine_matches_line_engine():
+    rois = extrage_linii_text_benzi(_receipt(LINES))
+    assert len(rois) == len(LINES)
+
+    assert PytesseractBatchEngine().recognize_lines(rois) == PytesseractLineEngine().recognize_lines(rois)
+
+
+def test_tesseract_cmd_only_changes_with_tesseract_path(monkeypatch):
+    monkeypatch.setattr(pytesseract.pytesseract, "tesseract_cmd", "tesseract")
+    monkeypatch.setattr(ocr_engine, "TESSERACT_PATH", None)
+    create_ocr_engine("batch")
+    assert pytesseract.pytesseract.tesseract_cmd == "tesseract"
+
+    monkeypatch.setattr(ocr_engine, "TESSERACT_PATH", "C:/Program Files/")
+    create_ocr_engine("batch")
+    assert pytesseract.pytesseract.tesseract_cmd == "C:/Program Files/Tesseract-OCR/tesseract.exe"
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+
+from helpers.ocr_pool import OcrWorkerPool, OcrPoolFull
+
+
+def _blocking_job(event: threading.Event, value: int) -> int:
+    event.wait(timeout=5)
+    return value
+
+
+@pytest.mark.anyio
+async def test_ocr_pool_runs_job_off_the_event_loop():
+    pool = OcrWorkerPool(max_workers=1, max_queue=0)
+    try:
+        assert await pool.submit(threading.get_ident) != threading.get_ident()
+        assert pool.queue_depth == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_ocr_pool_rejects_when_queue_is_full():
+    pool = OcrWorkerPool(max_workers=1, max_queue=1, retry_after=7)
+    release = threading.Event()
+    try:
+        running = asyncio.ensure_future(pool.submit(_blocking_job, release, 1))
+        queued = asyncio.ensure_future(pool.submit(_blocking_job, release, 2))
+        await asyncio.sleep(0.05)
+        assert pool.queue_depth == 2
+
+        with pytest.raises(OcrPoolFull) as exc:
+            await pool.submit(_blocking_job, release, 3)
+        assert exc.value.retry_after == 7
+
+        release.set()
+        assert await running == 1
+        assert await queued == 2
+        assert pool.queue_depth == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_ocr_pool_counts_a_cancelled_job_until_it_finishes():
+    pool = OcrWorkerPool(max_workers=1, max_queue=0)
+    release = threading.Event()
+    try:
+        waiting = asyncio.ensure_future(pool.submit(_blocking_job, release, 1))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await asyncio.sleep(0.05)
+
+        # the worker is still busy, so there is no room for another job
+        assert pool.queue_depth == 1
+        with pytest.raises(OcrPoolFull):
+            await pool.submit(_blocking_job, release, 2)
+
+        release.set()
+        for _ in range(100):
+            if pool.queue_depth == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.queue_depth == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_ocr_pool_thread_work_holds_a_slot_in_process_mode():
+    pool = OcrWorkerPool(max_workers=1, max_queue=0, kind="process")
+    release = threading.Event()
+    try:
+        # a generator cannot go to a worker process, it still takes the only slot
+        running = asyncio.ensure_future(pool.submit_in_thread(_blocking_job, release, 1))
+        await asyncio.sleep(0.05)
+        assert pool.queue_depth == 1
+        with pytest.raises(OcrPoolFull):
+            await pool.submit(_blocking_job, release, 2)
+
+        release.set()
+        assert await running == 1
+    finally:
+        release.set()
+        pool.shutdown()
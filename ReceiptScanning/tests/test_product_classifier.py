@@ -0,0 +1,63 @@
+import json
+import os
+
+import helpers.category as category
+from helpers.category import ProductClassifier, clasifica_produse
+
+
+def _write(path, db, mtime=None):
+    path.write_text(json.dumps(db), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_classify_many_scores_a_whole_receipt(tmp_path):
+    path = tmp_path / "produse.json"
+    _write(path, {"Bauturi": ["cola", "apa plata"], "Lactate": ["lapte", "branza"]})
+    classifier = ProductClassifier(str(path))
+
+    results = classifier.classify_many(["COCA COLA 2L", "LAPTE ZUZU 1.5L", "DETERGENT"])
+    assert results[0] == ("Bauturi", 100)
+    assert results[1] == ("Lactate", 100)
+    assert results[2][1] < 85
+
+
+def test_classify_many_first_category_wins_a_tie(tmp_path):
+    path = tmp_path / "produse.json"
+    _write(path, {"Panificatie": ["paine"], "Diverse": ["paine"]})
+    assert ProductClassifier(str(path)).classify_many(["PAINE ALBA"]) == [("Panificatie", 100)]
+
+
+def test_classifier_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "produse.json"
+    _write(path, {"Bauturi": ["cola"]}, mtime=1_000_000)
+    classifier = ProductClassifier(str(path))
+    assert classifier.reload_if_changed() is False
+
+    _write(path, {"Bauturi": ["cola"], "Fructe": ["banane"]}, mtime=1_000_100)
+    assert classifier.reload_if_changed() is True
+    assert classifier.classify_many(["BANANE"]) == [("Fructe", 100)]
+
+
+def test_forced_refresh_reads_a_file_written_within_the_same_mtime(tmp_path):
+    path = tmp_path / "produse.json"
+    _write(path, {"Bauturi": ["cola"]}, mtime=1_000_000)
+    classifier = ProductClassifier(str(path))
+
+    _write(path, {"Bauturi": ["cola"], "Fructe": ["banane"]}, mtime=1_000_000)
+    assert classifier.refresh() is False
+    assert classifier.refresh(force=True) is True
+    assert classifier.classify_many(["BANANE"]) == [("Fructe", 100)]
+    assert classifier.refresh(force=True) is False
+
+
+def test_clasifica_produse_learns_unknown_products(tmp_path, monkeypatch):
+    path = tmp_path / "produse.json"
+    _write(path, {"Bauturi": ["cola"]})
+    monkeypatch.setattr(category, "DB_FILE", str(path))
+    monkeypatch.setattr(category, "PRODUCT_DICTIONARY", "json")
+    monkeypatch.setattr(category, "_classifier", None)
+
+    rezultate = clasifica_produse([("COLA 2L", 9.5), ("SAPUN DOVE", 7.0), ("SAPUN DOVE", 7.0)])
+    assert [r["categorie"] for r in rezultate] == ["Bauturi", "Nerecunoscut. Todo", "Nerecunoscut. Todo"]
+    assert json.loads(path.read_text(encoding="utf-8"))["Nerecunoscut. Todo"] == ["sapun dove"]
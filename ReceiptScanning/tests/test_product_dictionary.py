@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from helpers.ocr_pool import OcrWorkerPool
+from helpers.product_dictionary import DbProductClassifier, KeywordWriter, upsert_keywords
+from models.product_keywords import ProductKeyword
+
+
+@pytest.fixture
+def sync_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'keywords.sqlite'}")
+    ProductKeyword.__table__.create(engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def seed_file(tmp_path):
+    path = tmp_path / "produse.json"
+    path.write_text(json.dumps({"Bauturi": ["cola", "apa"], "Lactate": ["lapte"]}), encoding="utf-8")
+    return str(path)
+
+
+def _keywords(session_factory):
+    with session_factory() as db:
+        return dict(db.execute(select(ProductKeyword.keyword, ProductKeyword.category)).all())
+
+
+def test_db_classifier_seeds_the_table_from_json(sync_session_factory, seed_file):
+    writer = KeywordWriter(sync_session_factory)
+    classifier = DbProductClassifier(sync_session_factory, writer, seed_path=seed_file)
+
+    assert _keywords(sync_session_factory) == {"cola": "Bauturi", "apa": "Bauturi", "lapte": "Lactate"}
+    assert classifier.classify_many(["COCA COLA"]) == [("Bauturi", 100)]
+
+
+def test_learned_keywords_are_written_behind_and_read_by_other_workers(sync_session_factory, seed_file):
+    writer = KeywordWriter(sync_session_factory, batch_size=10, interval_s=60)
+    first = DbProductClassifier(sync_session_factory, writer, seed_path=seed_file)
+    second = DbProductClassifier(sync_session_factory, writer, seed_path=seed_file)
+
+    first.learn("SAPUN DOVE", "Igiena")
+    first.learn("SAPUN DOVE", "Igiena")
+    assert first.classify_many(["SAPUN DOVE"]) == [("Igiena", 100)]
+    assert "sapun dove" not in _keywords(sync_session_factory)
+
+    writer.stop()
+    assert _keywords(sync_session_factory)["sapun dove"] == "Igiena"
+    assert writer.written == 1
+
+    assert second.refresh() is False
+    assert second.refresh(force=True) is True
+    assert second.classify_many(["SAPUN DOVE 250ML"]) == [("Igiena", 100)]
+    # its own rows come back on refresh without being indexed twice
+    assert first.refresh(force=True) is True
+    assert first.db["Igiena"] == ["sapun dove"]
+
+
+def test_upsert_keeps_the_first_category_of_a_keyword(sync_session_factory):
+    with sync_session_factory() as db:
+        upsert_keywords(db, [{"keyword": "cola", "category": "Bauturi"}])
+        upsert_keywords(db, [
+            {"keyword": "cola", "category": "Diverse"},
+            {"keyword": "bere", "category": "Bauturi"},
+            {"keyword": "bere", "category": "Alcool"},
+        ])
+        db.commit()
+
+    assert _keywords(sync_session_factory) == {"cola": "Bauturi", "bere": "Bauturi"}
+
+
+def _learn_in_worker(db_url: str) -> int:
+    from helpers.product_dictionary import product_keyword_writer
+
+    product_keyword_writer.session_factory = sessionmaker(bind=create_engine(db_url))
+    product_keyword_writer.interval_s = 60
+    product_keyword_writer.submit("sapun dove", "Igiena")
+    return product_keyword_writer.written
+
+
+@pytest.mark.anyio
+async def test_process_workers_write_learned_keywords_before_exiting(sync_session_factory):
+    pool = OcrWorkerPool(max_workers=1, max_queue=0, kind="process")
+    try:
+        # still queued in the worker when the job returns
+        assert await pool.submit(_learn_in_worker, str(sync_session_factory.kw["bind"].url)) == 0
+    finally:
+        pool.shutdown(wait=True)
+    assert _keywords(sync_session_factory) == {"sapun dove": "Igiena"}
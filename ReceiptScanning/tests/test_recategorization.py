@@ -0,0 +1,132 @@
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from models.categories import Category
+from models.categorization_rules import CategorizationRule
+from models.merchants import Merchant
+from models.transactions import Transaction
+from models.users import User
+
+JWT_COOKIE_NAME = "access_token"
+
+
+async def _login(async_client: AsyncClient, db_session, admin: bool):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    user = (await db_session.execute(select(User).where(User.email == "a@radush.ro"))).scalar_one()
+    if admin:
+        user.role = "admin"
+        await db_session.commit()
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+    account = (await async_client.post("/accounts/", json={"name": "Card", "type": "card"})).json()
+    return user, account
+
+
+async def _setup(db_session, user, account):
+    supermarket = Category(name="Supermarket", type="expense", is_system=True)
+    transport = Category(name="Transport", type="expense", is_system=True)
+    other = Category(name="Diverse", type="expense", is_system=True)
+    lidl = Merchant(normalized_name="lidl", display_name="Lidl")
+    db_session.add_all([supermarket, transport, other, lidl])
+    await db_session.flush()
+
+    transactions = []
+    for i in range(7):
+        transactions.append(Transaction(
+            user_id=user.id, account_id=account["id"], type="expense", amount=Decimal("10"),
+            category_id=other.id,
+            merchant_id=lidl.id if i % 2 == 0 else None,
+            description=None if i % 2 == 0 else ("uber aeroport" if i % 3 else "cafea"),
+        ))
+    db_session.add_all(transactions)
+    await db_session.flush()
+    ids = [t.id for t in transactions]
+    db_session.add_all([
+        CategorizationRule(keyword="lidl", category_id=supermarket.id, priority=10, is_active=True),
+        CategorizationRule(keyword="uber", category_id=transport.id, priority=10, is_active=True),
+    ])
+    await db_session.commit()
+    return supermarket.id, transport.id, other.id, ids
+
+
+@pytest.mark.anyio
+async def test_recategorize_dry_run_returns_the_diff(async_client: AsyncClient, db_session):
+    user, account = await _login(async_client, db_session, admin=True)
+    supermarket, transport, other, ids = await _setup(db_session, user, account)
+
+    r = await async_client.post("/categories/recategorize", params={"dry_run": True, "chunk_size": 3})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["dry_run"] is True
+    assert body["scanned"] == 7
+    assert body["changed"] == 6
+    moves = {(m["old_category_id"], m["new_category_id"]): m["count"] for m in body["moves"]}
+    assert moves == {(other, supermarket): 4, (other, transport): 2}
+    assert [c["transaction_id"] for c in body["changes"]] == [t for i, t in enumerate(ids) if i != 3]
+
+    db_session.expire_all()
+    categories = (await db_session.execute(select(Transaction.category_id))).scalars().all()
+    assert set(categories) == {other}
+
+
+@pytest.mark.anyio
+async def test_recategorize_applies_bulk_updates(async_client: AsyncClient, db_session, sql_statements):
+    user, account = await _login(async_client, db_session, admin=True)
+    supermarket, transport, other, ids = await _setup(db_session, user, account)
+
+    sql_statements.clear()
+    r = await async_client.post(
+        "/categories/recategorize", params={"dry_run": False, "user_id": user.id, "chunk_size": 3}
+    )
+    assert r.status_code == 200
+    assert r.json()["changed"] == 6
+    # chunks [0,1,2] [3,4,5] [6]: one UPDATE per target category of each chunk
+    updates = [s for s in sql_statements if s.startswith("UPDATE transactions")]
+    assert len(updates) == 5
+
+    db_session.expire_all()
+    rows = dict((await db_session.execute(select(Transaction.id, Transaction.category_id))).all())
+    expected = [supermarket, transport, supermarket, other, supermarket, transport, supermarket]
+    assert [rows[t] for t in ids] == expected
+
+    r = await async_client.post("/categories/recategorize", params={"dry_run": False})
+    assert r.json()["changed"] == 0
+
+
+@pytest.mark.anyio
+async def test_recategorize_requires_admin(async_client: AsyncClient, db_session):
+    await _login(async_client, db_session, admin=False)
+
+    r = await async_client.post("/categories/recategorize")
+    assert r.status_code == 403
+
+
+@pytest.mark.anyio
+async def test_recategorize_keeps_categories_no_rule_matches(async_client: AsyncClient, db_session):
+    user, account = await _login(async_client, db_session, admin=True)
+    _, transport, other, _ = await _setup(db_session, user, account)
+    manual = Transaction(
+        user_id=user.id, account_id=account["id"], type="expense", amount=Decimal("10"),
+        category_id=transport, description="cafea",
+    )
+    uncategorized = Transaction(
+        user_id=user.id, account_id=account["id"], type="expense", amount=Decimal("10"),
+        category_id=None, description="cafea",
+    )
+    db_session.add_all([manual, uncategorized])
+    await db_session.commit()
+    manual_id, uncategorized_id = manual.id, uncategorized.id
+
+    r = await async_client.post("/categories/recategorize", params={"dry_run": False})
+    assert r.status_code == 200
+
+    db_session.expire_all()
+    rows = dict((await db_session.execute(select(Transaction.id, Transaction.category_id))).all())
+    # the fallback category only fills the row that had none
+    assert rows[manual_id] == transport
+    assert rows[uncategorized_id] == other
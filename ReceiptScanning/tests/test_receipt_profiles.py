@@ -0,0 +1,40 @@
+from helpers.receipt_profiles import GENERIC_PROFILE, detect_profile, get_profile
+from helpers.vision import Item, _parse_items_from_lines
+
+
+def test_detect_profile_by_chain_name_or_cif():
+    assert detect_profile(["KAUFLAND ROMANIA SCS", "CIF RO 15991149"]).name == "kaufland"
+    assert detect_profile(["C.I.F. RO22891860"]).name == "lidl"
+    assert detect_profile(["S.C. MEGA IMAGE S.R.L."]).name == "mega_image"
+    assert detect_profile(["CIF: 11588780"]).name == "carrefour"
+    assert detect_profile(["MAGAZIN ALIMENTAR"]) is GENERIC_PROFILE
+
+
+def test_detect_profile_only_reads_the_header():
+    lines = ["MAGAZIN"] * 8 + ["LIDL"]
+    assert detect_profile(lines) is GENERIC_PROFILE
+
+
+def test_chain_profile_stops_names_at_footer_lines():
+    lines = ["1 BUC x 3,00", "APA PLATA", "REST 0,00"]
+    assert _parse_items_from_lines(lines, GENERIC_PROFILE) == [
+        Item(quantity=1.0, unit="BUC", name="APA PLATA REST", price=3.0, sale=0.0),
+    ]
+    assert _parse_items_from_lines(lines, get_profile("kaufland")) == [
+        Item(quantity=1.0, unit="BUC", name="APA PLATA", price=3.0, sale=0.0),
+    ]
+
+
+def test_chain_profile_keeps_two_line_names():
+    lines = ["1 BUC x 3,00", "APA PLATA", "BORSEC 2L", "REST 0,00"]
+    assert _parse_items_from_lines(lines, get_profile("lidl")) == [
+        Item(quantity=1.0, unit="BUC", name="APA PLATA BORSEC 2L", price=3.0, sale=0.0),
+    ]
+
+
+def test_chain_profile_keeps_house_brand_items():
+    for name, brand in [("kaufland", "K-CLASSIC"), ("kaufland", "KAUFLAND"), ("lidl", "LIDL"),
+                        ("mega_image", "MEGA IMAGE"), ("carrefour", "CARREFOUR")]:
+        lines = ["1 BUC x 7,50", f"{brand} BIO LAPTE 7,50 A", "REST 0,00"]
+        items = _parse_items_from_lines(lines, get_profile(name))
+        assert [item.name for item in items] == [f"{brand} BIO LAPTE"], name
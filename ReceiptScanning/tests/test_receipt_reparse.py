@@ -0,0 +1,95 @@
+import json
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from models.products import Product
+from models.receipts import Receipt
+from models.transactions import Transaction
+from service.reparse_service import ReceiptReparser
+
+JWT_COOKIE_NAME = "access_token"
+
+RAW_TEXT = "S.C. MEGA IMAGE S.R.L.\n2,000 BUC. x 4,99\nPAINE ALBA 9,98 B\n1 KG x 7,50\nBANANE\nTOTAL 17,48"
+
+
+async def _create_receipts(async_client: AsyncClient, db_session, count: int):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+    r = await async_client.post("/accounts/", json={"name": "Card", "type": "card"})
+    account = r.json()
+
+    receipts = []
+    for i in range(count):
+        transaction = Transaction(
+            user_id=account["user_id"], account_id=account["id"], type="expense", amount=Decimal("1")
+        )
+        transaction.receipt = Receipt(
+            total=Decimal("1"),
+            raw_text=RAW_TEXT if i % 3 else "TEXT FARA PRODUSE",
+            products=[Product(name="VECHI", price=1, quantity=1, unit="BUC")],
+        )
+        db_session.add(transaction)
+        receipts.append(transaction.receipt)
+    await db_session.commit()
+    return [receipt.id for receipt in receipts]
+
+
+def _reparser(db_session, checkpoint, **kwargs) -> ReceiptReparser:
+    @asynccontextmanager
+    async def _test_session():
+        yield db_session
+
+    return ReceiptReparser(
+        session_factory=_test_session, batch_size=2, workers=2, kind="thread",
+        checkpoint_path=str(checkpoint), **kwargs,
+    )
+
+
+@pytest.mark.anyio
+async def test_reparse_replaces_products_and_total(async_client: AsyncClient, db_session, tmp_path):
+    ids = await _create_receipts(async_client, db_session, 5)
+    checkpoint = tmp_path / "reparse.json"
+    seen = []
+
+    progress = await _reparser(db_session, checkpoint, on_progress=lambda p: seen.append(p.processed)).run()
+    assert progress.processed == 5
+    assert progress.updated == 3
+    assert progress.skipped == 2
+    assert progress.last_id == ids[-1]
+    assert seen == [2, 4, 5]
+    assert json.loads(checkpoint.read_text())["last_id"] == ids[-1]
+
+    db_session.expire_all()
+    receipt = await db_session.get(Receipt, ids[1])
+    assert receipt.total == Decimal("27.46")
+    names = (await db_session.execute(
+        select(Product.name).where(Product.receipt_id == ids[1]).order_by(Product.id)
+    )).scalars().all()
+    assert names == ["PAINE ALBA", "BANANE"]
+
+    # receipts without parsable products keep what they had
+    names = (await db_session.execute(select(Product.name).where(Product.receipt_id == ids[0]))).scalars().all()
+    assert names == ["VECHI"]
+
+
+@pytest.mark.anyio
+async def test_reparse_resumes_from_checkpoint(async_client: AsyncClient, db_session, tmp_path):
+    ids = await _create_receipts(async_client, db_session, 5)
+    checkpoint = tmp_path / "reparse.json"
+
+    first = await _reparser(db_session, checkpoint).run(limit=2)
+    assert first.last_id == ids[1]
+
+    resumed = await _reparser(db_session, checkpoint).run()
+    assert resumed.processed == 5
+    assert resumed.last_id == ids[-1]
+
+    restarted = await _reparser(db_session, checkpoint).run(resume=False)
+    assert restarted.processed == 5
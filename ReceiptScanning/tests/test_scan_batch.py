@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+import controller.scan_controller as scan_controller
+import service.scan_service as scan_service
+from schemas.receipt import ReceiptBaseModel
+
+JWT_COOKIE_NAME = "access_token"
+API_KEY = "test-api-key"
+
+
+@pytest.fixture(autouse=True)
+def fake_ocr(monkeypatch):
+    def _extract(contents: bytes) -> ReceiptBaseModel:
+        if contents.startswith(b"broken"):
+            raise ValueError("unreadable image")
+        return ReceiptBaseModel(total=float(len(contents)), raw_text=contents.decode())
+
+    monkeypatch.setattr(scan_controller, "API_KEY", API_KEY)
+    monkeypatch.setattr(scan_service, "extract_receipt_payload", _extract)
+
+
+async def _login(async_client: AsyncClient):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    assert r.status_code == 200
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+
+
+@pytest.mark.anyio
+async def test_scan_batch_streams_one_result_per_image(async_client: AsyncClient):
+    await _login(async_client)
+    files = [
+        ("files", ("a.jpg", b"batch receipt a", "image/jpeg")),
+        ("files", ("b.jpg", b"broken batch receipt", "image/jpeg")),
+        ("files", ("c.jpg", b"", "image/jpeg")),
+    ]
+    r = await async_client.post("/scan/batch", files=files, headers={"x-api-key": API_KEY})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    results = {item["filename"]: item for item in map(json.loads, r.text.splitlines())}
+    assert set(results) == {"a.jpg", "b.jpg", "c.jpg"}
+
+    assert results["a.jpg"]["status_code"] == 200
+    assert results["a.jpg"]["receipt"]["raw_text"] == "batch receipt a"
+    assert results["b.jpg"]["status_code"] == 500
+    assert "unreadable image" in results["b.jpg"]["error"]
+    assert results["c.jpg"]["status_code"] == 400
+
+
+@pytest.mark.anyio
+async def test_scan_batch_sse_ends_with_done_event(async_client: AsyncClient):
+    await _login(async_client)
+    files = [("files", ("a.jpg", b"sse batch receipt", "image/jpeg"))]
+    r = await async_client.post(
+        "/scan/batch?stream_format=sse", files=files, headers={"x-api-key": API_KEY}
+    )
+    assert r.status_code == 200
+    events = [line for line in r.text.splitlines() if line.startswith("event:")]
+    assert events == ["event: receipt", "event: done"]
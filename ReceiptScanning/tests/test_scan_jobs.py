@@ -0,0 +1,201 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+import controller.scan_controller as scan_controller
+import service.scan_job_service as scan_job_service
+import service.scan_service as scan_service
+from schemas.receipt import ReceiptBaseModel, ProductBaseModel
+from models.import_jobs import ImportJob
+from models.transactions import Transaction
+from service.scan_job_service import ScanJobRunner
+
+JWT_COOKIE_NAME = "access_token"
+API_KEY = "test-api-key"
+
+
+@pytest.fixture(autouse=True)
+def fake_ocr(monkeypatch, tmp_path):
+    def _extract(contents: bytes) -> ReceiptBaseModel:
+        return ReceiptBaseModel(
+            total=12.5,
+            raw_text=contents.decode(),
+            product=[ProductBaseModel(name="PAINE", price=12.5, quantity=1, unit="BUC")],
+        )
+
+    monkeypatch.setattr(scan_controller, "API_KEY", API_KEY)
+    monkeypatch.setattr(scan_service, "extract_receipt_payload", _extract)
+    monkeypatch.setattr(scan_job_service, "SCAN_JOB_DIR", str(tmp_path))
+
+
+async def _login_with_account(async_client: AsyncClient) -> int:
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    assert r.status_code == 200
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+
+    r = await async_client.post("/accounts/", json={"name": "Card", "type": "card"})
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+@pytest.mark.anyio
+async def test_background_scan_returns_job_and_worker_creates_transaction(async_client: AsyncClient, db_session):
+    account_id = await _login_with_account(async_client)
+
+    r = await async_client.post(
+        "/scan/transaction",
+        data={"account_id": str(account_id), "background": "true", "merchant_name": "Lidl"},
+        files={"file": ("bon.jpg", b"scan job receipt", "image/jpeg")},
+        headers={"x-api-key": API_KEY},
+    )
+    assert r.status_code == 202, r.json()
+    job = r.json()
+    assert job["status"] == "pending"
+    assert r.headers["location"] == f"/scan/jobs/{job['id']}"
+
+    @asynccontextmanager
+    async def _test_session():
+        yield db_session
+
+    await ScanJobRunner(session_factory=_test_session).process(job["id"])
+
+    r = await async_client.get(f"/scan/jobs/{job['id']}", headers={"x-api-key": API_KEY})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "done"
+    assert body["processed_at"] is not None
+
+    r = await async_client.get(f"/transactions/{body['transaction_id']}")
+    assert r.status_code == 200
+    assert r.json()["amount"] == "12.50"
+    assert r.json()["merchant_name"] == "Lidl"
+
+
+@pytest.mark.anyio
+async def test_scan_job_status_is_private(async_client: AsyncClient):
+    r = await async_client.get("/scan/jobs/999", headers={"x-api-key": API_KEY})
+    assert r.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_scan_job_commits_transaction_with_its_status(async_client: AsyncClient, db_session, monkeypatch):
+    account_id = await _login_with_account(async_client)
+    r = await async_client.post(
+        "/scan/transaction",
+        data={"account_id": str(account_id), "background": "true"},
+        files={"file": ("bon.jpg", b"scan job receipt", "image/jpeg")},
+        headers={"x-api-key": API_KEY},
+    )
+    job_id = r.json()["id"]
+
+    # what each commit made durable: (job status, transaction id)
+    commits = []
+    commit = db_session.commit
+
+    async def _recording_commit():
+        job = await db_session.get(scan_job_service.ImportJob, job_id)
+        commits.append((job.status, job.transaction_id))
+        await commit()
+
+    monkeypatch.setattr(db_session, "commit", _recording_commit)
+
+    @asynccontextmanager
+    async def _test_session():
+        yield db_session
+
+    await ScanJobRunner(session_factory=_test_session).process(job_id)
+
+    # no commit ever holds a new transaction while the job is still "processing"
+    assert [status for status, _ in commits] == ["processing", "done"]
+    assert commits[-1][1] is not None
+
+
+async def _background_job(async_client: AsyncClient) -> int:
+    account_id = await _login_with_account(async_client)
+    r = await async_client.post(
+        "/scan/transaction",
+        data={"account_id": str(account_id), "background": "true"},
+        files={"file": ("bon.jpg", b"scan job receipt", "image/jpeg")},
+        headers={"x-api-key": API_KEY},
+    )
+    return r.json()["id"]
+
+
+def _runner(db_session, lease_s: float = 60) -> ScanJobRunner:
+    @asynccontextmanager
+    async def _test_session():
+        yield db_session
+
+    return ScanJobRunner(session_factory=_test_session, lease_s=lease_s)
+
+
+async def _transaction_count(db_session) -> int:
+    return (await db_session.execute(select(func.count(Transaction.id)))).scalar_one()
+
+
+@pytest.mark.anyio
+async def test_scan_job_held_by_another_worker_is_skipped_until_its_lease_ends(
+    async_client: AsyncClient, db_session
+):
+    job_id = await _background_job(async_client)
+    job = await db_session.get(ImportJob, job_id)
+    job.status, job.claimed_at = "processing", datetime.utcnow()
+    await db_session.commit()
+
+    await _runner(db_session).process(job_id)
+    job = await db_session.get(ImportJob, job_id, populate_existing=True)
+    assert (job.status, job.transaction_id) == ("processing", None)
+    assert await _transaction_count(db_session) == 0
+
+    job.claimed_at = datetime.utcnow() - timedelta(seconds=120)
+    await db_session.commit()
+    await _runner(db_session).process(job_id)
+    job = await db_session.get(ImportJob, job_id, populate_existing=True)
+    assert job.status == "done"
+    assert await _transaction_count(db_session) == 1
+
+
+@pytest.mark.anyio
+async def test_scan_job_taken_over_mid_scan_keeps_no_transaction(
+    async_client: AsyncClient, db_session, monkeypatch
+):
+    job_id = await _background_job(async_client)
+    runner = _runner(db_session)
+    scan = runner._scan
+    # after the takeover: what this worker commits, how often it rolls back
+    taken_over, commits, rollbacks = [], [], []
+
+    async def _scan_while_another_worker_claims(contents):
+        payload = await scan(contents)
+        job = await db_session.get(ImportJob, job_id)
+        job.claimed_at = datetime.utcnow() + timedelta(seconds=1)
+        await db_session.commit()
+        taken_over.append(True)
+        return payload
+
+    commit = db_session.commit
+
+    async def _recording_commit():
+        if taken_over:
+            commits.append(True)
+        await commit()
+
+    async def _recording_rollback():
+        # the test session's rollback would also drop the rows of the test itself
+        rollbacks.append(True)
+
+    monkeypatch.setattr(runner, "_scan", _scan_while_another_worker_claims)
+    monkeypatch.setattr(db_session, "commit", _recording_commit)
+    monkeypatch.setattr(db_session, "rollback", _recording_rollback)
+    await runner.process(job_id)
+
+    # the new transaction is rolled back instead of committed, the job stays with the other worker
+    assert (commits, rollbacks) == ([], [True])
+    job = await db_session.get(ImportJob, job_id)
+    assert (job.status, job.transaction_id) == ("processing", None)
@@ -0,0 +1,64 @@
+import pytest
+from httpx import AsyncClient
+
+import controller.scan_controller as scan_controller
+import service.scan_service as scan_service
+from schemas.receipt import ProductBaseModel
+
+JWT_COOKIE_NAME = "access_token"
+API_KEY = "test-api-key"
+
+
+@pytest.fixture(autouse=True)
+def fake_stream(monkeypatch):
+    def _stream(contents: bytes):
+        yield ProductBaseModel(name="PAINE", price=4.99, quantity=1, unit="BUC")
+        if contents.startswith(b"broken"):
+            raise ValueError("unreadable line")
+        yield ProductBaseModel(name="LAPTE", price=7.5, quantity=1, unit="BUC")
+
+    monkeypatch.setattr(scan_controller, "API_KEY", API_KEY)
+    monkeypatch.setattr(scan_service, "stream_receipt_items", _stream)
+
+
+async def _login(async_client: AsyncClient):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    assert r.status_code == 200
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+
+
+def _events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), data.removeprefix("data: ")))
+    return events
+
+
+@pytest.mark.anyio
+async def test_scan_stream_sends_items_then_done(async_client: AsyncClient):
+    await _login(async_client)
+    files = {"file": ("bon.jpg", b"receipt image", "image/jpeg")}
+    r = await async_client.post("/scan/stream", files=files, headers={"x-api-key": API_KEY})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(r.text)
+    assert [name for name, _ in events] == ["item", "item", "done"]
+    assert ProductBaseModel.model_validate_json(events[0][1]).name == "PAINE"
+    assert events[-1][1] == '{"items": 2}'
+
+
+@pytest.mark.anyio
+async def test_scan_stream_reports_errors_after_partial_items(async_client: AsyncClient):
+    await _login(async_client)
+    files = {"file": ("bon.jpg", b"broken receipt", "image/jpeg")}
+    r = await async_client.post("/scan/stream", files=files, headers={"x-api-key": API_KEY})
+    assert r.status_code == 200
+
+    events = _events(r.text)
+    assert [name for name, _ in events] == ["item", "error"]
+    assert "unreadable line" in events[1][1]
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+
+from models.transactions import Transaction
+from repository.transaction_repository import decode_cursor, encode_cursor
+
+JWT_COOKIE_NAME = "access_token"
+
+
+async def _create_transactions(async_client: AsyncClient, db_session, count: int):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+    account = (await async_client.post("/accounts/", json={"name": "Card", "type": "card"})).json()
+
+    start = datetime(2026, 3, 1)
+    for i in range(count):
+        # pairs of transactions share a date, the id has to break the tie
+        db_session.add(Transaction(
+            user_id=account["user_id"], account_id=account["id"], type="expense",
+            amount=Decimal("1.00") + i, transaction_date=start + timedelta(days=i // 2),
+        ))
+    await db_session.commit()
+    return account
+
+
+def test_cursor_roundtrip():
+    date = datetime(2026, 3, 1, 12, 30, 5, 123)
+    assert decode_cursor(encode_cursor(date, 42)) == (date, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("nu-e-cursor")
+
+
+@pytest.mark.anyio
+async def test_cursor_pages_cover_every_transaction_once(async_client: AsyncClient, db_session):
+    await _create_transactions(async_client, db_session, 11)
+    everything = (await async_client.get("/transactions/", params={"limit": 100})).json()
+    assert len(everything) == 11
+
+    pages = []
+    params = {"limit": 4}
+    while True:
+        r = await async_client.get("/transactions/", params=params)
+        assert r.status_code == 200
+        pages.append(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 4, "cursor": cursor}
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    assert [t["id"] for page in pages for t in page] == [t["id"] for t in everything]
+    keys = [(t["transaction_date"], t["id"]) for t in everything]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.anyio
+async def test_cursor_pages_do_not_shift_on_insert(async_client: AsyncClient, db_session):
+    account = await _create_transactions(async_client, db_session, 6)
+    r = await async_client.get("/transactions/", params={"limit": 3})
+    first = r.json()
+    cursor = r.headers["X-Next-Cursor"]
+
+    # a newer transaction lands between the two requests
+    db_session.add(Transaction(
+        user_id=account["user_id"], account_id=account["id"], type="expense",
+        amount=Decimal("9.00"), transaction_date=datetime(2026, 4, 1),
+    ))
+    await db_session.commit()
+
+    second = (await async_client.get("/transactions/", params={"limit": 3, "cursor": cursor})).json()
+    offset_page = (await async_client.get("/transactions/", params={"limit": 3, "offset": 3})).json()
+    assert {t["id"] for t in first}.isdisjoint(t["id"] for t in second)
+    assert len(second) == 3
+    # the offset page repeats the last row of the first page
+    assert offset_page[0]["id"] == first[-1]["id"]
+
+    r = await async_client.get("/transactions/", params={"cursor": "???"})
+    assert r.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_empty_page_has_no_cursor(async_client: AsyncClient, db_session):
+    await _create_transactions(async_client, db_session, 2)
+
+    r = await async_client.get("/transactions/", params={"limit": 0})
+    assert r.status_code == 200
+    assert r.json() == []
+    assert "X-Next-Cursor" not in r.headers
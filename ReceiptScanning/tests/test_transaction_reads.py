@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+
+from models.categories import Category
+from models.merchants import Merchant
+from models.transactions import Transaction
+
+JWT_COOKIE_NAME = "access_token"
+
+
+async def _create_transactions(async_client: AsyncClient, db_session, count: int):
+    payload = {"username": "radush", "email": "a@radush.ro", "password": "Secret123!"}
+    r = await async_client.post("/auth/register", json=payload)
+    assert r.status_code == 201
+    r = await async_client.post("/auth/login", json={"email": "a@radush.ro", "password": "Secret123!"})
+    async_client.cookies.set(JWT_COOKIE_NAME, r.cookies.get(JWT_COOKIE_NAME))
+    account = (await async_client.post("/accounts/", json={"name": "Card", "type": "card"})).json()
+
+    category = Category(name="Supermarket", type="expense", is_system=True)
+    db_session.add(category)
+    await db_session.flush()
+    for i in range(count):
+        merchant = Merchant(normalized_name=f"magazin {i}", display_name=f"Magazin {i}")
+        db_session.add(merchant)
+        await db_session.flush()
+        db_session.add(Transaction(
+            user_id=account["user_id"], account_id=account["id"], type="expense",
+            amount=Decimal("5.50"), merchant_id=merchant.id,
+            category_id=category.id if i % 2 == 0 else None,
+        ))
+    await db_session.commit()
+    return account
+
+
+@pytest.mark.anyio
+async def test_transaction_list_query_count_does_not_grow_with_page_size(
+    async_client: AsyncClient, db_session, sql_statements
+):
+    account = await _create_transactions(async_client, db_session, 30)
+
+    counts = {}
+    for limit in (1, 10, 30):
+        sql_statements.clear()
+        r = await async_client.get("/transactions/", params={"limit": limit})
+        assert r.status_code == 200
+        assert len(r.json()) == limit
+        counts[limit] = len(sql_statements)
+    assert counts[1] == counts[10] == counts[30]
+
+    for limit in (1, 10):
+        sql_statements.clear()
+        r = await async_client.get("/dashboard/recent-transactions", params={"limit": limit})
+        assert len(r.json()) == limit
+        counts[f"recent{limit}"] = len(sql_statements)
+    assert counts["recent1"] == counts["recent10"]
+
+    rows = r.json()
+    assert {row["category_name"] for row in rows} == {"Supermarket", None}
+
+    items = (await async_client.get("/transactions/", params={"limit": 30})).json()
+    by_merchant = {item["merchant_name"]: item for item in items}
+    assert set(by_merchant) == {f"Magazin {i}" for i in range(30)}
+    assert by_merchant["Magazin 0"]["category_name"] == "Supermarket"
+    assert by_merchant["Magazin 1"]["category_name"] is None
+    assert all(item["account_name"] == "Card" for item in items)
+    assert all(item["account_id"] == account["id"] for item in items)
+
+
+@pytest.mark.anyio
+async def test_get_transaction_uses_one_query(async_client: AsyncClient, db_session, sql_statements):
+    await _create_transactions(async_client, db_session, 2)
+    items = (await async_client.get("/transactions/")).json()
+
+    sql_statements.clear()
+    r = await async_client.get(f"/transactions/{items[0]['id']}")
+    assert r.status_code == 200
+    assert r.json() == items[0]
+    # the transaction with its names in one query, the current user may come from the identity map
+    assert len([s for s in sql_statements if not s.startswith("SELECT users.")]) == 1
+
+    r = await async_client.get("/transactions/999999")
+    assert r.status_code == 404
@@ -0,0 +1,59 @@
+import pytest
+
+from helpers.vision_client import (
+    RecordingVisionBackend,
+    ReplayVisionBackend,
+    VisionBackend,
+    VisionBatcher,
+)
+
+
+class _CountingBackend(VisionBackend):
+    def __init__(self):
+        self.calls = []
+
+    def annotate(self, contents):
+        self.calls.append(len(contents))
+        return [c.decode() if c != b"bad" else RuntimeError("bad image") for c in contents]
+
+
+def test_vision_batcher_groups_concurrent_images():
+    backend = _CountingBackend()
+    batcher = VisionBatcher(backend, window_ms=200, max_batch=16)
+    futures = [batcher.submit(f"receipt {i}".encode()) for i in range(5)]
+
+    assert [f.result(timeout=5) for f in futures] == [f"receipt {i}" for i in range(5)]
+    assert backend.calls == [5]
+
+
+def test_vision_batcher_reports_errors_per_image():
+    batcher = VisionBatcher(_CountingBackend(), window_ms=0)
+    assert batcher.annotate(b"ok") == "ok"
+    with pytest.raises(RuntimeError, match="bad image"):
+        batcher.annotate(b"bad")
+
+
+def test_replay_backend_serves_recorded_responses(tmp_path):
+    recorder = RecordingVisionBackend(_CountingBackend(), str(tmp_path))
+    recorder.annotate([b"TOTAL 4,99", b"bad"])
+
+    replay = ReplayVisionBackend(str(tmp_path))
+    text, error, missing = replay.annotate([b"TOTAL 4,99", b"bad", b"never seen"])
+    assert text == "TOTAL 4,99"
+    assert isinstance(error, RuntimeError)
+    assert isinstance(missing, RuntimeError)
+
+
+class _ShortBackend(VisionBackend):
+    def annotate(self, contents):
+        return [c.decode() for c in contents[:1]]
+
+
+def test_vision_batcher_fails_images_missing_from_the_response():
+    batcher = VisionBatcher(_ShortBackend(), window_ms=200, max_batch=16, timeout_s=5)
+    first, second = batcher.submit(b"receipt 0"), batcher.submit(b"receipt 1")
+
+    assert first.result(timeout=5) == "receipt 0"
+    with pytest.raises(RuntimeError, match="1 responses for 2 images"):
+        second.result(timeout=5)
+    assert batcher.batches_sent == 1
@@ -0,0 +1,105 @@
+from helpers.receipt_profiles import GENERIC_PROFILE, is_total_line
+from helpers.vision import (
+    DISCOUNT,
+    NAME,
+    PRICE,
+    QTY,
+    STOP,
+    Item,
+    ReceiptStreamParser,
+    _classify_lines,
+    _parse_items_from_lines,
+    iter_receipt_items,
+)
+
+
+def test_classify_lines_tags_each_line_once():
+    tokens = _classify_lines([
+        "TOTAL 17,48", "REDUCERE -2,00", "2 BUC x 4,99", "PAINE ALBA 9,98 B", "BANANE",
+    ])
+    assert [t.tag for t in tokens] == [STOP, DISCOUNT, QTY, PRICE, NAME]
+
+
+def test_parse_items_name_and_price_lines():
+    lines = [
+        "S.C. MEGA IMAGE S.R.L.", "C.I.F. RO6719278",
+        "2,000 BUC. x 4,99", "PAINE ALBA    9,98 B",
+        "1 KG x 7,50", "BANANE",
+        "TOTAL 17,48",
+    ]
+    assert _parse_items_from_lines(lines) == [
+        Item(quantity=2.0, unit="BUC", name="PAINE ALBA", price=9.98, sale=0.0),
+        Item(quantity=1.0, unit="KG", name="BANANE", price=7.5, sale=0.0),
+    ]
+
+
+def test_parse_items_discount_applies_to_previous_item():
+    lines = ["1 BUC x 10,00", "CIOCOLATA MILKA 10,00 A", "REDUCERE 20% -2,00", "TOTAL 8,00"]
+    assert _parse_items_from_lines(lines) == [
+        Item(quantity=1.0, unit="BUC", name="CIOCOLATA MILKA", price=8.0, sale=0.2),
+    ]
+
+
+def test_parse_items_two_line_name_and_negative_line():
+    lines = ["1 BUC x 3,00", "APA PLATA", "BORSEC 2L", "1 BUC x 2,00", "-0,50", "PUNGA"]
+    assert _parse_items_from_lines(lines) == [
+        Item(quantity=1.0, unit="BUC", name="APA PLATA BORSEC 2L", price=3.0, sale=0.0),
+    ]
+
+
+def test_parse_items_discount_line_without_items_starts_an_item():
+    lines = ["2 BUC REDUCERE 1,50", "SUC", "REDUCERE -0,50"]
+    assert _parse_items_from_lines(lines) == [
+        Item(quantity=2.0, unit="BUC", name="SUC", price=1.0, sale=0.0),
+    ]
+
+
+def test_stream_parser_holds_last_item_for_discounts():
+    parser = ReceiptStreamParser(GENERIC_PROFILE)
+    assert parser.feed("1 BUC x 10,00") == []
+    assert parser.feed("CIOCOLATA 10,00 A") == []
+    assert parser.feed("REDUCERE -2,00") == []
+    assert parser.feed("1 BUC x 3,00") == []
+    # released once the next item has a name, a nameless item would not take the discount
+    assert [(it.name, it.price) for it in parser.feed("PAINE 3,00 A")] == [("CIOCOLATA", 8.0)]
+    assert [(it.name, it.price) for it in parser.close()] == [("PAINE", 3.0)]
+
+
+def test_iter_receipt_items_matches_batch_parser():
+    lines = [
+        "S.C. MEGA IMAGE S.R.L.", "C.I.F. RO6719278",
+        "2,000 BUC. x 4,99", "PAINE ALBA    9,98 B",
+        "1 BUC x 10,00", "CIOCOLATA MILKA 10,00 A", "REDUCERE 20% -2,00",
+        "TOTAL 17,98",
+    ]
+    streamed = list(iter_receipt_items(lines))
+    assert [(p.name, p.price, p.sale) for p in streamed] == [
+        (it.name, it.price, it.sale) for it in _parse_items_from_lines(lines)
+    ]
+
+
+def test_iter_receipt_items_stops_reading_at_total():
+    read = []
+
+    def lines():
+        for line in ["1 BUC x 3,00", "PAINE 3,00 A", "TOTAL 3,00", "1 BUC x 9,00", "NU SE CITESTE 9,00"]:
+            read.append(line)
+            yield line
+
+    items = list(iter_receipt_items(lines(), GENERIC_PROFILE, stop_at_total=True))
+    assert [p.name for p in items] == ["PAINE"]
+    assert read[-1] == "TOTAL 3,00"
+
+
+def test_total_line_is_not_a_total_discount():
+    assert is_total_line("TOTAL 3,00")
+    assert is_total_line("  total: 3,00")
+    assert not is_total_line("TOTAL REDUCERE -1,00")
+    assert not is_total_line("TOTAL DISCOUNT 1,00")
+    assert not is_total_line("SUBTOTAL 3,00")
+
+    parser = ReceiptStreamParser(GENERIC_PROFILE)
+    parser.feed("TOTAL REDUCERE -1,00")
+    assert not parser.total_seen
+    parser.feed("TOTAL 3,00")
+    assert parser.total_seen